@@ -0,0 +1,151 @@
+"""Micro-benchmark: parser.py and registers.py vs the original parsers.
+
+Run from the repository root:
+
+    python benchmarks/bench_parser.py [--number N]
+
+The original implementations are reproduced below so the comparison keeps
+working after the integration stopped using them. Both are checked for
+identical output on the fixtures before timing.
+"""
+import argparse
+import importlib
+import pathlib
+import re
+import sys
+import timeit
+import types
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+FIXTURES = pathlib.Path(__file__).resolve().parent / "fixtures"
+COMPONENT = ROOT / "custom_components" / "cummins_generator"
+PACKAGE = "cummins_generator_bench"
+
+
+def load_module(name):
+    """Import a module of the integration without importing Home Assistant.
+
+    The package is registered without running its __init__.py, so modules
+    that only import each other (parser, registers, const) load on their own.
+    """
+    if PACKAGE not in sys.modules:
+        package = types.ModuleType(PACKAGE)
+        package.__path__ = [str(COMPONENT)]
+        sys.modules[PACKAGE] = package
+    return importlib.import_module(f"{PACKAGE}.{name}")
+
+
+def load_parser():
+    """Import parser.py without importing the Home Assistant package."""
+    return load_module("parser")
+
+
+def legacy_parse_loads_html(html):
+    mode_match = re.search(r'writeSingleOption\(\s*1,\s*!\((\d+)\s*&\s*0x01\),\s*"Manual"\s*\)', html)
+    mode_value = int(mode_match.group(1)) if mode_match else 0
+    return {"load_mode": "Manual" if mode_value == 0 else "Automatic"}
+
+
+def legacy_parse_exercise_html(html):
+    freq_section = re.search(r'var match = (\d+);.*?writeSingleOption\(0,match == 0, "Never"\)', html, re.DOTALL)
+    frequency = int(freq_section.group(1)) if freq_section else 0
+    freq_options = ["Never", "Weekly", "Bimonthly", "Monthly"]
+    day_match = re.search(r'writeDays\((\d+)\)', html)
+    day = int(day_match.group(1)) if day_match else 0
+    day_options = ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+    hour_match = re.search(r'hrs24ToHrs12\((\d+)\)', html)
+    hour = int(hour_match.group(1)) if hour_match else 0
+    all_matches = re.findall(r'var match = (\d+);', html)
+    minute = all_matches[-1] if all_matches else "0"
+    min_options = ["00", "15", "30", "45"]
+    return {
+        "exercise_frequency": freq_options[frequency] if frequency < len(freq_options) else "Never",
+        "exercise_day": day_options[day] if day < len(day_options) else "Sunday",
+        "exercise_hour": str(hour),
+        "exercise_minute": minute if minute in min_options else "00",
+    }
+
+
+def legacy_parse_datetime(html):
+    month = re.search(r"writeMonths\((\d+)\)", html)
+    day = re.search(r"writeOptions\(1,31,(\d+)", html)
+    year = re.search(r"writeOptions\(2006,2031,(\d+)", html)
+    hour = re.search(r"""name="@402"\s+value='(\d+)'""", html)
+    minute = re.search(r"writeOptions\(0,59,(\d+)", html)
+    if all([month, day, year, hour, minute]):
+        return tuple(int(m.group(1)) for m in (year, month, day, hour, minute))
+    return None
+
+
+def legacy_parse_index_data(data):
+    lines = data.strip().split('\n')
+    if len(lines) < 18:
+        return {}
+    status_map = {
+        0: "Stopped", 1: "Stopped", 2: "Starting", 3: "Starting",
+        4: "Running", 5: "Priming", 6: f"Fault {lines[14]}", 7: "Eng.Only",
+        8: "TestMode", 9: "Volt Adj", 20: "Config Mode", 21: "Cycle crank pause",
+        22: "Exercising", 23: "Engine Cooldown"
+    }
+    return {
+        "status": status_map.get(int(lines[4]), f"Unknown {lines[4]}"),
+        "battery_voltage": float(lines[3]) / 10,
+        "output_voltage": int(lines[7]),
+        "frequency": int(lines[8]),
+        "engine_hours": round(int(lines[9]) / 6) / 10,
+        "load_1": int(lines[5]),
+        "load_2": int(lines[6]),
+        "lcd_status": int(lines[13]),
+    }
+
+
+def cases(parser):
+    """Return (name, fixture, legacy, new) tuples with comparable outputs."""
+
+    def new_datetime(html):
+        page = parser.parse_timedate(html)
+        if page.complete:
+            return (page.year, page.month, page.day, page.hour, page.minute)
+        return None
+
+    decode_index = load_module("registers").decode_index
+
+    def new_index_data(data):
+        # The register map also decodes fields the original dropped
+        decoded = decode_index(data)
+        decoded.pop("fault_code", None)
+        return decoded
+
+    return [
+        ("index_data.html", "index_data.html", legacy_parse_index_data, new_index_data),
+        ("loads.html", "loads.html", legacy_parse_loads_html,
+         lambda html: {"load_mode": parser.parse_loads(html).load_mode}),
+        ("exercise.html", "exercise.html", legacy_parse_exercise_html,
+         lambda html: parser.parse_exercise(html).as_dict()),
+        ("timedate.html", "timedate.html", legacy_parse_datetime, new_datetime),
+    ]
+
+
+def main():
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    args.add_argument("--number", type=int, default=2000, help="calls per timing run")
+    args.add_argument("--repeat", type=int, default=5, help="timing runs, best is reported")
+    opts = args.parse_args()
+
+    parser = load_parser()
+    print(f"{'page':<16}{'legacy us':>12}{'new us':>16}{'speedup':>10}")
+    for name, fixture, legacy, new in cases(parser):
+        html = (FIXTURES / fixture).read_text()
+        expected = legacy(html)
+        actual = new(html)
+        if expected != actual:
+            raise SystemExit(f"{name}: parsers disagree: {expected!r} != {actual!r}")
+        legacy_time = min(timeit.repeat(lambda: legacy(html), number=opts.number, repeat=opts.repeat))
+        new_time = min(timeit.repeat(lambda: new(html), number=opts.number, repeat=opts.repeat))
+        legacy_us = legacy_time / opts.number * 1e6
+        new_us = new_time / opts.number * 1e6
+        print(f"{name:<16}{legacy_us:>12.1f}{new_us:>16.1f}{legacy_us / new_us:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
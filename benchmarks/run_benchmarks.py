@@ -0,0 +1,257 @@
+"""Benchmark suite for the polling hot paths, checked against baselines.
+
+Run from the repository root:
+
+    python benchmarks/run_benchmarks.py                     # compare with baselines
+    python benchmarks/run_benchmarks.py --update-baselines  # record new baselines
+    python benchmarks/run_benchmarks.py --only cycle        # a subset, by name prefix
+
+    # Timings, against a run of the base branch on the same machine
+    python benchmarks/run_benchmarks.py --timings --update-baselines --baselines /tmp/base.json
+    python benchmarks/run_benchmarks.py --timings --baselines /tmp/base.json
+
+Each benchmark reports some of:
+
+    us            wall time per call or per refresh cycle, in microseconds
+    alloc_bytes   peak memory allocated during one parse (tracemalloc)
+    requests      HTTP requests per refresh cycle
+    bytes         response body bytes per refresh cycle
+
+The exit status is 1 if any metric is worse than its baseline by more
+than the tolerance. Only the metrics that do not depend on the machine
+(allocations, requests and bytes) are checked by default, and only they
+are kept in the committed baselines.json. Timings are always printed; with
+``--timings`` they are recorded and checked too, which only makes sense
+against baselines recorded on the same machine.
+
+The parser.* benchmarks (parser.py and the registers.py decoder) only
+need Python. The coordinator.* and cycle.*
+benchmarks import the integration and need Home Assistant installed; the
+cycle.* ones run the coordinators against tools/simulator.py. Benchmarks
+whose requirements are missing are reported as skipped.
+"""
+import argparse
+import asyncio
+import json
+import pathlib
+import statistics
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+
+from bench_parser import FIXTURES, ROOT, load_module, load_parser
+
+BASELINES = pathlib.Path(__file__).resolve().parent / "baselines.json"
+# Allowed growth over the baseline before a metric counts as a regression
+TOLERANCES = {"us": 0.5, "alloc_bytes": 0.1, "requests": 0.0, "bytes": 0.05}
+# Metrics that depend on the machine; only recorded and checked with --timings
+TIMING_METRICS = {"us"}
+SIMULATOR_PORT = 18780
+
+
+def selected(name, opts):
+    """Return True if a benchmark was asked for with --only."""
+    return name.startswith(tuple(opts.only))
+
+
+def measure_parse(func, html, number, repeat):
+    """Return the time and allocation metrics for one parser."""
+    func(html)
+    best = min(timeit.repeat(lambda: func(html), number=number, repeat=repeat))
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        func(html)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"us": best / number * 1e6, "alloc_bytes": peak - before}
+
+
+def parser_benchmarks(opts):
+    """Benchmark parser.py and registers.py on the page fixtures."""
+    parser = load_parser()
+    registers = load_module("registers")
+    cases = {
+        "parser.index_data": (registers.decode_index, "index_data.html"),
+        "parser.loads": (parser.parse_loads, "loads.html"),
+        "parser.exercise": (parser.parse_exercise, "exercise.html"),
+        "parser.timedate": (parser.parse_timedate, "timedate.html"),
+    }
+    for name, (func, fixture) in cases.items():
+        html = (FIXTURES / fixture).read_text()
+        yield name, measure_parse(func, html, opts.number, opts.repeat)
+
+
+def import_integration():
+    """Import the integration, or return None without Home Assistant."""
+    sys.path.insert(0, str(ROOT))
+    sys.path.insert(0, str(ROOT / "tools"))
+    try:
+        from homeassistant.core import HomeAssistant
+        from custom_components.cummins_generator import client, datetime, select, sensor
+        import simulator
+    except ImportError as err:
+        print(f"skipping coordinator and cycle benchmarks: {err}")
+        return None
+    return HomeAssistant, client, sensor, select, datetime, simulator
+
+
+async def integration_benchmarks(opts, modules):
+    """Benchmark the coordinator parsers and full refresh cycles."""
+    HomeAssistant, client_module, sensor, select, datetime, simulator = modules
+    results = {}
+    hass = HomeAssistant(tempfile.mkdtemp())
+    sim = simulator.Simulator()
+    # A controller on a slow link, sending each page a TCP segment at a time
+    # Like the real controller, the slow one sends no charset
+    slow = simulator.Simulator(
+        faults=simulator.Faults(chunk_size=1460, chunk_delay=0.005), charset=None
+    )
+    runners = await simulator.serve([sim, slow], port=SIMULATOR_PORT)
+    clients = []
+
+    def coordinators(port=SIMULATOR_PORT):
+        client = client_module.CumminsGeneratorClient(f"127.0.0.1:{port}", "cummins")
+        clients.append(client)
+        created = (
+            sensor.CumminsGeneratorCoordinator(hass, client),
+            select.CumminsLoadCoordinator(hass, client),
+            datetime.CumminsClockCoordinator(hass, client),
+        )
+        # Stand in for enabled entities on every page, so the demand-driven
+        # coordinators read all of them
+        for coordinator in created:
+            for page in coordinator.pages:
+                coordinator.async_add_listener(lambda: None, page)
+        return created
+
+    async def cycle(polled, sim=sim):
+        sim.reset_stats()
+        start = time.perf_counter()
+        for coordinator in polled:
+            await coordinator.async_refresh()
+            if not coordinator.last_update_success:
+                raise SystemExit(f"{coordinator.name} refresh failed against the simulator")
+        elapsed = time.perf_counter() - start
+        stats = sim.stats()
+        return elapsed, sum(stats["requests"].values()), stats["bytes_sent"]
+
+    def summary(samples):
+        return {
+            "us": statistics.median(sample[0] for sample in samples) * 1e6,
+            "requests": statistics.mean(sample[1] for sample in samples),
+            "bytes": statistics.mean(sample[2] for sample in samples),
+        }
+
+    try:
+        status, loads, clock = coordinators()
+        cases = {
+            "coordinator.parse_data": (status._parse_data, "index_data.html"),
+            "coordinator.parse_loads_html": (loads._parse_loads_html, "loads.html"),
+            "coordinator.parse_exercise_html": (loads._parse_exercise_html, "exercise.html"),
+            "coordinator.parse_datetime": (clock._parse_datetime, "timedate.html"),
+        }
+        for name, (func, fixture) in cases.items():
+            if selected(name, opts):
+                html = (FIXTURES / fixture).read_text()
+                results[name] = measure_parse(func, html, opts.number, opts.repeat)
+
+        if selected("cycle.cold", opts):
+            # A new client's first refresh of every coordinator: connection
+            # setup plus one read of every page
+            samples = [await cycle(coordinators()) for _ in range(opts.cold_cycles)]
+            results["cycle.cold"] = summary(samples)
+        if selected("cycle.warm", opts):
+            # Once set up, a cycle only polls the status and load pages
+            await cycle((status, loads, clock))
+            samples = [await cycle((status, loads)) for _ in range(opts.cycles)]
+            results["cycle.warm"] = summary(samples)
+        if selected("cycle.slow", opts):
+            # A first refresh over the slow link; the configuration pages
+            # are only read up to the values they carry
+            samples = [
+                await cycle(coordinators(SIMULATOR_PORT + 1), slow) for _ in range(opts.cold_cycles)
+            ]
+            results["cycle.slow"] = summary(samples)
+    finally:
+        for client in clients:
+            await client.async_close()
+        for runner in runners:
+            await runner.cleanup()
+        await hass.async_stop(force=True)
+    return results
+
+
+def compare(results, baselines, tolerances, checked):
+    """Print the results next to the baselines; return the regressions.
+
+    Only metrics in ``checked`` can count as regressions.
+    """
+    regressions = []
+    print(f"{'benchmark':<34}{'metric':<13}{'value':>12}{'baseline':>12}{'change':>9}")
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            baseline = baselines.get(name, {}).get(metric)
+            if baseline is None:
+                print(f"{name:<34}{metric:<13}{value:>12.1f}{'-':>12}{'new' if metric in checked else '':>9}")
+                continue
+            change = (value - baseline) / baseline if baseline else 0.0
+            flag = ""
+            if (
+                metric in checked
+                and value > baseline * (1 + tolerances[metric])
+                and value - baseline > 1e-9
+            ):
+                regressions.append((name, metric, value, baseline))
+                flag = "  REGRESSION"
+            print(f"{name:<34}{metric:<13}{value:>12.1f}{baseline:>12.1f}{change:>+8.0%}{flag}")
+    return regressions
+
+
+def main():
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    args.add_argument("--number", type=int, default=2000, help="calls per timing run")
+    args.add_argument("--repeat", type=int, default=5, help="timing runs, best is reported")
+    args.add_argument("--cycles", type=int, default=50, help="warm refresh cycles to sample")
+    args.add_argument("--cold-cycles", type=int, default=10, help="cold refresh cycles to sample")
+    args.add_argument("--only", action="append", default=[], help="run benchmarks with this name prefix")
+    args.add_argument("--time-tolerance", type=float, default=TOLERANCES["us"],
+                      help="allowed relative slowdown with --timings (default %(default)s)")
+    args.add_argument("--timings", action="store_true",
+                      help="also record and check wall times (same machine only)")
+    args.add_argument("--baselines", type=pathlib.Path, default=BASELINES)
+    args.add_argument("--update-baselines", action="store_true", help="record the results as baselines")
+    opts = args.parse_args()
+    opts.only = opts.only or [""]
+
+    results = {}
+    for name, metrics in parser_benchmarks(opts):
+        if selected(name, opts):
+            results[name] = metrics
+    modules = import_integration()
+    if modules is not None:
+        results.update(asyncio.run(integration_benchmarks(opts, modules)))
+
+    baselines = json.loads(opts.baselines.read_text()) if opts.baselines.exists() else {}
+    checked = set(TOLERANCES) if opts.timings else set(TOLERANCES) - TIMING_METRICS
+    if opts.update_baselines:
+        baselines.update({
+            name: {metric: round(value, 1) for metric, value in metrics.items() if metric in checked}
+            for name, metrics in results.items()
+        })
+        opts.baselines.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+        print(f"recorded {len(results)} baselines in {opts.baselines}")
+        return
+
+    regressions = compare(results, baselines, {**TOLERANCES, "us": opts.time_tolerance}, checked)
+    if regressions:
+        print(f"\n{len(regressions)} metric(s) regressed past the baselines")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
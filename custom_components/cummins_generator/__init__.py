@@ -1,35 +1,38 @@
 """Cummins Generator integration."""
-import aiohttp
-import base64
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
-from homeassistant.exceptions import ConfigEntryNotReady
-from homeassistant.const import CONF_HOST
-from .sensor import CumminsGeneratorCoordinator
+from .hub import CumminsHub
+from .snapshot import async_remove_snapshot
 
 DOMAIN = "cummins_generator"
+PLATFORMS = ["sensor", "button", "binary_sensor", "select", "datetime"]
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Cummins Generator from a config entry."""
-    host = entry.data[CONF_HOST]
-    password = entry.data.get("password", "cummins")
-    
-    # Create shared coordinator
-    coordinator = CumminsGeneratorCoordinator(hass, host, password)
-    
-    # Test connectivity
-    try:
-        await coordinator.async_config_entry_first_refresh()
-    except Exception as err:
-        raise ConfigEntryNotReady(f"Cannot connect to generator: {err}")
-    
-    # Store coordinator for platforms to use
-    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
-    
-    await hass.config_entries.async_forward_entry_setups(entry, ["sensor", "button", "binary_sensor", "select", "datetime"])
+    hub = CumminsHub(hass, entry)
+    await hub.async_setup()
+
+    # Store the hub for platforms to use
+    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = hub
+
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    # The entities are added now, so the hub knows which pages they show
+    await hub.async_start()
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
     return True
 
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the config entry when its options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
-    hass.data[DOMAIN].pop(entry.entry_id)
-    return await hass.config_entries.async_unload_platforms(entry, ["sensor", "button", "binary_sensor", "select", "datetime"])
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    if unload_ok:
+        hub = hass.data[DOMAIN].pop(entry.entry_id)
+        await hub.async_unload()
+    return unload_ok
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Delete the saved snapshot of a removed entry."""
+    await async_remove_snapshot(hass, entry.entry_id)
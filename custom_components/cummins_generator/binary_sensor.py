@@ -2,39 +2,36 @@
 from homeassistant.components.binary_sensor import BinarySensorEntity, BinarySensorDeviceClass
 from homeassistant.const import CONF_HOST
 from homeassistant.helpers.entity import DeviceInfo
+from .entity import CumminsChangeOnlyEntity
+from .registers import INDEX_FIELDS
 from .sensor import CumminsGeneratorCoordinator
 
 DOMAIN = "cummins_generator"
 
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """Set up the Cummins Generator binary sensors."""
-    coordinator = hass.data["cummins_generator"][config_entry.entry_id]
+    coordinator = hass.data["cummins_generator"][config_entry.entry_id].coordinator
     
     binary_sensors = [
-        CumminsGeneratorBinarySensor(coordinator, "utility_present", "Utility Present", 0x01),
-        CumminsGeneratorBinarySensor(coordinator, "utility_connected", "Utility Connected", 0x02),
-        CumminsGeneratorBinarySensor(coordinator, "genset_running", "Genset Running", 0x0C),
-        CumminsGeneratorBinarySensor(coordinator, "standby_disabled", "Standby Disabled", 0x10),
-        CumminsGeneratorBinarySensor(coordinator, "action_required", "Action Required", 0x60),
+        CumminsGeneratorBinarySensor(coordinator, field.key, bit)
+        for field in INDEX_FIELDS
+        for bit in field.bits
     ]
     async_add_entities(binary_sensors)
 
-class CumminsGeneratorBinarySensor(BinarySensorEntity):
+class CumminsGeneratorBinarySensor(CumminsChangeOnlyEntity, BinarySensorEntity):
     """Representation of a Cummins Generator binary sensor."""
 
-    def __init__(self, coordinator, sensor_type, name, mask):
-        """Initialize the binary sensor."""
-        self.coordinator = coordinator
-        self.sensor_type = sensor_type
-        self._name = name
-        self.mask = mask
-        self._attr_unique_id = f"{coordinator.host}_{sensor_type}"
-        if sensor_type == "action_required":
-            self._attr_device_class = BinarySensorDeviceClass.PROBLEM
-        elif sensor_type == "utility_present":
-            self._attr_device_class = BinarySensorDeviceClass.POWER
-        elif sensor_type == "genset_running":
-            self._attr_device_class = BinarySensorDeviceClass.RUNNING
+    def __init__(self, coordinator, field_key, bit):
+        """Initialize the binary sensor for bits of an index_data.html field."""
+        super().__init__(coordinator)
+        self.field_key = field_key
+        self.sensor_type = bit.key
+        self._name = bit.name
+        self.mask = bit.mask
+        self._attr_unique_id = f"{coordinator.host}_{bit.key}"
+        if bit.device_class:
+            self._attr_device_class = BinarySensorDeviceClass(bit.device_class)
 
     @property
     def name(self):
@@ -56,14 +53,9 @@ class CumminsGeneratorBinarySensor(BinarySensorEntity):
         """Return true if the binary sensor is on."""
         if not self.coordinator.data:
             return False
-        lcd_status = self.coordinator.data.get("lcd_status", 0)
-        return bool(lcd_status & self.mask)
+        value = self.coordinator.data.get(self.field_key)
+        return None if value is None else bool(value & self.mask)
 
-    @property
-    def available(self):
-        """Return if entity is available."""
-        return self.coordinator.last_update_success
-
-    async def async_update(self):
-        """Update the entity."""
-        await self.coordinator.async_request_refresh()
+    def _publish_value(self):
+        """Compare on the on/off state."""
+        return self.is_on
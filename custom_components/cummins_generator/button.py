@@ -1,42 +1,71 @@
 """Cummins Generator button platform."""
-import aiohttp
-import base64
 import logging
 from homeassistant.components.button import ButtonEntity
 from homeassistant.const import CONF_HOST
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.util import dt as dt_util
+from .const import LCD_STANDBY_DISABLED
 
 _LOGGER = logging.getLogger(__name__)
 DOMAIN = "cummins_generator"
 
+
+def _standby_disabled(disabled):
+    """Return an effect that sets or clears the standby disabled bit."""
+    def effect(data):
+        lcd_status = data["lcd_status"]
+        if disabled:
+            return {"lcd_status": lcd_status | LCD_STANDBY_DISABLED}
+        return {"lcd_status": lcd_status & ~LCD_STANDBY_DISABLED}
+    return effect
+
+
+# Expected change to coordinator data once each command is accepted
+BUTTON_EFFECTS = {
+    "start": lambda data: {"status": "Starting"},
+    "stop": lambda data: {"status": "Stopped"},
+    "enable_standby": _standby_disabled(False),
+    "disable_standby": _standby_disabled(True),
+    "exercise_now": lambda data: {"status": "Exercising"},
+}
+
+# Status check that confirms each command took effect
+BUTTON_CONFIRMS = {
+    "start": lambda data: data.get("status") in ("Priming", "Starting", "Cycle crank pause", "Running"),
+    "stop": lambda data: data.get("status") in ("Engine Cooldown", "Stopped"),
+    "enable_standby": lambda data: not data["lcd_status"] & LCD_STANDBY_DISABLED,
+    "disable_standby": lambda data: bool(data["lcd_status"] & LCD_STANDBY_DISABLED),
+    "exercise_now": lambda data: data.get("status") in ("Priming", "Starting", "Cycle crank pause", "Exercising"),
+}
+
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """Set up the Cummins Generator buttons."""
-    host = config_entry.data[CONF_HOST]
-    password = config_entry.data.get("password", "cummins")
-    auth = base64.b64encode(f"admin:{password}".encode()).decode("ascii")
+    hub = hass.data[DOMAIN][config_entry.entry_id]
+    coordinator = hub.coordinator
+    clock = hub.clock
     
     buttons = [
-        CumminsGeneratorButton(host, auth, "start", "Start Genset", "@242=2"),
-        CumminsGeneratorButton(host, auth, "stop", "Stop Genset", "@242=1"),
-        CumminsGeneratorButton(host, auth, "enable_standby", "Enable Standby", "@385=1"),
-        CumminsGeneratorButton(host, auth, "disable_standby", "Disable Standby", "@385=0"),
-        CumminsGeneratorButton(host, auth, "exercise_now", "Exercise Now", "@242=3"),
-        CumminsGeneratorSyncTimeButton(host, auth),
+        CumminsGeneratorButton(coordinator, "start", "Start Genset", {242: 2}),
+        CumminsGeneratorButton(coordinator, "stop", "Stop Genset", {242: 1}),
+        CumminsGeneratorButton(coordinator, "enable_standby", "Enable Standby", {385: 1}),
+        CumminsGeneratorButton(coordinator, "disable_standby", "Disable Standby", {385: 0}),
+        CumminsGeneratorButton(coordinator, "exercise_now", "Exercise Now", {242: 3}),
+        CumminsGeneratorSyncTimeButton(coordinator, clock),
     ]
     async_add_entities(buttons)
 
 class CumminsGeneratorButton(ButtonEntity):
     """Representation of a Cummins Generator button."""
 
-    def __init__(self, host, auth, button_type, name, parameter):
+    def __init__(self, coordinator, button_type, name, registers):
         """Initialize the button."""
-        self.host = host
-        self.auth = auth
+        self.coordinator = coordinator
+        self.client = coordinator.client
+        self.host = coordinator.host
         self.button_type = button_type
         self._name = name
-        self.parameter = parameter
-        self._attr_unique_id = f"{host}_{button_type}"
+        self.registers = registers
+        self._attr_unique_id = f"{self.host}_{button_type}"
 
     @property
     def name(self):
@@ -56,23 +85,31 @@ class CumminsGeneratorButton(ButtonEntity):
     async def async_press(self):
         """Handle the button press."""
         try:
-            async with aiohttp.ClientSession() as session:
-                headers = {"Authorization": f"Basic {self.auth}"}
-                url = f"http://{self.host}/wr_logical.cgi?{self.parameter}"
-                async with session.get(url, headers=headers) as response:
-                    if response.status != 200:
-                        _LOGGER.error(f"Failed to execute {self._name}: {response.status}")
+            await self.coordinator.commands.async_submit(
+                self.button_type, self.registers, BUTTON_CONFIRMS.get(self.button_type)
+            )
         except Exception as err:
             _LOGGER.error(f"Error executing {self._name}: {err}")
+        else:
+            # Show the expected state now and follow the real transition
+            # closely while the command takes effect
+            self.coordinator.start_burst()
+            effect = BUTTON_EFFECTS.get(self.button_type)
+            updates = effect(self.coordinator.data or {}) if effect else {}
+            self.coordinator.async_apply_optimistic(
+                updates, verify_delay=self.coordinator.burst_interval.total_seconds()
+            )
 
 
 class CumminsGeneratorSyncTimeButton(ButtonEntity):
     """Button to sync generator time to HA clock."""
 
-    def __init__(self, host, auth):
-        self.host = host
-        self.auth = auth
-        self._attr_unique_id = f"{host}_sync_time"
+    def __init__(self, coordinator, clock):
+        self.coordinator = coordinator
+        self.clock = clock
+        self.client = coordinator.client
+        self.host = coordinator.host
+        self._attr_unique_id = f"{self.host}_sync_time"
 
     @property
     def name(self):
@@ -89,12 +126,10 @@ class CumminsGeneratorSyncTimeButton(ButtonEntity):
 
     async def async_press(self):
         now = dt_util.now()
-        params = f"@448={now.month}&@449={now.day}&@450={now.year}&@402={now.hour}&@403={now.minute}"
+        registers = {448: now.month, 449: now.day, 450: now.year, 402: now.hour, 403: now.minute}
         try:
-            async with aiohttp.ClientSession() as session:
-                headers = {"Authorization": f"Basic {self.auth}"}
-                async with session.get(f"http://{self.host}/wr_logical.cgi?{params}", headers=headers) as resp:
-                    if resp.status != 200:
-                        _LOGGER.error("Failed to sync time: %s", resp.status)
+            await self.coordinator.commands.async_submit("sync_time", registers)
         except Exception as err:
             _LOGGER.error("Error syncing time: %s", err)
+        else:
+            self.clock.async_clock_set(now.replace(second=0, microsecond=0))
@@ -0,0 +1,284 @@
+"""High-rate capture of index_data.html around start and transfer events.
+
+Regular polling is too coarse to see how long a start or a transfer takes.
+When the status coordinator sees the engine start or the utility bits
+change, ``BurstCapture`` samples index_data.html at a sub-second rate for a
+bounded window. Samples go into a preallocated ``CaptureBuffer`` and never
+reach the coordinator or its entities; once the window closes the capture
+is summarized, announced with an event and kept for diagnostics. Each
+sample is also passed to ``observer`` if one is given, so edge events
+(see edges.py) are not held back until the next regular poll.
+
+Nothing here imports Home Assistant; the event is fired on the ``hass``
+passed in.
+"""
+import asyncio
+import logging
+import math
+from array import array
+from collections import deque
+from datetime import datetime, timezone
+from .client import CumminsGeneratorError
+from .const import (
+    CAPTURE_DURATION,
+    CAPTURE_FREQUENCY_TOLERANCE,
+    CAPTURE_HISTORY,
+    CAPTURE_INTERVAL,
+    CAPTURE_START_STATUSES,
+    CAPTURE_VOLTAGE_TOLERANCE,
+    LCD_UTILITY_CONNECTED,
+    LCD_UTILITY_PRESENT,
+)
+from .registers import decode_index, is_complete
+
+_LOGGER = logging.getLogger(__name__)
+EVENT_CAPTURE = "cummins_generator_capture"
+
+# Captured fields and their array type codes
+CAPTURE_COLUMNS = (
+    ("output_voltage", "f"),
+    ("frequency", "f"),
+    ("battery_voltage", "f"),
+    ("load_1", "f"),
+    ("load_2", "f"),
+    ("lcd_status", "H"),
+)
+UTILITY_BITS = LCD_UTILITY_PRESENT | LCD_UTILITY_CONNECTED
+
+
+class CaptureBuffer:
+    """Fixed-size ring of samples stored column-wise in typed arrays.
+
+    All storage is allocated up front. Once full, each new sample
+    overwrites the oldest. Status labels are stored as indexes into
+    ``labels``.
+    """
+
+    def __init__(self, capacity):
+        """Allocate room for ``capacity`` samples."""
+        self.capacity = capacity
+        self.times = array("d", bytes(8 * capacity))
+        self.columns = {
+            key: array(code, bytes(array(code).itemsize * capacity))
+            for key, code in CAPTURE_COLUMNS
+        }
+        self.statuses = array("B", bytes(capacity))
+        self.labels = []
+        self._start = 0
+        self._length = 0
+
+    def __len__(self):
+        """Return the number of samples held."""
+        return self._length
+
+    def append(self, offset, data):
+        """Store a decoded page taken ``offset`` seconds into the capture."""
+        index = (self._start + self._length) % self.capacity
+        if self._length < self.capacity:
+            self._length += 1
+        else:
+            self._start = (self._start + 1) % self.capacity
+        self.times[index] = offset
+        for key, column in self.columns.items():
+            column[index] = data.get(key) or 0
+        status = data.get("status", "")
+        try:
+            self.statuses[index] = self.labels.index(status)
+        except ValueError:
+            self.labels.append(status)
+            self.statuses[index] = len(self.labels) - 1
+
+    def _order(self):
+        """Return the storage indexes from oldest to newest."""
+        return [(self._start + i) % self.capacity for i in range(self._length)]
+
+    def column(self, key):
+        """Return one field's samples from oldest to newest."""
+        if key == "t":
+            values = self.times
+        elif key == "status":
+            return [self.labels[self.statuses[i]] for i in self._order()]
+        else:
+            values = self.columns[key]
+        return [values[i] for i in self._order()]
+
+    def as_dict(self):
+        """Return every column as a list, for download."""
+        samples = {"t": [round(t, 3) for t in self.column("t")]}
+        samples["status"] = self.column("status")
+        for key, code in CAPTURE_COLUMNS:
+            values = self.column(key)
+            samples[key] = values if code != "f" else [round(value, 2) for value in values]
+        return samples
+
+
+def _time_to_settle(times, values, tolerance):
+    """Return when a series settled within ``tolerance`` of its final level.
+
+    The final level is the median of the last quarter of samples. None is
+    returned if that level is zero (nothing was generated) or the series
+    never stayed inside the band.
+    """
+    tail = sorted(values[-max(1, len(values) // 4):])
+    level = tail[len(tail) // 2]
+    if level <= 0:
+        return None
+    band = level * tolerance
+    settled = None
+    for t, value in zip(times, values):
+        if abs(value - level) <= band:
+            if settled is None:
+                settled = t
+        else:
+            settled = None
+    return None if settled is None else round(max(settled, 0.0), 2)
+
+
+def summarize(buffer):
+    """Summarize a finished capture.
+
+    ``time_to_rated_*`` is the time from the trigger until the output
+    settled within tolerance of the level it held at the end of the
+    window. ``transfer_duration`` is the time between the first and last
+    change of the utility bits seen in the window.
+    """
+    times = buffer.column("t")
+    summary = {"samples": len(buffer), "window": round(times[-1], 2) if times else 0.0}
+    if len(buffer) < 2:
+        return summary
+    voltage = buffer.column("output_voltage")
+    frequency = buffer.column("frequency")
+    summary["time_to_rated_voltage"] = _time_to_settle(times, voltage, CAPTURE_VOLTAGE_TOLERANCE)
+    summary["time_to_rated_frequency"] = _time_to_settle(times, frequency, CAPTURE_FREQUENCY_TOLERANCE)
+    summary["output_voltage_range"] = [min(voltage), max(voltage)]
+    summary["frequency_range"] = [min(frequency), max(frequency)]
+
+    changes = []
+    lcd = buffer.column("lcd_status")
+    for t, before, after in zip(times[1:], lcd, lcd[1:]):
+        if (before ^ after) & UTILITY_BITS:
+            changes.append(t)
+    summary["transfer_duration"] = round(changes[-1] - changes[0], 2) if changes else None
+
+    statuses = buffer.column("status")
+    summary["statuses"] = [
+        status for i, status in enumerate(statuses) if i == 0 or status != statuses[i - 1]
+    ]
+    return summary
+
+
+class BurstCapture:
+    """Starts, runs and keeps high-rate captures for one controller."""
+
+    def __init__(self, hass, client, interval=CAPTURE_INTERVAL, duration=CAPTURE_DURATION, observer=None):
+        """Initialize the capture manager."""
+        self.hass = hass
+        self.client = client
+        self.observer = observer
+        self.interval = interval
+        self.duration = duration
+        self.captures = deque(maxlen=CAPTURE_HISTORY)
+        self._previous = None
+        self._task = None
+
+    @property
+    def active(self):
+        """Return True while a capture is running."""
+        return self._task is not None and not self._task.done()
+
+    @staticmethod
+    def trigger(previous, data):
+        """Return why a poll should start a capture, or None."""
+        if previous is None:
+            return None
+        status = data.get("status")
+        if status in CAPTURE_START_STATUSES and previous.get("status") not in CAPTURE_START_STATUSES:
+            return f"status {status}"
+        changed = (previous["lcd_status"] ^ data["lcd_status"]) & UTILITY_BITS
+        if changed:
+            return f"utility bits {changed:#04x}"
+        return None
+
+    def observe(self, data):
+        """Check a regular poll for a trigger and start a capture on one."""
+        now = asyncio.get_running_loop().time()
+        previous, self._previous = self._previous, (now, data)
+        if self.active or previous is None:
+            return
+        reason = self.trigger(previous[1], data)
+        if reason is None:
+            return
+        buffer = CaptureBuffer(math.ceil(self.duration / self.interval) + 2)
+        # The poll before the trigger is kept as the baseline
+        buffer.append(previous[0] - now, previous[1])
+        buffer.append(0.0, data)
+        _LOGGER.debug("%s: starting capture on %s", self.client.host, reason)
+        self._task = self.hass.async_create_background_task(
+            self._async_run(buffer, reason, now),
+            f"cummins_generator capture {self.client.host}",
+        )
+
+    async def _async_run(self, buffer, reason, start):
+        """Sample index_data.html until the window closes."""
+        loop = asyncio.get_running_loop()
+        started_at = datetime.now(timezone.utc)
+        failures = 0
+        last = None
+        deadline = start + self.duration
+        next_sample = start + self.interval
+        while next_sample <= deadline:
+            delay = next_sample - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            sent = loop.time()
+            try:
+                text = await self.client.async_get_text("index_data.html")
+            except CumminsGeneratorError as err:
+                failures += 1
+                _LOGGER.debug("%s: capture sample failed: %s", self.client.host, err)
+            else:
+                data = decode_index(text)
+                if is_complete(data):
+                    received = loop.time()
+                    if self.observer is not None:
+                        self.observer(data, sent, received, "capture")
+                    buffer.append(received - start, data)
+                    last = (received, data)
+                else:
+                    failures += 1
+            # Keep a fixed rate; skip slots a slow response ran past
+            now = loop.time()
+            next_sample += self.interval
+            if next_sample < now:
+                next_sample += math.ceil((now - next_sample) / self.interval) * self.interval
+
+        summary = {
+            "trigger": reason,
+            "started_at": started_at.isoformat(),
+            "interval": self.interval,
+            "failures": failures,
+            **summarize(buffer),
+        }
+        self.captures.append((summary, buffer))
+        if last is not None:
+            # Changes the capture already saw should not trigger another
+            self._previous = last
+        _LOGGER.debug("%s: capture finished: %s", self.client.host, summary)
+        self.hass.bus.async_fire(EVENT_CAPTURE, {"host": self.client.host, **summary})
+
+    async def async_cancel(self):
+        """Stop a running capture without keeping it."""
+        if self.active:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    def as_dict(self):
+        """Return every kept capture with its samples."""
+        return [
+            {"summary": summary, "samples": buffer.as_dict()}
+            for summary, buffer in self.captures
+        ]
@@ -0,0 +1,360 @@
+"""HTTP client for the Cummins Generator web interface."""
+import aiohttp
+import asyncio
+import base64
+import logging
+import time
+from contextlib import asynccontextmanager
+from .const import (
+    BREAKER_BACKOFF_INITIAL,
+    BREAKER_BACKOFF_MAX,
+    BREAKER_PROBE_PATH,
+    BREAKER_THRESHOLD,
+    CONNECT_TIMEOUT,
+    DEFAULT_MAX_CONNECTIONS,
+    KEEPALIVE_TIMEOUT,
+    READ_TIMEOUT,
+    REQUEST_TIMEOUT,
+    WRITE_COALESCE_WINDOW,
+)
+from .parser import PageStream
+from .stats import ControllerStats
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class CumminsGeneratorError(Exception):
+    """Error communicating with the generator controller."""
+
+
+class CumminsGeneratorUnavailable(CumminsGeneratorError):
+    """The controller did not answer, or is being backed off from."""
+
+
+def format_registers(registers):
+    """Format a register mapping as wr_logical.cgi query parameters."""
+    return "&".join(f"@{register}={value}" for register, value in registers.items())
+
+
+class _WriteBatch:
+    """Register writes waiting to be sent together."""
+
+    def __init__(self, future):
+        self.registers = {}
+        self.future = future
+        self.handle = None
+
+
+class CircuitBreaker:
+    """Tracks whether a controller is reachable.
+
+    Closed: requests go through. After BREAKER_THRESHOLD consecutive
+    failures it opens. While open, requests fail at once, until a backoff
+    expires that doubles on every failed probe. Then one caller is let
+    through as the probe. Its result closes the breaker or opens it again.
+    """
+
+    def __init__(self, host):
+        """Initialize the breaker."""
+        self.host = host
+        self.failures = 0
+        self.opens = 0
+        self.retry_at = None
+        self.probing = False
+
+    @property
+    def state(self):
+        """Return closed, open or half_open."""
+        if self.retry_at is None:
+            return "closed"
+        return "half_open" if self.probing else "open"
+
+    def acquire(self):
+        """Check a request may be sent; return True if it must probe first."""
+        if self.retry_at is None:
+            return False
+        remaining = self.retry_at - time.monotonic()
+        if self.probing or remaining > 0:
+            raise CumminsGeneratorUnavailable(
+                f"{self.host} is unreachable; retrying in {max(remaining, 0):.0f} s"
+            )
+        self.probing = True
+        return True
+
+    def release(self):
+        """Give up a probe that ended without a result, e.g. when cancelled."""
+        self.probing = False
+
+    def record_success(self):
+        """Close the breaker."""
+        if self.retry_at is not None:
+            _LOGGER.info("%s is reachable again", self.host)
+        self.failures = 0
+        self.opens = 0
+        self.retry_at = None
+        self.probing = False
+
+    def record_failure(self, probe=False):
+        """Count a failure, opening the breaker or extending its backoff.
+
+        Once the breaker is open only a failed probe extends the backoff;
+        requests that were already in flight when it opened just count.
+        """
+        if probe:
+            self.probing = False
+        self.failures += 1
+        if self.retry_at is None:
+            if self.failures < BREAKER_THRESHOLD:
+                return
+        elif not probe:
+            return
+        backoff = min(BREAKER_BACKOFF_INITIAL * 2 ** self.opens, BREAKER_BACKOFF_MAX)
+        if self.opens == 0:
+            _LOGGER.warning("%s is not responding; backing off for %s s", self.host, backoff)
+        else:
+            _LOGGER.debug("%s is still not responding; backing off for %s s", self.host, backoff)
+        self.opens += 1
+        self.retry_at = time.monotonic() + backoff
+
+    def as_dict(self):
+        """Return the breaker state for diagnostics."""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "retry_in": None if self.retry_at is None else max(round(self.retry_at - time.monotonic(), 1), 0),
+        }
+
+
+class CumminsGeneratorClient:
+    """Long-lived client shared by all platforms of a config entry.
+
+    When a fleet is given, its session and in-flight cap are used; otherwise
+    the client owns a keep-alive session of its own. With ``hass``, batched
+    writes are sent from Home Assistant background tasks.
+    """
+
+    def __init__(self, host, password, max_connections=DEFAULT_MAX_CONNECTIONS, fleet=None, hass=None):
+        """Initialize the client."""
+        self.host = host
+        self.auth = base64.b64encode(f"admin:{password}".encode()).decode("ascii")
+        self.max_connections = max_connections
+        self.fleet = fleet
+        self._headers = {"Authorization": f"Basic {self.auth}"}
+        # Every page fetch and write for this controller goes through the
+        # semaphore, so independent pollers never exceed what it can serve
+        self._limiter = asyncio.Semaphore(max_connections)
+        self._session = None
+        # Register writes issued close together are merged into one request;
+        # the lock keeps batches in the order they were started
+        self._pending_writes = None
+        self._write_lock = asyncio.Lock()
+        self._write_tasks = set()
+        self.hass = hass
+        self.stats = ControllerStats()
+        # Set to a recording.TrafficRecorder to keep every exchange
+        self.recorder = None
+        # Shared by every poller and write for this host
+        self.breaker = CircuitBreaker(host)
+        self._timeout = aiohttp.ClientTimeout(
+            total=REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT, sock_read=READ_TIMEOUT
+        )
+
+    @property
+    def session(self):
+        """Return the keep-alive session, creating it on first use."""
+        if self.fleet is not None:
+            return self.fleet.session
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit_per_host=self.max_connections,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    @asynccontextmanager
+    async def request(self, path):
+        """Issue a GET for a page on the controller and yield the response.
+
+        Raises CumminsGeneratorUnavailable right away while the circuit
+        breaker is open. The breaker is checked once a slot is free, so
+        requests queued behind one that opened it fail at once too. When it
+        is due for a retry, the small status page is read first, so a
+        controller that is still down costs one tiny request instead of a
+        full page or a write.
+        """
+        async with self._limiter:
+            probe = self.breaker.acquire()
+            try:
+                if probe and path != BREAKER_PROBE_PATH:
+                    async with self._request(BREAKER_PROBE_PATH, probe=True) as response:
+                        await response.read()
+                    if self.breaker.state != "closed":
+                        # The probe got an error page; the breaker is open again
+                        raise CumminsGeneratorUnavailable(
+                            f"Error fetching {BREAKER_PROBE_PATH}: {response.status}"
+                        )
+                async with self._request(path, probe=probe and path == BREAKER_PROBE_PATH) as response:
+                    yield response
+            finally:
+                if probe:
+                    self.breaker.release()
+
+    @asynccontextmanager
+    async def _request(self, path, probe=False):
+        """Send one GET and record its outcome.
+
+        Latency is measured from sending the request to the end of the
+        block, so it includes reading the body but not waiting for a slot.
+        Timeouts and connection errors are raised as
+        CumminsGeneratorUnavailable and count against the breaker, as do
+        5xx responses. The caller holds a slot of the limiter.
+        """
+        endpoint = self.stats.endpoint(path)
+        if self.fleet is not None:
+            await self.fleet.in_flight.acquire()
+        start = time.monotonic()
+        reachable = None
+        try:
+            async with self.session.get(
+                f"http://{self.host}/{path}", headers=self._headers, timeout=self._timeout
+            ) as response:
+                reachable = response.status < 500
+                yield response
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            reachable = False
+            endpoint.record_failure(err)
+            reason = "timed out" if isinstance(err, asyncio.TimeoutError) else err
+            raise CumminsGeneratorUnavailable(f"Error fetching {path}: {reason}") from err
+        except Exception as err:
+            endpoint.record_failure(err)
+            raise
+        else:
+            endpoint.record_success(time.monotonic() - start)
+        finally:
+            if self.fleet is not None:
+                self.fleet.in_flight.release()
+            if reachable:
+                self.breaker.record_success()
+            elif reachable is False:
+                self.breaker.record_failure(probe)
+
+    async def async_get_text(self, path, tokens=None):
+        """Fetch a page and return its body.
+
+        With ``tokens`` (see parser.PAGE_TOKENS) the body is read as a
+        stream and the response is closed as soon as every token has
+        arrived, so only the start of the page is returned. If a token
+        never shows up, this is simply the whole page.
+        """
+        if self.recorder is None:
+            return await self._async_get_text(path, tokens)
+        start = time.monotonic()
+        try:
+            text = await self._async_get_text(path, tokens)
+        except CumminsGeneratorError as err:
+            self.recorder.record_read(path, time.monotonic() - start, error=err)
+            raise
+        self.recorder.record_read(path, time.monotonic() - start, body=text)
+        return text
+
+    async def _async_get_text(self, path, tokens):
+        """Fetch a page, streaming it if ``tokens`` are given."""
+        async with self.request(path) as response:
+            if response.status != 200:
+                raise CumminsGeneratorError(f"Error fetching {path}: {response.status}")
+            if tokens is None:
+                text = await response.text()
+                size = len(text)
+            else:
+                # get_encoding() would need the body to guess; the
+                # controller sends no charset and its pages are plain ASCII
+                stream = PageStream(tokens, response.charset or "latin-1")
+                async for chunk in response.content.iter_any():
+                    if stream.feed(chunk):
+                        # Drop the rest of the page; the connection is not
+                        # reused
+                        response.close()
+                        break
+                text = stream.text()
+                size = stream.size
+        self.stats.endpoint(path).record_size(size, tokens is not None and stream.complete)
+        return text
+
+    async def async_write(self, params):
+        """Write one or more registers via wr_logical.cgi."""
+        start = time.monotonic()
+        try:
+            async with self.request(f"wr_logical.cgi?{params}") as response:
+                if response.status != 200:
+                    raise CumminsGeneratorError(f"Error writing {params}: {response.status}")
+        except CumminsGeneratorError as err:
+            if self.recorder is not None:
+                self.recorder.record_write(params, time.monotonic() - start, error=err)
+            raise
+        if self.recorder is not None:
+            self.recorder.record_write(params, time.monotonic() - start)
+
+    async def async_write_registers(self, registers):
+        """Write registers, merging with other writes issued in the same window.
+
+        Returns once the request carrying these registers has completed and
+        raises CumminsGeneratorError if it failed. A register that is already
+        waiting with another value is not overwritten; the pending batch is
+        sent first so command registers such as @426 see both values in order.
+        """
+        loop = asyncio.get_running_loop()
+        batch = self._pending_writes
+        if batch is not None and any(
+            register in batch.registers and batch.registers[register] != value
+            for register, value in registers.items()
+        ):
+            self._flush_writes()
+            batch = None
+        if batch is None:
+            batch = self._pending_writes = _WriteBatch(loop.create_future())
+            batch.handle = loop.call_later(WRITE_COALESCE_WINDOW, self._flush_writes)
+        batch.registers.update(registers)
+        await asyncio.shield(batch.future)
+
+    def _flush_writes(self):
+        """Send the pending batch of register writes."""
+        batch, self._pending_writes = self._pending_writes, None
+        if batch is None:
+            return
+        batch.handle.cancel()
+        coro = self._async_send_batch(batch)
+        name = f"cummins_generator write {self.host}"
+        if self.hass is not None:
+            task = self.hass.async_create_background_task(coro, name)
+        else:
+            task = asyncio.get_running_loop().create_task(coro, name=name)
+        self._write_tasks.add(task)
+        task.add_done_callback(self._write_tasks.discard)
+
+    async def _async_send_batch(self, batch):
+        """Send one batch and resolve everyone waiting on it."""
+        async with self._write_lock:
+            try:
+                await self.async_write(format_registers(batch.registers))
+            except asyncio.CancelledError:
+                batch.future.cancel()
+                raise
+            except Exception as err:
+                batch.future.set_exception(err)
+            else:
+                batch.future.set_result(None)
+
+    async def async_close(self):
+        """Cancel unsent writes and close the session if the client owns it."""
+        batch, self._pending_writes = self._pending_writes, None
+        if batch is not None:
+            batch.handle.cancel()
+            batch.future.cancel()
+        for task in list(self._write_tasks):
+            task.cancel()
+        if self._write_tasks:
+            await asyncio.gather(*self._write_tasks, return_exceptions=True)
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
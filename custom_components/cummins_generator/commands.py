@@ -0,0 +1,189 @@
+"""Ordered command queue for one controller.
+
+Every write to wr_logical.cgi (buttons, selects, the clock) goes through
+the controller's ``CumminsCommandQueue``. Commands are sent in the order
+they were submitted; a command that is identical to one still waiting to
+be sent joins it instead of being sent twice. A command can carry a check
+on index_data.html (the status it should lead to). It is confirmed by the
+first status poll started after the write that passes the check, or times
+out. Each command's outcome is fired as an event, with the seconds from
+submission to the write completing (``write_latency``) and to the
+outcome (``latency``).
+
+Nothing here imports Home Assistant; the event is fired on the ``hass``
+passed in.
+"""
+import asyncio
+import logging
+from collections import deque
+from .client import CumminsGeneratorError
+from .const import COMMAND_CONFIRM_TIMEOUT, COMMAND_HISTORY, COMMAND_QUEUE_SIZE
+
+_LOGGER = logging.getLogger(__name__)
+EVENT_COMMAND = "cummins_generator_command"
+
+OUTCOME_CONFIRMED = "confirmed"
+OUTCOME_SENT = "sent"
+OUTCOME_FAILED = "failed"
+OUTCOME_TIMEOUT = "timeout"
+OUTCOME_SUPERSEDED = "superseded"
+OUTCOME_CANCELLED = "cancelled"
+
+
+class Command:
+    """One write and, optionally, how to tell that it took effect."""
+
+    __slots__ = (
+        "name", "registers", "confirm", "key", "future", "submitted",
+        "sent", "duplicates", "timer",
+    )
+
+    def __init__(self, name, registers, confirm, submitted):
+        """Initialize the command."""
+        self.name = name
+        self.registers = dict(registers)
+        self.confirm = confirm
+        self.key = (name, tuple(sorted(self.registers.items())))
+        self.future = asyncio.get_running_loop().create_future()
+        self.submitted = submitted
+        self.sent = None
+        self.duplicates = 0
+        self.timer = None
+
+
+class CumminsCommandQueue:
+    """Sends a controller's commands in order and tracks their outcome.
+
+    At most COMMAND_QUEUE_SIZE commands wait to be sent, at most that many
+    wait for confirmation, and the last COMMAND_HISTORY outcomes are kept
+    for diagnostics.
+    """
+
+    def __init__(self, hass, client):
+        """Initialize the queue."""
+        self.hass = hass
+        self.client = client
+        self.history = deque(maxlen=COMMAND_HISTORY)
+        self._queue = deque()
+        self._pending = {}
+        self._awaiting = []
+        self._sending = []
+        self._wakeup = asyncio.Event()
+        self._worker = None
+
+    async def async_submit(self, name, registers, confirm=None):
+        """Queue a command and wait until it has been written.
+
+        ``confirm`` is called with each later status reading and returns
+        True once the command took effect. Raises CumminsGeneratorError if
+        the queue is full or the write failed.
+        """
+        loop = asyncio.get_running_loop()
+        command = self._pending.get((name, tuple(sorted(registers.items()))))
+        if command is not None:
+            command.duplicates += 1
+            _LOGGER.debug("%s: %s is already queued", self.client.host, name)
+        else:
+            if len(self._queue) >= COMMAND_QUEUE_SIZE:
+                raise CumminsGeneratorError(f"{self.client.host}: command queue is full")
+            command = Command(name, registers, confirm, loop.time())
+            self._pending[command.key] = command
+            self._queue.append(command)
+            self._wakeup.set()
+            if self._worker is None or self._worker.done():
+                self._worker = self.hass.async_create_background_task(
+                    self._async_run(), f"cummins_generator commands {self.client.host}"
+                )
+        await asyncio.shield(command.future)
+
+    async def _async_run(self):
+        """Send queued commands in order."""
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            batch = self._sending = list(self._queue)
+            self._queue.clear()
+            for command in batch:
+                del self._pending[command.key]
+            # Issue the writes in order without waiting in between, so the
+            # client can still merge them into as few requests as possible
+            results = await asyncio.gather(
+                *(self.client.async_write_registers(command.registers) for command in batch),
+                return_exceptions=True,
+            )
+            self._sending = []
+            for command, result in zip(batch, results):
+                self._async_sent(command, result)
+
+    def _async_sent(self, command, error):
+        """Resolve a written command and start waiting for its effect."""
+        loop = asyncio.get_running_loop()
+        command.sent = loop.time()
+        if isinstance(error, BaseException):
+            command.future.set_exception(error)
+            self._finish(command, OUTCOME_FAILED, error)
+            return
+        command.future.set_result(None)
+        # A newer write to the same registers overrides an older one
+        for older in [c for c in self._awaiting if c.registers.keys() & command.registers.keys()]:
+            self._finish(older, OUTCOME_SUPERSEDED)
+        if command.confirm is None:
+            self._finish(command, OUTCOME_SENT)
+            return
+        if len(self._awaiting) >= COMMAND_QUEUE_SIZE:
+            self._finish(self._awaiting[0], OUTCOME_SUPERSEDED)
+        self._awaiting.append(command)
+        command.timer = loop.call_later(
+            COMMAND_CONFIRM_TIMEOUT, self._finish, command, OUTCOME_TIMEOUT
+        )
+
+    def observe(self, data, started):
+        """Confirm commands against a status reading.
+
+        ``started`` is the loop time the poll began; a poll that began
+        before a command was written cannot confirm it.
+        """
+        for command in list(self._awaiting):
+            if command.sent <= started and command.confirm(data):
+                self._finish(command, OUTCOME_CONFIRMED)
+
+    def _finish(self, command, outcome, error=None):
+        """Record a command's outcome and fire its event."""
+        if command in self._awaiting:
+            self._awaiting.remove(command)
+        if command.timer is not None:
+            command.timer.cancel()
+            command.timer = None
+        now = asyncio.get_running_loop().time()
+        result = {
+            "command": command.name,
+            "registers": {str(register): value for register, value in command.registers.items()},
+            "outcome": outcome,
+            "duplicates": command.duplicates,
+            "write_latency": None if command.sent is None else round(command.sent - command.submitted, 3),
+            "latency": round(now - command.submitted, 3),
+        }
+        if error is not None:
+            result["error"] = str(error) or type(error).__name__
+        self.history.append(result)
+        _LOGGER.debug("%s: command %s", self.client.host, result)
+        self.hass.bus.async_fire(EVENT_COMMAND, {"host": self.client.host, **result})
+
+    async def async_close(self):
+        """Stop the queue, failing commands that were not written."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        for command in [*self._sending, *self._queue]:
+            if not command.future.done():
+                command.future.set_exception(CumminsGeneratorError("command queue closed"))
+            self._finish(command, OUTCOME_CANCELLED)
+        self._sending = []
+        self._queue.clear()
+        self._pending.clear()
+        for command in list(self._awaiting):
+            self._finish(command, OUTCOME_CANCELLED)
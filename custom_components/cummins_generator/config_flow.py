@@ -1,22 +1,201 @@
 """Config flow for Cummins Generator integration."""
 import voluptuous as vol
 from homeassistant import config_entries
-from homeassistant.const import CONF_HOST, CONF_PASSWORD
+from homeassistant.const import CONF_HOST, CONF_HOSTS, CONF_PASSWORD, CONF_PORT
+from homeassistant.core import callback
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from .const import (
+    CONF_BATTERY_DEADBAND,
+    CONF_BURST_SCAN_INTERVAL,
+    CONF_FAST_SCAN_INTERVAL,
+    CONF_FREQUENCY_DEADBAND,
+    CONF_IDLE_SCAN_INTERVAL,
+    CONF_MAX_CONNECTIONS,
+    CONF_RECORD_TRAFFIC,
+    CONF_SCAN_INTERVAL,
+    CONF_VOLTAGE_DEADBAND,
+    DEFAULT_BATTERY_DEADBAND,
+    DEFAULT_BURST_SCAN_INTERVAL,
+    DEFAULT_FAST_SCAN_INTERVAL,
+    DEFAULT_FREQUENCY_DEADBAND,
+    DEFAULT_IDLE_SCAN_INTERVAL,
+    DEFAULT_MAX_CONNECTIONS,
+    DEFAULT_RECORD_TRAFFIC,
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_VOLTAGE_DEADBAND,
+)
+from .discovery import FOUND, INVALID_AUTH, async_probe, async_scan, subnet_hosts
 
 DOMAIN = "cummins_generator"
+CONF_SUBNET = "subnet"
 
 class CumminsGeneratorConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Cummins Generator."""
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """Return the options flow."""
+        return CumminsGeneratorOptionsFlow(config_entry)
+
+    def __init__(self):
+        """Initialize the flow."""
+        self._password = None
+        self._discovered = []
+
     async def async_step_user(self, user_input=None):
-        """Handle the initial step."""
+        """Add one generator by address, or search a subnet for several."""
+        return self.async_show_menu(step_id="user", menu_options=["manual", "discover"])
+
+    async def async_step_manual(self, user_input=None):
+        """Add a generator by address."""
+        errors = {}
         if user_input is not None:
-            return self.async_create_entry(title="Cummins Generator", data=user_input)
+            self._async_abort_entries_match({CONF_HOST: user_input[CONF_HOST]})
+            result = await async_probe(
+                async_get_clientsession(self.hass), user_input[CONF_HOST], user_input[CONF_PASSWORD]
+            )
+            if result == FOUND:
+                return self.async_create_entry(title="Cummins Generator", data=user_input)
+            errors["base"] = "invalid_auth" if result == INVALID_AUTH else "cannot_connect"
 
         return self.async_show_form(
-            step_id="user",
+            step_id="manual",
             data_schema=vol.Schema({
                 vol.Required(CONF_HOST): str,
                 vol.Required(CONF_PASSWORD, default="cummins"): str,
+            }),
+            errors=errors,
+        )
+
+    async def async_step_discover(self, user_input=None):
+        """Probe a subnet for controllers."""
+        errors = {}
+        if user_input is not None:
+            try:
+                hosts = subnet_hosts(user_input[CONF_SUBNET], user_input[CONF_PORT])
+            except ValueError:
+                errors[CONF_SUBNET] = "invalid_subnet"
+            else:
+                if hosts is None:
+                    errors[CONF_SUBNET] = "subnet_too_large"
+            if not errors:
+                configured = {entry.data[CONF_HOST] for entry in self._async_current_entries()}
+                found = await async_scan(
+                    async_get_clientsession(self.hass),
+                    [host for host in hosts if host not in configured],
+                    user_input[CONF_PASSWORD],
+                )
+                self._discovered = [host for host in hosts if found.get(host) == FOUND]
+                if self._discovered:
+                    self._password = user_input[CONF_PASSWORD]
+                    return await self.async_step_select()
+                errors["base"] = "invalid_auth" if INVALID_AUTH in found.values() else "no_devices_found"
+
+        return self.async_show_form(
+            step_id="discover",
+            data_schema=vol.Schema({
+                vol.Required(CONF_SUBNET): str,
+                vol.Required(CONF_PASSWORD, default="cummins"): str,
+                vol.Required(CONF_PORT, default=80): vol.All(vol.Coerce(int), vol.Range(min=1, max=65535)),
+            }),
+            errors=errors,
+        )
+
+    async def async_step_select(self, user_input=None):
+        """Pick which of the discovered controllers to add."""
+        errors = {}
+        if user_input is not None:
+            hosts = [host for host in self._discovered if host in user_input[CONF_HOSTS]]
+            if hosts:
+                # A flow creates one entry; the others are added by flows
+                # of their own
+                for host in hosts[1:]:
+                    self.hass.async_create_task(
+                        self.hass.config_entries.flow.async_init(
+                            DOMAIN,
+                            context={"source": config_entries.SOURCE_IMPORT},
+                            data={CONF_HOST: host, CONF_PASSWORD: self._password},
+                        )
+                    )
+                return self.async_create_entry(
+                    title="Cummins Generator",
+                    data={CONF_HOST: hosts[0], CONF_PASSWORD: self._password},
+                )
+            errors["base"] = "nothing_selected"
+
+        return self.async_show_form(
+            step_id="select",
+            data_schema=vol.Schema({
+                vol.Required(CONF_HOSTS, default=self._discovered): cv.multi_select(
+                    {host: host for host in self._discovered}
+                ),
+            }),
+            description_placeholders={"count": str(len(self._discovered))},
+            errors=errors,
+        )
+
+    async def async_step_import(self, import_data):
+        """Add a controller picked in another flow's discovery."""
+        self._async_abort_entries_match({CONF_HOST: import_data[CONF_HOST]})
+        return self.async_create_entry(title="Cummins Generator", data=import_data)
+
+
+class CumminsGeneratorOptionsFlow(config_entries.OptionsFlow):
+    """Handle polling options for Cummins Generator."""
+
+    def __init__(self, config_entry):
+        """Initialize the options flow."""
+        # Home Assistant only provides config_entry itself from 2024.11
+        self._entry = config_entry
+
+    async def async_step_init(self, user_input=None):
+        """Manage the polling tiers, connection limit, deadbands and recording."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self._entry.options
+        interval = vol.All(vol.Coerce(int), vol.Range(min=1, max=3600))
+        deadband = vol.All(vol.Coerce(float), vol.Range(min=0, max=50))
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema({
+                vol.Required(
+                    CONF_FAST_SCAN_INTERVAL,
+                    default=options.get(CONF_FAST_SCAN_INTERVAL, DEFAULT_FAST_SCAN_INTERVAL),
+                ): interval,
+                vol.Required(
+                    CONF_SCAN_INTERVAL,
+                    default=options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL),
+                ): interval,
+                vol.Required(
+                    CONF_IDLE_SCAN_INTERVAL,
+                    default=options.get(CONF_IDLE_SCAN_INTERVAL, DEFAULT_IDLE_SCAN_INTERVAL),
+                ): interval,
+                vol.Required(
+                    CONF_BURST_SCAN_INTERVAL,
+                    default=options.get(CONF_BURST_SCAN_INTERVAL, DEFAULT_BURST_SCAN_INTERVAL),
+                ): interval,
+                vol.Required(
+                    CONF_MAX_CONNECTIONS,
+                    default=options.get(CONF_MAX_CONNECTIONS, DEFAULT_MAX_CONNECTIONS),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=8)),
+                vol.Required(
+                    CONF_VOLTAGE_DEADBAND,
+                    default=options.get(CONF_VOLTAGE_DEADBAND, DEFAULT_VOLTAGE_DEADBAND),
+                ): deadband,
+                vol.Required(
+                    CONF_FREQUENCY_DEADBAND,
+                    default=options.get(CONF_FREQUENCY_DEADBAND, DEFAULT_FREQUENCY_DEADBAND),
+                ): deadband,
+                vol.Required(
+                    CONF_BATTERY_DEADBAND,
+                    default=options.get(CONF_BATTERY_DEADBAND, DEFAULT_BATTERY_DEADBAND),
+                ): deadband,
+                vol.Required(
+                    CONF_RECORD_TRAFFIC,
+                    default=options.get(CONF_RECORD_TRAFFIC, DEFAULT_RECORD_TRAFFIC),
+                ): bool,
             })
         )
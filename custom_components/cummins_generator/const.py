@@ -0,0 +1,169 @@
+"""Constants for the Cummins Generator integration."""
+from datetime import timedelta
+
+DOMAIN = "cummins_generator"
+
+# Simultaneous requests allowed to one controller. The embedded web server
+# struggles with parallel connections; 1 serializes every request.
+CONF_MAX_CONNECTIONS = "max_connections"
+DEFAULT_MAX_CONNECTIONS = 2
+
+KEEPALIVE_TIMEOUT = 60
+
+# Request timeouts, in seconds. The controller answers in well under a
+# second when it is healthy, so anything slower is treated as down.
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 10
+REQUEST_TIMEOUT = 20
+
+# After this many consecutive failed requests the controller is considered
+# unreachable. Requests then fail immediately until the backoff expires.
+# After that, one small page is read as a probe before anything else is sent.
+BREAKER_THRESHOLD = 3
+BREAKER_BACKOFF_INITIAL = 5
+BREAKER_BACKOFF_MAX = 300
+BREAKER_PROBE_PATH = "index_data.html"
+
+# Fleet-wide limits shared by every configured generator
+FLEET_MAX_IN_FLIGHT = 16
+FLEET_JITTER = 0.2
+# A scheduled poll never waits longer than this fraction of its own interval
+FLEET_MAX_DELAY_FRACTION = 1.0
+
+# Register writes issued within this many seconds share one request
+WRITE_COALESCE_WINDOW = 0.2
+
+# Seconds after a write before the optimistic state is checked against
+# a fresh read
+VERIFY_DELAY = 5
+
+# Polling tiers, in seconds. The coordinator picks one after every refresh
+# based on the generator status and utility bits.
+CONF_FAST_SCAN_INTERVAL = "fast_scan_interval"
+CONF_SCAN_INTERVAL = "scan_interval"
+CONF_IDLE_SCAN_INTERVAL = "idle_scan_interval"
+CONF_BURST_SCAN_INTERVAL = "burst_scan_interval"
+
+DEFAULT_FAST_SCAN_INTERVAL = 5
+DEFAULT_SCAN_INTERVAL = 30
+DEFAULT_IDLE_SCAN_INTERVAL = 120
+DEFAULT_BURST_SCAN_INTERVAL = 2
+
+# Changes no larger than these are not written to the state machine, so
+# jitter of a unit or so does not fill the recorder. Values are in the
+# sensor's own unit; 0 writes every change.
+CONF_VOLTAGE_DEADBAND = "voltage_deadband"
+CONF_FREQUENCY_DEADBAND = "frequency_deadband"
+CONF_BATTERY_DEADBAND = "battery_deadband"
+
+DEFAULT_VOLTAGE_DEADBAND = 1
+DEFAULT_FREQUENCY_DEADBAND = 1
+DEFAULT_BATTERY_DEADBAND = 0.1
+
+# Sensor field -> (option, default) for its deadband
+DEADBANDS = {
+    "output_voltage": (CONF_VOLTAGE_DEADBAND, DEFAULT_VOLTAGE_DEADBAND),
+    "frequency": (CONF_FREQUENCY_DEADBAND, DEFAULT_FREQUENCY_DEADBAND),
+    "battery_voltage": (CONF_BATTERY_DEADBAND, DEFAULT_BATTERY_DEADBAND),
+}
+
+# Every entity writes its current state at least this often, even when
+# its changes stayed inside the deadband
+PUBLISH_HEARTBEAT = timedelta(minutes=15)
+
+# The latency sensors write their statistics this often; the status
+# coordinator only notifies them when the reading itself changes
+DIAGNOSTIC_REFRESH_INTERVAL = timedelta(seconds=30)
+
+# How long to keep polling at the burst rate after a command is sent
+COMMAND_BURST_DURATION = 30
+
+# Commands waiting to be written, per controller; as many can wait for
+# confirmation, and the last COMMAND_HISTORY outcomes are kept
+COMMAND_QUEUE_SIZE = 8
+COMMAND_HISTORY = 20
+# Seconds for a command's effect to show in index_data.html
+COMMAND_CONFIRM_TIMEOUT = 60
+
+# Statuses where the engine is turning or about to
+ACTIVE_STATUSES = {
+    "Starting", "Running", "Priming", "Exercising",
+    "Engine Cooldown", "Cycle crank pause",
+}
+
+# High-rate capture of index_data.html around a start or transfer: the
+# sample interval and window in seconds, and how many captures are kept
+CAPTURE_INTERVAL = 0.5
+CAPTURE_DURATION = 60
+CAPTURE_HISTORY = 5
+# Statuses whose onset starts a capture; so does any change of the
+# utility present/connected bits
+CAPTURE_START_STATUSES = {"Starting", "Running"}
+# Output counts as at rated level within this fraction of where it settled
+CAPTURE_VOLTAGE_TOLERANCE = 0.05
+CAPTURE_FREQUENCY_TOLERANCE = 0.02
+
+# Events fired on an edge of an lcd_status bit, as (set, cleared). Each
+# name becomes a cummins_generator_<name> event; the last EDGE_HISTORY
+# events are kept for diagnostics.
+EDGE_EVENTS = {
+    "utility_present": ("utility_restored", "utility_lost"),
+    "utility_connected": ("transfer_to_utility", "transfer_to_genset"),
+    "genset_running": ("genset_started", "genset_stopped"),
+    "standby_disabled": ("standby_disabled", "standby_enabled"),
+    "action_required": ("action_required", "action_cleared"),
+}
+EDGE_HISTORY = 20
+
+# Readings aggregated into hourly long-term statistics. A reading is not
+# held across a gap in successful polls longer than the larger of
+# LONG_TERM_MAX_GAP and two idle intervals.
+LONG_TERM_FIELDS = ("battery_voltage", "output_voltage", "frequency", "load_1", "load_2")
+LONG_TERM_MAX_GAP = timedelta(minutes=15)
+
+# loads.html and exercise.html are re-read at this interval, or sooner when
+# a write touches one of these registers
+CONFIG_REFRESH_INTERVAL = timedelta(minutes=15)
+CONFIG_REGISTERS = {391, 392, 393, 425, 426}
+
+# How often timedate.html is read to re-measure the controller clock offset
+CLOCK_REFRESH_INTERVAL = timedelta(hours=6)
+
+# lcd_status bits
+LCD_UTILITY_PRESENT = 0x01
+LCD_UTILITY_CONNECTED = 0x02
+LCD_GENSET_RUNNING = 0x0C
+LCD_STANDBY_DISABLED = 0x10
+LCD_ACTION_REQUIRED = 0x60
+
+# Endpoints with a diagnostic latency sensor; every request is recorded
+# whether or not it is listed here
+STATS_ENDPOINTS = (
+    "index_data.html",
+    "loads_data.html",
+    "loads.html",
+    "exercise.html",
+    "timedate.html",
+    "wr_logical.cgi",
+)
+
+# Saved coordinator data, used to start without waiting on the controller
+SNAPSHOT_VERSION = 1
+# Seconds between a change and writing the snapshot; a pending snapshot is
+# also written when Home Assistant stops
+SNAPSHOT_SAVE_DELAY = 300
+
+# Subnet discovery in the config flow. Each address gets one short probe of
+# index_data.html; a /24 takes a few probe timeouts at most.
+DISCOVERY_PARALLEL = 64
+DISCOVERY_TIMEOUT = 2
+DISCOVERY_MAX_HOSTS = 1024
+
+# Raw traffic recording, switched on in the options
+CONF_RECORD_TRAFFIC = "record_traffic"
+DEFAULT_RECORD_TRAFFIC = False
+RECORDING_DIR = "cummins_generator_recordings"
+RECORDING_MAX_BYTES = 5 * 1024 * 1024
+RECORDING_BACKUPS = 3
+# Seconds recorded exchanges are buffered before they are written
+RECORDING_FLUSH_DELAY = 5
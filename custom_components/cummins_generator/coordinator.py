@@ -0,0 +1,117 @@
+"""Shared coordinator behavior for the Cummins Generator integration."""
+import logging
+import time
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from .const import VERIFY_DELAY
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class CumminsCoordinator(DataUpdateCoordinator):
+    """DataUpdateCoordinator with optimistic updates after writes.
+
+    It can also start from a saved snapshot, which counts as stale until
+    the first live read replaces it.
+
+    A demand-driven coordinator lists the pages it reads in ``pages``.
+    Entities pass the page they show as their listener context, and a
+    refresh only reads the pages in ``pages_needed()``.
+    """
+
+    pages = ()
+
+    def __init__(self, *args, **kwargs):
+        """Initialize the coordinator."""
+        super().__init__(*args, **kwargs)
+        self._optimistic = {}
+        self._pre_optimistic = None
+        self._unsub_verify = None
+        self._snapshot = None
+
+    @property
+    def stale(self):
+        """Return True while the data is a restored snapshot."""
+        return self._snapshot is not None and self.data is self._snapshot
+
+    def pages_needed(self):
+        """Return the pages at least one listener shows, in ``pages`` order."""
+        contexts = set(self.async_contexts())
+        return [page for page in self.pages if page in contexts]
+
+    def async_restore(self, data):
+        """Show saved data until the first live refresh."""
+        self._snapshot = self.data = data
+
+    async def _async_refresh(self, *args, **kwargs):
+        """Refresh, replacing a restored snapshot with the first live read."""
+        snapshot = self._snapshot if self.stale else None
+        await super()._async_refresh(*args, **kwargs)
+        if snapshot is None or self.stale:
+            return
+        self._snapshot = None
+        if self.data == snapshot:
+            # Unchanged data does not notify listeners, but the entities
+            # still have to drop their stale flag
+            self.async_update_listeners()
+
+    def async_apply_optimistic(self, updates, verify_delay=VERIFY_DELAY):
+        """Show the expected effect of a successful write right away.
+
+        One verification read is scheduled after ``verify_delay`` seconds.
+        It replaces the optimistic values with what the controller reports,
+        or restores the previous values if the read fails.
+        """
+        if self.data is None:
+            return
+        if self._pre_optimistic is None:
+            self._pre_optimistic = self.data
+        self._optimistic.update(updates)
+        self.data = {**self.data, **updates}
+        self.async_update_listeners()
+
+        if self._unsub_verify is not None:
+            self._unsub_verify()
+        self._unsub_verify = async_call_later(self.hass, verify_delay, self._async_verify)
+
+    async def _async_verify(self, _now):
+        """Reconcile optimistic values with a fresh read."""
+        self._unsub_verify = None
+        optimistic, self._optimistic = self._optimistic, {}
+        previous, self._pre_optimistic = self._pre_optimistic, None
+        await self.async_refresh()
+        if not self.last_update_success:
+            _LOGGER.debug("%s: verification failed, rolling back %s", self.name, optimistic)
+            self.data = previous
+            self.async_update_listeners()
+            return
+        mismatched = {
+            key: self.data.get(key) for key, value in optimistic.items()
+            if self.data.get(key) != value
+        }
+        if mismatched:
+            _LOGGER.debug("%s: controller reports %s after write", self.name, mismatched)
+
+    def _timed_parse(self, path, parser, body):
+        """Parse a response, recording the time taken against its endpoint."""
+        start = time.perf_counter()
+        parsed = parser(body)
+        self.client.stats.endpoint(path).record_parse(time.perf_counter() - start)
+        return parsed
+
+    async def _async_wait_for_slot(self):
+        """Wait for the fleet to schedule this poll.
+
+        The first live refresh is not paced so setup is not delayed;
+        scheduled polls after it are spread across the fleet.
+        """
+        fleet = self.client.fleet
+        if fleet is not None and self.data is not None and not self.stale and self.update_interval:
+            await fleet.async_wait_for_slot(self.update_interval)
+
+    async def async_shutdown(self):
+        """Cancel a pending verification read."""
+        if self._unsub_verify is not None:
+            self._unsub_verify()
+            self._unsub_verify = None
+        await super().async_shutdown()
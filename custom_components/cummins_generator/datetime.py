@@ -1,12 +1,18 @@
 """Cummins Generator datetime platform."""
-import re
-import aiohttp
 import logging
-from datetime import datetime, timezone
+from datetime import datetime, timedelta
 from homeassistant.components.datetime import DateTimeEntity
 from homeassistant.const import CONF_HOST
+from homeassistant.core import callback
 from homeassistant.util import dt as dt_util
 from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.update_coordinator import UpdateFailed
+from .client import CumminsGeneratorError
+from .const import CLOCK_REFRESH_INTERVAL
+from .coordinator import CumminsCoordinator
+from .entity import CumminsCoordinatorEntity
+from .parser import PAGE_TOKENS, parse_timedate
 
 _LOGGER = logging.getLogger(__name__)
 DOMAIN = "cummins_generator"
@@ -14,20 +20,103 @@ DOMAIN = "cummins_generator"
 
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """Set up the Cummins Generator datetime entity."""
-    coordinator = hass.data[DOMAIN][config_entry.entry_id]
-    async_add_entities([CumminsGeneratorDateTime(coordinator)])
+    hub = hass.data[DOMAIN][config_entry.entry_id]
+    async_add_entities([CumminsGeneratorDateTime(hub.clock, hub.commands)])
 
 
-class CumminsGeneratorDateTime(DateTimeEntity):
+class CumminsClockCoordinator(CumminsCoordinator):
+    """Model of the controller clock as an offset from the HA clock.
+
+    The controller's clock advances predictably, so timedate.html is only
+    read occasionally (or after the clock is set) to measure the offset.
+    In between, the controller time is computed locally. Nothing is read
+    while every entity showing the clock is disabled.
+    """
+
+    pages = ("timedate.html",)
+
+    def __init__(self, hass, client):
+        """Initialize the coordinator."""
+        super().__init__(hass, _LOGGER, name="Cummins Clock", update_interval=CLOCK_REFRESH_INTERVAL)
+        self.client = client
+        self.host = client.host
+
+    async def _async_update_data(self):
+        """Measure the controller clock offset."""
+        if not self.pages_needed():
+            return self.data
+        try:
+            html = await self.client.async_get_text("timedate.html", PAGE_TOKENS["timedate.html"])
+        except CumminsGeneratorError as err:
+            raise UpdateFailed(str(err))
+        except Exception as err:
+            raise UpdateFailed(f"Error communicating with generator: {err}")
+        now = dt_util.utcnow()
+        controller = self._timed_parse("timedate.html", self._parse_datetime, html)
+        if controller is None:
+            raise UpdateFailed("Could not parse generator date/time")
+        # The page only has minute resolution, so a read only tells us the
+        # offset lies in [lower, lower + 60). Keep the current estimate while
+        # it stays inside that window and move it just enough when it does
+        # not; with no estimate yet, assume we read it mid-minute.
+        lower = (controller - now).total_seconds()
+        previous = self.data["offset"] if self.data else None
+        if previous is None:
+            offset = lower + 30
+        else:
+            offset = min(max(previous, lower), lower + 59)
+        return {"offset": offset, "measured_at": now}
+
+    def async_restore(self, data):
+        """Show the saved offset; the snapshot stores times as strings."""
+        super().async_restore({**data, "measured_at": dt_util.parse_datetime(data["measured_at"])})
+
+    def _parse_datetime(self, html):
+        """Parse date/time from timedate.html."""
+        page = parse_timedate(html)
+        if page.complete:
+            local = datetime(
+                page.year,
+                page.month,
+                page.day,
+                page.hour,
+                page.minute,
+                tzinfo=dt_util.DEFAULT_TIME_ZONE,
+            )
+            return dt_util.as_utc(local)
+        return None
+
+    @property
+    def drift(self):
+        """Return the controller clock offset in seconds (positive is ahead)."""
+        if not self.data:
+            return None
+        return self.data["offset"]
+
+    def controller_now(self):
+        """Return the controller's current time from the model."""
+        if not self.data:
+            return None
+        return dt_util.utcnow() + timedelta(seconds=self.data["offset"])
+
+    def async_clock_set(self, value):
+        """Record that the controller clock was just set to ``value``."""
+        self.async_apply_optimistic({
+            "offset": (value - dt_util.utcnow()).total_seconds(),
+            "measured_at": dt_util.utcnow(),
+        })
+
+
+class CumminsGeneratorDateTime(CumminsCoordinatorEntity, DateTimeEntity):
     """DateTime entity for Cummins Generator time/date."""
 
-    def __init__(self, coordinator):
+    def __init__(self, coordinator, commands):
         """Initialize the datetime entity."""
-        self.coordinator = coordinator
+        super().__init__(coordinator, "timedate.html")
+        self.commands = commands
         self._attr_unique_id = f"{coordinator.host}_datetime"
         self._attr_has_date = True
         self._attr_has_time = True
-        self._value = None
 
     @property
     def name(self):
@@ -44,63 +133,33 @@ class CumminsGeneratorDateTime(DateTimeEntity):
 
     @property
     def native_value(self):
-        return self._value
+        value = self.coordinator.controller_now()
+        if value is None:
+            return None
+        return value.replace(second=0, microsecond=0)
 
-    async def async_update(self):
-        """Fetch current date/time from generator."""
-        try:
-            async with aiohttp.ClientSession() as session:
-                headers = {"Authorization": f"Basic {self.coordinator.auth}"}
-                async with session.get(
-                    f"http://{self.coordinator.host}/timedate.html", headers=headers
-                ) as response:
-                    if response.status == 200:
-                        html = await response.text()
-                        self._value = self._parse_datetime(html)
-        except Exception as err:
-            _LOGGER.error("Error fetching generator time: %s", err)
+    async def async_added_to_hass(self):
+        """Advance the displayed time every minute without polling."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_track_time_interval(self.hass, self._async_tick, timedelta(minutes=1))
+        )
 
-    def _parse_datetime(self, html):
-        """Parse date/time from timedate.html."""
-        # Month: writeMonths(3)
-        month = re.search(r"writeMonths\((\d+)\)", html)
-        # Day: writeOptions(1,31,20, FALSE)
-        day = re.search(r"writeOptions\(1,31,(\d+)", html)
-        # Year: writeOptions(2006,2031,2026, FALSE)
-        year = re.search(r"writeOptions\(2006,2031,(\d+)", html)
-        # Hour: value='8' on the hidden hours24 input
-        hour = re.search(r"""name="@402"\s+value='(\d+)'""", html)
-        # Minute: writeOptions(0,59,19, TRUE)
-        minute = re.search(r"writeOptions\(0,59,(\d+)", html)
-
-        if all([month, day, year, hour, minute]):
-            local = datetime(
-                int(year.group(1)),
-                int(month.group(1)),
-                int(day.group(1)),
-                int(hour.group(1)),
-                int(minute.group(1)),
-                tzinfo=dt_util.DEFAULT_TIME_ZONE,
-            )
-            return dt_util.as_utc(local)
-        return None
+    @callback
+    def _async_tick(self, _now):
+        """Write the modelled time."""
+        self.async_write_ha_state()
 
     async def async_set_value(self, value: datetime) -> None:
         """Set the generator date/time."""
         local = dt_util.as_local(value)
-        params = (
-            f"@448={local.month}&@449={local.day}&@450={local.year}"
-            f"&@402={local.hour}&@403={local.minute}"
-        )
+        registers = {
+            448: local.month, 449: local.day, 450: local.year,
+            402: local.hour, 403: local.minute,
+        }
         try:
-            async with aiohttp.ClientSession() as session:
-                headers = {"Authorization": f"Basic {self.coordinator.auth}"}
-                url = f"http://{self.coordinator.host}/wr_logical.cgi?{params}"
-                async with session.get(url, headers=headers) as response:
-                    if response.status != 200:
-                        _LOGGER.error("Failed to set date/time: %s", response.status)
-                    else:
-                        self._value = value.replace(second=0, microsecond=0)
-                        self.async_write_ha_state()
+            await self.commands.async_submit("set_datetime", registers)
         except Exception as err:
             _LOGGER.error("Error setting date/time: %s", err)
+        else:
+            self.coordinator.async_clock_set(value.replace(second=0, microsecond=0))
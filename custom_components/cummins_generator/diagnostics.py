@@ -0,0 +1,39 @@
+"""Diagnostics support for the Cummins Generator integration."""
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.const import CONF_PASSWORD
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+DOMAIN = "cummins_generator"
+TO_REDACT = {CONF_PASSWORD}
+
+
+def _coordinator_diagnostics(coordinator):
+    """Return the polling state of a coordinator."""
+    return {
+        "update_interval": coordinator.update_interval.total_seconds() if coordinator.update_interval else None,
+        "last_update_success": coordinator.last_update_success,
+        "stale": coordinator.stale,
+        "last_exception": repr(coordinator.last_exception) if coordinator.last_exception else None,
+        "data": coordinator.data,
+    }
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict:
+    """Return diagnostics for a config entry."""
+    hub = hass.data[DOMAIN][entry.entry_id]
+    client = hub.client
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "max_connections": client.max_connections,
+        "breaker": client.breaker.as_dict(),
+        "endpoints": client.stats.as_dict(),
+        "coordinators": {
+            name: {**_coordinator_diagnostics(coordinator), "pages_needed": coordinator.pages_needed()}
+            for name, coordinator in hub.coordinators()
+        },
+        "commands": list(hub.commands.history),
+        "captures": hub.coordinator.capture.as_dict(),
+        "edges": hub.coordinator.edges.as_dict(),
+        "recording": None if hub.recorder is None else hub.recorder.path,
+    }
@@ -0,0 +1,80 @@
+"""Find controllers on a subnet by probing index_data.html.
+
+Every address is sent one GET for index_data.html with the supplied
+password, at most DISCOVERY_PARALLEL at a time and each with a short
+timeout, so an empty address costs one timeout and a full /24 scan takes
+seconds. A host counts as a controller if the page decodes as a status
+page. A host that rejects the password with the controller's ``Genset``
+realm is reported separately, so a wrong password is not mistaken for an
+empty subnet.
+
+Nothing here imports Home Assistant; the caller passes the aiohttp
+session.
+"""
+import aiohttp
+import asyncio
+import base64
+import ipaddress
+import logging
+from .const import DISCOVERY_MAX_HOSTS, DISCOVERY_PARALLEL, DISCOVERY_TIMEOUT
+from .registers import decode_index
+
+_LOGGER = logging.getLogger(__name__)
+
+FOUND = "found"
+INVALID_AUTH = "invalid_auth"
+
+
+def subnet_hosts(subnet, port=80, max_addresses=DISCOVERY_MAX_HOSTS):
+    """Return the hosts to probe in a subnet, with the port if not 80.
+
+    IPv6 addresses are bracketed, as they have to be in a URL. Returns None if the subnet has more than ``max_addresses`` addresses;
+    that is checked before any address is listed. Raises ValueError if
+    ``subnet`` is not an IPv4 or IPv6 network.
+    """
+    network = ipaddress.ip_network(subnet, strict=False)
+    if network.num_addresses > max_addresses:
+        return None
+    suffix = "" if port == 80 else f":{port}"
+    if network.version == 6:
+        return [f"[{address}]{suffix}" for address in network.hosts()]
+    return [f"{address}{suffix}" for address in network.hosts()]
+
+
+async def async_probe(session, host, password, timeout=DISCOVERY_TIMEOUT):
+    """Return FOUND, INVALID_AUTH or None for one host."""
+    auth = base64.b64encode(f"admin:{password}".encode()).decode("ascii")
+    try:
+        async with session.get(
+            f"http://{host}/index_data.html",
+            headers={"Authorization": f"Basic {auth}"},
+            timeout=aiohttp.ClientTimeout(total=timeout),
+            allow_redirects=False,
+        ) as response:
+            if response.status == 401:
+                realm = response.headers.get("WWW-Authenticate", "")
+                return INVALID_AUTH if "genset" in realm.lower() else None
+            if response.status != 200:
+                return None
+            text = await response.text(errors="replace")
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+        return None
+    try:
+        data = decode_index(text)
+    except (ValueError, IndexError):
+        return None
+    return FOUND if data.get("status") is not None else None
+
+
+async def async_scan(session, hosts, password, parallel=DISCOVERY_PARALLEL, timeout=DISCOVERY_TIMEOUT):
+    """Probe hosts concurrently; return {host: result} for those that answered."""
+    limiter = asyncio.Semaphore(parallel)
+
+    async def probe(host):
+        async with limiter:
+            return host, await async_probe(session, host, password, timeout)
+
+    results = await asyncio.gather(*(probe(host) for host in hosts))
+    found = {host: result for host, result in results if result is not None}
+    _LOGGER.debug("Probed %s hosts: %s", len(hosts), found)
+    return found
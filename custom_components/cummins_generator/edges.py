@@ -0,0 +1,139 @@
+"""Events for changes of the lcd_status bits, the status and the fault code.
+
+``CumminsEdgeDetector`` compares each index_data.html reading with the
+one before it and fires an event per change: one event type for each edge
+of each lcd_status bit (EDGE_EVENTS, for example
+``cummins_generator_utility_lost``), ``cummins_generator_status_changed``,
+and ``cummins_generator_fault`` / ``cummins_generator_fault_cleared`` for
+the fault code on line 14.
+
+Readings come from the regular polls and from burst captures, so while a
+capture runs (after a start or a change of the utility bits) a follow-on
+edge, such as the transfer after a utility loss, is seen within the
+capture interval. A reading only shows that a change happened after the
+previous reading's request was sent and before this reading's response
+arrived. Events carry those bounds (``earliest``, ``latest``), their
+midpoint (``estimated``), and ``latency``: the seconds from the estimate
+to the event being fired.
+
+The first reading is only a baseline. Nothing here imports Home Assistant;
+events are fired on the ``hass`` passed in.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import datetime, timezone
+from .const import EDGE_EVENTS, EDGE_HISTORY
+from .registers import INDEX_FIELDS, is_complete
+from .stats import EWMA_ALPHA
+
+_LOGGER = logging.getLogger(__name__)
+EVENT_PREFIX = "cummins_generator_"
+EVENT_STATUS_CHANGED = "status_changed"
+EVENT_FAULT = "fault"
+EVENT_FAULT_CLEARED = "fault_cleared"
+
+# (key, mask, set event, cleared event) for every lcd_status bit
+LCD_EDGES = tuple(
+    (bit.key, bit.mask, *EDGE_EVENTS[bit.key])
+    for field in INDEX_FIELDS
+    if field.key == "lcd_status"
+    for bit in field.bits
+)
+
+
+def find_edges(previous, data):
+    """Yield (event, data) for each change between two readings."""
+    before = previous["lcd_status"]
+    after = data["lcd_status"]
+    if before != after:
+        for key, mask, set_event, cleared_event in LCD_EDGES:
+            was, now = bool(before & mask), bool(after & mask)
+            if was != now:
+                yield set_event if now else cleared_event, {"bit": key, "lcd_status": after}
+    status = data["status"]
+    if status != previous["status"]:
+        yield EVENT_STATUS_CHANGED, {"status": status, "previous_status": previous["status"]}
+    code = data["fault_code"]
+    previous_code = previous["fault_code"]
+    if code != previous_code:
+        if code:
+            yield EVENT_FAULT, {"fault_code": code, "previous_fault_code": previous_code}
+        else:
+            yield EVENT_FAULT_CLEARED, {"fault_code": code, "previous_fault_code": previous_code}
+
+
+def _wall(loop_time, offset):
+    """Return a loop time as an ISO timestamp."""
+    return datetime.fromtimestamp(loop_time + offset, timezone.utc).isoformat(timespec="milliseconds")
+
+
+class CumminsEdgeDetector:
+    """Fires a controller's edge events and measures how late they are."""
+
+    def __init__(self, hass, host):
+        """Initialize the detector."""
+        self.hass = hass
+        self.host = host
+        self.history = deque(maxlen=EDGE_HISTORY)
+        self.events = 0
+        self.latency = None
+        self.latency_max = 0.0
+        self.last_latency = None
+        self._previous = None
+
+    def observe(self, data, sent, received, source="poll"):
+        """Compare a reading with the previous one and fire its edges.
+
+        ``sent`` and ``received`` are the loop times the request was sent
+        and its response arrived. A reading whose request was sent before
+        the previous reading's may predate it and is ignored.
+        """
+        if not is_complete(data):
+            return
+        previous = self._previous
+        if previous is not None and sent < previous[0]:
+            return
+        self._previous = (sent, data)
+        if previous is None:
+            return
+        edges = list(find_edges(previous[1], data))
+        if not edges:
+            return
+
+        now = asyncio.get_running_loop().time()
+        offset = time.time() - now
+        earliest, latest = previous[0], received
+        estimated = (earliest + latest) / 2
+        latency = now - estimated
+        common = {
+            "host": self.host,
+            "source": source,
+            "earliest": _wall(earliest, offset),
+            "latest": _wall(latest, offset),
+            "estimated": _wall(estimated, offset),
+            "window": round(latest - earliest, 3),
+            "latency": round(latency, 3),
+        }
+        for name, details in edges:
+            event = {**common, **details}
+            self.history.append({"event": name, **event})
+            _LOGGER.debug("%s: %s %s", self.host, name, event)
+            self.hass.bus.async_fire(EVENT_PREFIX + name, event)
+
+        self.events += len(edges)
+        self.last_latency = latency
+        self.latency = latency if self.latency is None else self.latency + EWMA_ALPHA * (latency - self.latency)
+        if latency > self.latency_max:
+            self.latency_max = latency
+
+    def as_dict(self):
+        """Return the latency statistics and recent events."""
+        return {
+            "events": self.events,
+            "latency": None if self.latency is None else round(self.latency, 3),
+            "latency_max": round(self.latency_max, 3),
+            "last_latency": None if self.last_latency is None else round(self.last_latency, 3),
+            "history": list(self.history),
+        }
@@ -0,0 +1,87 @@
+"""Base entity for the Cummins Generator integration."""
+from abc import abstractmethod
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from .const import PUBLISH_HEARTBEAT
+
+
+class CumminsCoordinatorEntity(CoordinatorEntity):
+    """Coordinator entity that flags values restored from the snapshot."""
+
+    @property
+    def extra_state_attributes(self):
+        """Mark the state as stale until the first live read."""
+        if self.coordinator.stale:
+            return {"stale": True}
+        return None
+
+
+class CumminsChangeOnlyEntity(CumminsCoordinatorEntity):
+    """Coordinator entity that only writes its state when it changes.
+
+    Subclasses return the value to compare from ``_publish_value``. A
+    numeric value that moved by no more than ``deadband`` since the last
+    write is held back. Whatever is current is written at least every
+    PUBLISH_HEARTBEAT, so a held-back value still reaches the recorder.
+    A change in availability or staleness is always written.
+    """
+
+    def __init__(self, coordinator, deadband=0, context=None):
+        """Initialize the entity."""
+        super().__init__(coordinator, context)
+        self._deadband = deadband
+        self._published = None
+
+    @abstractmethod
+    def _publish_value(self):
+        """Return the value that decides whether the state changed."""
+
+    async def async_added_to_hass(self):
+        """Start the heartbeat."""
+        await super().async_added_to_hass()
+        self._mark_published()
+        self.async_on_remove(
+            async_track_time_interval(self.hass, self._async_heartbeat, PUBLISH_HEARTBEAT)
+        )
+
+    def _mark_published(self):
+        """Remember what was last written."""
+        self._published = (self.available, self.coordinator.stale, self._publish_value())
+
+    def _is_significant(self):
+        """Return True if the current value differs enough from the last write."""
+        if self._published is None:
+            return True
+        available, stale, value = self.available, self.coordinator.stale, self._publish_value()
+        old_available, old_stale, old_value = self._published
+        if available != old_available or stale != old_stale:
+            return True
+        if value == old_value:
+            return False
+        if (
+            self._deadband
+            and isinstance(value, (int, float))
+            and isinstance(old_value, (int, float))
+        ):
+            # Round away float noise so a 0.1 step against a 0.1 deadband
+            # is treated as within it
+            return round(abs(value - old_value), 6) > self._deadband
+        return True
+
+    @callback
+    def _handle_coordinator_update(self):
+        """Write the state only if it changed significantly."""
+        if self._is_significant():
+            self._async_publish()
+
+    @callback
+    def _async_heartbeat(self, _now):
+        """Write whatever is current; an unchanged state is not recorded again."""
+        self._async_publish()
+
+    @callback
+    def _async_publish(self):
+        """Write the state and remember it."""
+        self.async_write_ha_state()
+        self._mark_published()
@@ -0,0 +1,104 @@
+"""Domain-wide poll manager for installations with many generators."""
+import aiohttp
+import asyncio
+import logging
+import random
+from .const import (
+    FLEET_JITTER,
+    FLEET_MAX_DELAY_FRACTION,
+    FLEET_MAX_IN_FLIGHT,
+    KEEPALIVE_TIMEOUT,
+)
+
+_LOGGER = logging.getLogger(__name__)
+DATA_FLEET = "cummins_generator_fleet"
+
+
+def async_get_fleet(hass):
+    """Return the fleet manager, creating it for the first entry."""
+    fleet = hass.data.get(DATA_FLEET)
+    if fleet is None:
+        fleet = hass.data[DATA_FLEET] = CumminsFleet()
+    return fleet
+
+
+class CumminsFleet:
+    """Shares one HTTP session between generators and paces their polls.
+
+    Each config entry registers its client and pollers here. Scheduled polls
+    ask for a slot first. Slots are handed out evenly across the combined
+    poll rate of every registered poller, with jitter, so controllers that
+    share an interval drift apart instead of all firing in the same second.
+    Every request, polls and writes alike, also counts against a
+    domain-wide in-flight cap.
+    """
+
+    def __init__(self):
+        """Initialize the fleet."""
+        self.in_flight = asyncio.Semaphore(FLEET_MAX_IN_FLIGHT)
+        self._clients = {}
+        self._pollers = set()
+        self._last_slot = None
+        self._session = None
+
+    @property
+    def session(self):
+        """Return the session shared by every generator."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=FLEET_MAX_IN_FLIGHT,
+                limit_per_host=0,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    def owner(self, host):
+        """Return the client registered for a host, if any."""
+        return self._clients.get(host)
+
+    def register_client(self, client):
+        """Add a generator's client to the fleet."""
+        if client.host in self._clients:
+            raise ValueError(f"{client.host} is already managed by another entry")
+        self._clients[client.host] = client
+
+    async def async_unregister_client(self, client):
+        """Remove a client, closing the shared session after the last one."""
+        if self._clients.get(client.host) is client:
+            del self._clients[client.host]
+        if not self._clients and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def register_poller(self, coordinator):
+        """Include a coordinator's poll rate when spacing slots."""
+        self._pollers.add(coordinator)
+
+    def unregister_poller(self, coordinator):
+        """Stop accounting for a coordinator."""
+        self._pollers.discard(coordinator)
+
+    def _spacing(self):
+        """Return the seconds between slots for the current combined poll rate."""
+        rate = sum(
+            1 / poller.update_interval.total_seconds()
+            for poller in self._pollers
+            if poller.update_interval
+        )
+        return 1 / rate if rate else 0.0
+
+    async def async_wait_for_slot(self, interval):
+        """Wait for this poll's turn.
+
+        The wait is capped relative to the caller's own interval, so a
+        fast-polling generator is never held back by a slow fleet schedule.
+        """
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        spacing = self._spacing() * random.uniform(1 - FLEET_JITTER, 1 + FLEET_JITTER)
+        slot = now if self._last_slot is None else max(now, self._last_slot + spacing)
+        slot = min(slot, now + interval.total_seconds() * FLEET_MAX_DELAY_FRACTION)
+        self._last_slot = max(slot, self._last_slot or slot)
+        if slot > now:
+            await asyncio.sleep(slot - now)
@@ -0,0 +1,139 @@
+"""Per-entry hub owning a generator's client and coordinators."""
+import asyncio
+import logging
+from homeassistant.const import CONF_HOST, EVENT_HOMEASSISTANT_STOP
+from homeassistant.exceptions import ConfigEntryError, ConfigEntryNotReady
+from .client import CumminsGeneratorClient
+from homeassistant.util import slugify
+from .const import (
+    CONF_MAX_CONNECTIONS,
+    CONF_RECORD_TRAFFIC,
+    DEFAULT_MAX_CONNECTIONS,
+    DEFAULT_RECORD_TRAFFIC,
+    RECORDING_DIR,
+)
+from .datetime import CumminsClockCoordinator
+from .fleet import async_get_fleet
+from .recording import TrafficRecorder
+from .select import CumminsLoadCoordinator
+from .sensor import CumminsGeneratorCoordinator
+from .snapshot import CumminsSnapshot
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class CumminsHub:
+    """Everything that reads from or writes to one generator.
+
+    The status coordinator always polls index_data.html. The load and
+    clock coordinators are demand-driven: their entities subscribe with
+    the page they show, and a page no enabled entity shows is never read.
+    """
+
+    def __init__(self, hass, entry):
+        """Create the client and coordinators for a config entry."""
+        self.hass = hass
+        self.entry = entry
+        # One client per generator, shared by every platform. All
+        # generators share the fleet's session, in-flight cap and pacing.
+        self.fleet = async_get_fleet(hass)
+        self.client = CumminsGeneratorClient(
+            entry.data[CONF_HOST],
+            entry.data.get("password", "cummins"),
+            entry.options.get(CONF_MAX_CONNECTIONS, DEFAULT_MAX_CONNECTIONS),
+            self.fleet,
+            hass,
+        )
+        self.coordinator = CumminsGeneratorCoordinator(hass, self.client, entry.options)
+        self.loads = CumminsLoadCoordinator(hass, self.client)
+        self.clock = CumminsClockCoordinator(hass, self.client)
+        self.snapshot = CumminsSnapshot(hass, entry.entry_id)
+        self.recorder = None
+        if entry.options.get(CONF_RECORD_TRAFFIC, DEFAULT_RECORD_TRAFFIC):
+            self.recorder = self.client.recorder = TrafficRecorder(
+                hass.config.path(RECORDING_DIR, f"{slugify(self.client.host)}.jsonl"),
+                self.client.host,
+            )
+
+    @property
+    def commands(self):
+        """Return the generator's command queue."""
+        return self.coordinator.commands
+
+    def coordinators(self):
+        """Return each coordinator with its snapshot name."""
+        return (("status", self.coordinator), ("loads", self.loads), ("clock", self.clock))
+
+    async def async_setup(self):
+        """Restore the snapshot and make sure the generator can be reached.
+
+        With a snapshot, setup does not wait on the controller. Without
+        one (a new generator) the first status read must succeed.
+        """
+        try:
+            self.fleet.register_client(self.client)
+        except ValueError as err:
+            raise ConfigEntryError(str(err))
+
+        await self.snapshot.async_load()
+        for name, coordinator in self.coordinators():
+            self.snapshot.restore(name, coordinator)
+
+        if self.coordinator.data is not None:
+            # Come up from the last known state and read the controller
+            # in the background
+            self.entry.async_create_background_task(
+                self.hass, self.coordinator.async_refresh(), "cummins_generator status"
+            )
+        else:
+            # Test connectivity
+            try:
+                await self.coordinator.async_config_entry_first_refresh()
+            except Exception as err:
+                await self.fleet.async_unregister_client(self.client)
+                raise ConfigEntryNotReady(f"Cannot connect to generator: {err}")
+
+        for name, coordinator in self.coordinators():
+            self.entry.async_on_unload(self.snapshot.track(name, coordinator))
+            self.fleet.register_poller(coordinator)
+        if self.recorder is not None:
+            # Keep the last few seconds of traffic when Home Assistant stops
+            self.entry.async_on_unload(
+                self.hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, self._async_close_recorder)
+            )
+
+    async def async_start(self):
+        """Read the pages the added entities need.
+
+        Called once the platforms are set up, so the listener contexts
+        say which pages are wanted. A coordinator with no data yet is read
+        before setup finishes; one restored from the snapshot is read in
+        the background. Coordinators that nobody needs do not touch the
+        controller.
+        """
+        first = []
+        for name, coordinator in self.coordinators()[1:]:
+            if not coordinator.pages_needed():
+                _LOGGER.debug("%s: no entity shows the %s pages", self.client.host, name)
+            elif coordinator.data is None:
+                first.append(coordinator.async_refresh())
+            elif coordinator.stale:
+                self.entry.async_create_background_task(
+                    self.hass, coordinator.async_refresh(), f"cummins_generator {name}"
+                )
+        await asyncio.gather(*first)
+
+    async def async_unload(self):
+        """Stop every coordinator and release the client."""
+        for _, coordinator in self.coordinators():
+            self.fleet.unregister_poller(coordinator)
+            await coordinator.async_shutdown()
+        await self.snapshot.async_unload()
+        await self.client.async_close()
+        await self.fleet.async_unregister_client(self.client)
+        if self.recorder is not None:
+            await self.recorder.async_close()
+
+    async def _async_close_recorder(self, _event):
+        """Write the buffered traffic."""
+        await self.recorder.async_close()
@@ -0,0 +1,205 @@
+"""Hourly long-term statistics aggregated from the status polls.
+
+Every successful index_data.html poll is folded into a running hourly
+aggregate: time-weighted mean, min and max of the analog readings, and
+the engine hours at the end of the hour. When an hour closes it is
+imported into the recorder as external statistics, so the trends survive
+even if the sensor entities are excluded from the recorder. The recorder
+builds daily, weekly and monthly figures from the hourly rows.
+"""
+import logging
+from datetime import timedelta
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+    get_last_statistics,
+)
+from homeassistant.util import dt as dt_util, slugify
+from .const import LONG_TERM_FIELDS, LONG_TERM_MAX_GAP
+from .registers import INDEX_FIELDS
+
+_LOGGER = logging.getLogger(__name__)
+DOMAIN = "cummins_generator"
+HOUR = timedelta(hours=1)
+
+
+class HourlySeries:
+    """Time-weighted mean, min and max of one reading within an hour."""
+
+    __slots__ = ("value", "since", "area", "seconds", "minimum", "maximum")
+
+    def __init__(self, value, since):
+        """Start the series at its first reading."""
+        self.value = value
+        self.since = since
+        self.area = 0.0
+        self.seconds = 0.0
+        self.minimum = self.maximum = value
+
+    def advance(self, until):
+        """Hold the current value up to ``until``."""
+        seconds = (until - self.since).total_seconds()
+        if seconds > 0:
+            self.area += self.value * seconds
+            self.seconds += seconds
+            self.since = until
+
+    def update(self, when, value):
+        """Record a new reading."""
+        self.advance(when)
+        self.since = when
+        self.value = value
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+
+    def close(self, carry):
+        """Return (mean, min, max) for the hour and start the next one.
+
+        The value is carried into the next hour unless there is a gap in
+        the readings. An hour with no held time returns None.
+        """
+        result = None
+        if self.seconds:
+            result = (self.area / self.seconds, self.minimum, self.maximum)
+        self.area = self.seconds = 0.0
+        self.minimum = self.maximum = self.value if carry else None
+        return result
+
+
+class HourlyAggregator:
+    """Aggregates polls into closed hours.
+
+    Readings are held until the next poll, but not across a gap longer
+    than ``max_gap``: a controller that stopped answering does not keep
+    its last value in the statistics.
+    """
+
+    def __init__(self, fields=LONG_TERM_FIELDS, max_gap=LONG_TERM_MAX_GAP):
+        """Initialize an empty aggregator."""
+        self.fields = fields
+        self.max_gap = max_gap
+        self.hour = None
+        self.series = {}
+        self.engine_hours = None
+        self._last = None
+
+    def add(self, when, data):
+        """Fold in a poll; return the hours it closed.
+
+        Each closed hour is ``(start, {field: (mean, min, max)}, engine_hours)``.
+        """
+        hour = when.replace(minute=0, second=0, microsecond=0)
+        gap = self._last is not None and when - self._last > self.max_gap
+        closed = []
+        if self.hour is None:
+            self.hour = hour
+        if gap:
+            # Nothing is known about the readings during the gap
+            for series in self.series.values():
+                series.since = when
+        while self.hour < hour:
+            end = self.hour + HOUR
+            values = {}
+            for key, series in self.series.items():
+                series.advance(end)
+                result = series.close(carry=not gap)
+                if result is not None:
+                    values[key] = result
+            if values or self.engine_hours is not None:
+                closed.append((self.hour, values, self.engine_hours))
+            self.hour = end
+        self._last = when
+
+        for key in self.fields:
+            value = data.get(key)
+            if value is None:
+                continue
+            series = self.series.get(key)
+            if series is None:
+                self.series[key] = HourlySeries(value, when)
+            else:
+                series.update(when, value)
+        if data.get("engine_hours") is not None:
+            self.engine_hours = data["engine_hours"]
+        return closed
+
+
+class CumminsLongTermStatistics:
+    """Publishes a controller's closed hours as external statistics."""
+
+    def __init__(self, hass, host, max_gap=LONG_TERM_MAX_GAP):
+        """Initialize the publisher."""
+        self.hass = hass
+        self.host = host
+        self.aggregator = HourlyAggregator(max_gap=max_gap)
+        self._prefix = f"{DOMAIN}:{slugify(host)}"
+        self._engine_sum = None
+        self._engine_hours = None
+
+    def statistic_id(self, key):
+        """Return the external statistic id for a field."""
+        return f"{self._prefix}_{key}"
+
+    def add(self, data):
+        """Fold in a poll and publish any hours it closed."""
+        closed = self.aggregator.add(dt_util.utcnow(), data)
+        if closed and "recorder" in self.hass.config.components:
+            self.hass.async_create_background_task(
+                self._async_publish(closed), f"{DOMAIN} statistics {self._prefix}"
+            )
+
+    async def _async_publish(self, closed):
+        """Import closed hours into the recorder."""
+        for field in INDEX_FIELDS:
+            if field.key not in self.aggregator.fields:
+                continue
+            rows = [
+                StatisticData(start=start, mean=values[field.key][0],
+                              min=values[field.key][1], max=values[field.key][2])
+                for start, values, _ in closed
+                if field.key in values
+            ]
+            if rows:
+                async_add_external_statistics(self.hass, self._metadata(field, True), rows)
+
+        rows = await self._async_engine_rows(closed)
+        if rows:
+            engine = next(field for field in INDEX_FIELDS if field.key == "engine_hours")
+            async_add_external_statistics(self.hass, self._metadata(engine, False), rows)
+
+    async def _async_engine_rows(self, closed):
+        """Return engine-hour rows whose sum grows by the hours run."""
+        statistic_id = self.statistic_id("engine_hours")
+        if self._engine_sum is None:
+            # Continue the sum from the last imported row
+            last = await get_instance(self.hass).async_add_executor_job(
+                get_last_statistics, self.hass, 1, statistic_id, True, {"state", "sum"}
+            )
+            row = last.get(statistic_id, [{}])[0]
+            self._engine_sum = row.get("sum") or 0.0
+            self._engine_hours = row.get("state")
+        rows = []
+        for start, _, hours in closed:
+            if hours is None:
+                continue
+            if self._engine_hours is not None and hours > self._engine_hours:
+                self._engine_sum += hours - self._engine_hours
+            # A lower reading (controller replaced or reset) starts a new
+            # baseline without adding to the sum
+            self._engine_hours = hours
+            rows.append(StatisticData(start=start, state=hours, sum=round(self._engine_sum, 3)))
+        return rows
+
+    def _metadata(self, field, has_mean):
+        """Return the statistic metadata for a field."""
+        return StatisticMetaData(
+            has_mean=has_mean,
+            has_sum=not has_mean,
+            name=f"Cummins Generator {self.host} {field.name}",
+            source=DOMAIN,
+            statistic_id=self.statistic_id(field.key),
+            unit_of_measurement=field.unit,
+        )
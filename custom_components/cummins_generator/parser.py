@@ -0,0 +1,207 @@
+"""Parsers for the Cummins Generator web interface pages.
+
+The configuration pages carry their values as arguments to JavaScript calls
+(writeSingleOption, writeDays, hrs24ToHrs12, writeMonths, writeOptions) and
+``var match = N;`` assignments. Every pattern is compiled once and starts
+with a literal, so the regex engine can skip ahead to candidates instead of
+trying each position; each search stops at its first hit.
+
+The values sit in the first part of each page, so a page can also be read
+as a stream: ``PageStream`` is fed the body chunk by chunk and reports when
+every token a parser needs has arrived, after which the rest of the page can
+be dropped.
+
+This module has no Home Assistant imports so it can be benchmarked on its
+own (see benchmarks/).
+"""
+import codecs
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+# loads.html
+# Manual: writeSingleOption( 1, !(0 & 0x01), "Manual" );
+# Auto:   writeSingleOption( 1, !(1 & 0x01), "Manual" );
+_LOAD_MODE_RE = re.compile(r'writeSingleOption\(\s*1,\s*!\((\d+)\s*&\s*0x01\),\s*"Manual"\s*\)')
+
+# exercise.html
+# var match = 3;  followed by the frequency options starting at "Never",
+# and a second "var match" before the minute options at the end of the page
+_MATCH_RE = re.compile(r"var match = (\d+);")
+_NEVER_OPTION_RE = re.compile(r'\s*writeSingleOption\(0,match == 0, "Never"\)')
+_DAYS_RE = re.compile(r"writeDays\((\d+)\)")
+_HOUR_RE = re.compile(r"hrs24ToHrs12\((\d+)\)")
+
+# timedate.html
+_MONTH_RE = re.compile(r"writeMonths\((\d+)\)")
+_DAY_OF_MONTH_RE = re.compile(r"writeOptions\(1,31,(\d+)")
+_YEAR_RE = re.compile(r"writeOptions\(2006,2031,(\d+)")
+_HOUR24_RE = re.compile(r"""name="@402"\s+value='(\d+)'""")
+_MINUTE_RE = re.compile(r"writeOptions\(0,59,(\d+)")
+
+# The tokens each page's parser needs, with how often each must appear.
+# exercise.html has two "var match" assignments: the frequency and, after
+# the frequency options, the minute.
+PAGE_TOKENS = {
+    "loads.html": ((_LOAD_MODE_RE, 1),),
+    "exercise.html": ((_MATCH_RE, 2), (_DAYS_RE, 1), (_HOUR_RE, 1)),
+    "timedate.html": (
+        (_MONTH_RE, 1), (_DAY_OF_MONTH_RE, 1), (_YEAR_RE, 1), (_HOUR24_RE, 1), (_MINUTE_RE, 1),
+    ),
+}
+
+# Longest token that can straddle two chunks
+_TOKEN_OVERLAP = 64
+
+FREQUENCY_OPTIONS = ["Never", "Weekly", "Bimonthly", "Monthly"]
+DAY_OPTIONS = ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+MINUTE_OPTIONS = ["00", "15", "30", "45"]
+
+
+@dataclass
+class LoadsPage:
+    """Values parsed from loads.html."""
+
+    mode: int = 0
+
+    @property
+    def load_mode(self) -> str:
+        """Return the load management mode label."""
+        return "Manual" if self.mode == 0 else "Automatic"
+
+
+@dataclass
+class ExercisePage:
+    """Values parsed from exercise.html."""
+
+    frequency: int = 0
+    day: int = 0
+    hour: int = 0
+    minute: int = 0
+
+    def as_dict(self) -> dict:
+        """Return the select option labels for the schedule."""
+        minute = f"{self.minute:02d}"
+        return {
+            "exercise_frequency": FREQUENCY_OPTIONS[self.frequency] if self.frequency < len(FREQUENCY_OPTIONS) else "Never",
+            "exercise_day": DAY_OPTIONS[self.day] if self.day < len(DAY_OPTIONS) else "Sunday",
+            "exercise_hour": str(self.hour),
+            "exercise_minute": minute if minute in MINUTE_OPTIONS else "00",
+        }
+
+
+@dataclass
+class TimeDatePage:
+    """Values parsed from timedate.html, in the controller's local time."""
+
+    month: Optional[int] = None
+    day: Optional[int] = None
+    year: Optional[int] = None
+    hour: Optional[int] = None
+    minute: Optional[int] = None
+
+    @property
+    def complete(self) -> bool:
+        """Return True if every field was found."""
+        return None not in (self.month, self.day, self.year, self.hour, self.minute)
+
+
+def _search_int(pattern, html) -> Optional[int]:
+    """Return the first group of the first match as an int."""
+    match = pattern.search(html)
+    return int(match.group(1)) if match else None
+
+
+def parse_loads(html: str) -> LoadsPage:
+    """Parse the load management mode from loads.html."""
+    return LoadsPage(mode=_search_int(_LOAD_MODE_RE, html) or 0)
+
+
+def parse_exercise(html: str) -> ExercisePage:
+    """Parse the exercise schedule from exercise.html."""
+    page = ExercisePage(
+        day=_search_int(_DAYS_RE, html) or 0,
+        hour=_search_int(_HOUR_RE, html) or 0,
+    )
+    # One scan over the "var match" assignments gives both the frequency
+    # (the one introducing the "Never" option) and the minute (the last one)
+    frequency = None
+    for match in _MATCH_RE.finditer(html):
+        value = int(match.group(1))
+        if frequency is None and _NEVER_OPTION_RE.match(html, match.end()):
+            frequency = value
+        page.minute = value
+    page.frequency = frequency or 0
+    return page
+
+
+def parse_timedate(html: str) -> TimeDatePage:
+    """Parse the controller clock from timedate.html."""
+    return TimeDatePage(
+        month=_search_int(_MONTH_RE, html),
+        day=_search_int(_DAY_OF_MONTH_RE, html),
+        year=_search_int(_YEAR_RE, html),
+        hour=_search_int(_HOUR24_RE, html),
+        minute=_search_int(_MINUTE_RE, html),
+    )
+
+
+class PageStream:
+    """Collects a page body until every required token has been seen.
+
+    ``feed`` returns True once the text so far holds each token as often as
+    required; that prefix parses to the same values as the whole page. A
+    match is only counted once a character follows it, so a number cut off
+    at the end of a chunk is not taken as complete.
+    """
+
+    def __init__(self, tokens, encoding="utf-8"):
+        """Start an empty stream; an unknown encoding is read as latin-1."""
+        try:
+            decoder = codecs.getincrementaldecoder(encoding)
+        except LookupError:
+            decoder = codecs.getincrementaldecoder("latin-1")
+        self._decoder = decoder(errors="replace")
+        self._parts = []
+        self._text = ""
+        self._scanned = 0
+        self._needed = [[pattern, count, 0] for pattern, count in tokens]
+        self.size = 0
+
+    @property
+    def complete(self) -> bool:
+        """Return True if every required token has been seen."""
+        return not self._needed
+
+    def feed(self, chunk: bytes) -> bool:
+        """Add a chunk of the body; return True once the page is complete."""
+        self.size += len(chunk)
+        self._parts.append(self._decoder.decode(chunk))
+        if self._needed:
+            self._text = "".join(self._parts)
+            self._parts = [self._text]
+            self._scan()
+        return self.complete
+
+    def _scan(self):
+        """Count the tokens in the text not scanned yet."""
+        text = self._text
+        start = max(self._scanned - _TOKEN_OVERLAP, 0)
+        for token in list(self._needed):
+            pattern, count, pos = token
+            for match in pattern.finditer(text, max(start, pos)):
+                if match.end() >= len(text):
+                    break
+                count -= 1
+                pos = match.end()
+                if not count:
+                    break
+            if count:
+                token[1:] = [count, pos]
+            else:
+                self._needed.remove(token)
+        self._scanned = len(text)
+
+    def text(self) -> str:
+        """Return the body read so far."""
+        return "".join(self._parts) + self._decoder.decode(b"", final=True)
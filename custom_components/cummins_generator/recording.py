@@ -0,0 +1,276 @@
+"""Record raw controller traffic, and replay it.
+
+When recording is switched on in the options, every page read and
+register write of a controller is appended to a JSON-lines file: one
+header line, then one line per exchange with the wall time, path or
+query, latency, and the body or error. A body identical to the previous
+body of the same page is stored as ``"same": true``, so a slowly changing
+controller costs little more than its timestamps. The file is rotated
+when it reaches RECORDING_MAX_BYTES, keeping RECORDING_BACKUPS older
+files, and every file starts with its own header and full bodies.
+
+Lines are buffered and written in the executor every
+RECORDING_FLUSH_DELAY seconds, so recording never blocks the event loop.
+
+``ReplayClient`` answers a coordinator's reads from a recording, either
+at the recorded pace or as fast as possible, and ``async_replay`` drives
+coordinators through a recording in recorded order. ``tools/replay.py``
+uses both for offline regression runs and to profile the parsers on real
+traffic.
+
+Nothing here imports Home Assistant.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from .client import CircuitBreaker, CumminsGeneratorError, CumminsGeneratorUnavailable
+from .const import RECORDING_BACKUPS, RECORDING_FLUSH_DELAY, RECORDING_MAX_BYTES
+from .stats import ControllerStats
+
+_LOGGER = logging.getLogger(__name__)
+
+RECORDING_VERSION = 1
+OP_GET = "get"
+OP_WRITE = "write"
+
+
+class TrafficRecorder:
+    """Appends one controller's exchanges to a rotating file."""
+
+    def __init__(self, path, host, max_bytes=RECORDING_MAX_BYTES, backups=RECORDING_BACKUPS):
+        """Initialize the recorder; nothing is written until the first flush."""
+        self.path = path
+        self.host = host
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._buffer = []
+        self._handle = None
+        self._task = None
+        # Last body written per page, only touched by the writer
+        self._last_bodies = {}
+
+    def record_read(self, path, latency, body=None, error=None):
+        """Queue a page read for writing."""
+        self._record(OP_GET, path, latency, body, error)
+
+    def record_write(self, params, latency, error=None):
+        """Queue a wr_logical.cgi write for writing."""
+        self._record(OP_WRITE, params, latency, None, error)
+
+    def _record(self, op, target, latency, body, error):
+        """Queue one exchange for writing."""
+        entry = {"t": round(time.time(), 3), "op": op, "path": target, "latency": round(latency, 4)}
+        if error is not None:
+            entry["error"] = str(error) or type(error).__name__
+            entry["unavailable"] = isinstance(error, CumminsGeneratorUnavailable)
+        elif body is not None:
+            entry["body"] = body
+        self._buffer.append(entry)
+        if self._handle is None and self._task is None:
+            self._handle = asyncio.get_running_loop().call_later(
+                RECORDING_FLUSH_DELAY, self._start_flush
+            )
+
+    def _start_flush(self):
+        """Start writing the buffered lines."""
+        self._handle = None
+        self._task = asyncio.get_running_loop().create_task(self._async_flush())
+
+    async def _async_flush(self):
+        """Write buffered lines until the buffer is empty."""
+        loop = asyncio.get_running_loop()
+        try:
+            while self._buffer:
+                entries, self._buffer = self._buffer, []
+                await loop.run_in_executor(None, self._write, entries)
+        except OSError as err:
+            _LOGGER.warning("%s: could not write the traffic recording: %s", self.host, err)
+        finally:
+            self._task = None
+
+    def _write(self, entries):
+        """Append entries to the file, rotating it when it is full."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as file:
+            if file.tell() == 0:
+                self._last_bodies = {}
+                file.write(_dumps({"version": RECORDING_VERSION, "host": self.host}))
+            for entry in entries:
+                body = entry.get("body")
+                if body is not None:
+                    if self._last_bodies.get(entry["path"]) == body:
+                        entry = {key: value for key, value in entry.items() if key != "body"}
+                        entry["same"] = True
+                    else:
+                        self._last_bodies[entry["path"]] = body
+                file.write(_dumps(entry))
+            full = file.tell() >= self.max_bytes
+        if full:
+            self._rotate()
+
+    def _rotate(self):
+        """Shift the backups up by one and start a new file."""
+        for index in range(self.backups, 0, -1):
+            source = self.path if index == 1 else f"{self.path}.{index - 1}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index}")
+        if not self.backups:
+            os.remove(self.path)
+
+    async def async_close(self):
+        """Write whatever is still buffered."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        if self._task is not None:
+            await self._task
+        if self._buffer:
+            self._task = asyncio.get_running_loop().create_task(self._async_flush())
+            await self._task
+
+
+def _dumps(entry):
+    """Return one compact JSON line."""
+    return json.dumps(entry, separators=(",", ":")) + "\n"
+
+
+def recording_files(path):
+    """Return a recording and its backups, oldest first."""
+    files = []
+    index = 1
+    while os.path.exists(f"{path}.{index}"):
+        files.append(f"{path}.{index}")
+        index += 1
+    files.reverse()
+    if os.path.exists(path):
+        files.append(path)
+    return files
+
+
+def load_recording(path):
+    """Return the host and exchanges of a recording, with bodies filled in.
+
+    Reads the rotated backups too, oldest first. A line cut short by a
+    crash is skipped.
+    """
+    host = None
+    entries = []
+    for name in recording_files(path):
+        last_bodies = {}
+        with open(name, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if "version" in entry:
+                    host = host or entry.get("host")
+                    continue
+                if entry.pop("same", False):
+                    entry["body"] = last_bodies.get(entry["path"])
+                elif "body" in entry:
+                    last_bodies[entry["path"]] = entry["body"]
+                entries.append(entry)
+    return host, entries
+
+
+class ReplayFinished(CumminsGeneratorUnavailable):
+    """The recording has no more reads of a page."""
+
+
+class ReplayClient:
+    """Stands in for CumminsGeneratorClient, answering from a recording.
+
+    Each page is answered with its recorded reads in order, including
+    recorded errors. With ``realtime`` a read waits until its recorded
+    time (relative to the first exchange) and then for its recorded
+    latency; otherwise it answers at once. Writes are kept in ``writes``
+    and not checked against the recording.
+    """
+
+    def __init__(self, entries, host="replay", realtime=False):
+        """Initialize the client."""
+        self.host = host
+        self.realtime = realtime
+        self.max_connections = 1
+        self.fleet = None
+        self.stats = ControllerStats()
+        self.breaker = CircuitBreaker(host)
+        self.writes = []
+        self._reads = {}
+        for entry in entries:
+            if entry["op"] == OP_GET:
+                self._reads.setdefault(entry["path"], deque()).append(entry)
+        self._first = entries[0]["t"] if entries else 0.0
+        self._started = None
+
+    def next_time(self, path):
+        """Return the recorded time of the next read of a page, or None."""
+        reads = self._reads.get(path)
+        return reads[0]["t"] if reads else None
+
+    def skip(self, path):
+        """Drop the next read of a page."""
+        self._reads[path].popleft()
+
+    async def async_get_text(self, path, tokens=None):
+        """Return the next recorded body of a page."""
+        reads = self._reads.get(path)
+        if not reads:
+            raise ReplayFinished(f"{path}: no more recorded reads")
+        entry = reads.popleft()
+        if self.realtime:
+            loop = asyncio.get_running_loop()
+            if self._started is None:
+                self._started = loop.time()
+            delay = entry["t"] - self._first - (loop.time() - self._started)
+            await asyncio.sleep(max(delay, 0) + entry["latency"])
+        endpoint = self.stats.endpoint(path)
+        if "error" in entry:
+            error_type = CumminsGeneratorUnavailable if entry.get("unavailable") else CumminsGeneratorError
+            error = error_type(entry["error"])
+            endpoint.record_failure(error)
+            raise error
+        endpoint.record_success(entry["latency"])
+        endpoint.record_size(len(entry["body"]))
+        return entry["body"]
+
+    async def async_write_registers(self, registers):
+        """Keep a write instead of sending it."""
+        self.writes.append(dict(registers))
+
+    async def async_close(self):
+        """Nothing to release."""
+
+
+async def async_replay(client, coordinators):
+    """Refresh coordinators once per recorded read, in recorded order.
+
+    Each coordinator owns its ``pages`` (the status coordinator owns
+    index_data.html). Before a refresh driven by a page other than a
+    coordinator's first, its configuration is invalidated so the page is
+    read again. A read that its coordinator did not make (for example a
+    page no listener shows) is skipped. Returns the number of refreshes
+    and skipped reads.
+    """
+    owners = {}
+    for coordinator in coordinators:
+        for page in coordinator.pages or ("index_data.html",):
+            owners[page] = coordinator
+    refreshes = skipped = 0
+    while True:
+        pending = [(client.next_time(page), page) for page in owners if client.next_time(page) is not None]
+        if not pending:
+            return refreshes, skipped
+        when, page = min(pending)
+        coordinator = owners[page]
+        if coordinator.pages and page != coordinator.pages[0] and hasattr(coordinator, "invalidate_config"):
+            coordinator.invalidate_config()
+        await coordinator.async_refresh()
+        refreshes += 1
+        if client.next_time(page) == when:
+            client.skip(page)
+            skipped += 1
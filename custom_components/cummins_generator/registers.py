@@ -0,0 +1,187 @@
+"""Declarative map of the values in index_data.html.
+
+The status page is one value per line. Each ``Field`` says which line a
+value is on and how to turn it into the reading Home Assistant sees, and
+optionally which sensor shows it; a field with ``bits`` is split into
+binary sensors instead. The sensor and binary sensor platforms are built
+from ``INDEX_FIELDS``, so exposing another value is one entry here.
+
+``compile_decoder`` turns the table into a single generated function, so
+a refresh does no per-field interpretation. This module has no Home
+Assistant imports so it can be benchmarked on its own (see benchmarks/).
+"""
+from dataclasses import dataclass
+from typing import Mapping, Optional, Tuple
+
+from .const import (
+    LCD_ACTION_REQUIRED,
+    LCD_GENSET_RUNNING,
+    LCD_STANDBY_DISABLED,
+    LCD_UTILITY_CONNECTED,
+    LCD_UTILITY_PRESENT,
+)
+
+
+@dataclass(frozen=True)
+class Bit:
+    """A binary sensor for one or more bits of a field."""
+
+    key: str
+    name: str
+    mask: int
+    device_class: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class Field:
+    """One line of index_data.html.
+
+    ``kind`` is int, float or enum. Numbers are divided by ``divisor`` and,
+    if ``digits`` is set, rounded to that many decimals. An enum maps the
+    integer to a label; labels may use ``{raw}`` (this line) and
+    ``{lines[N]}`` (another line), and ``default`` covers unlisted values.
+    """
+
+    key: str
+    line: int
+    kind: str = "int"
+    divisor: float = 1
+    digits: Optional[int] = None
+    enum: Optional[Mapping[int, str]] = None
+    default: str = "Unknown {raw}"
+    name: Optional[str] = None
+    unit: Optional[str] = None
+    device_class: Optional[str] = None
+    precision: Optional[int] = None
+    bits: Tuple[Bit, ...] = ()
+
+
+INDEX_FIELDS = (
+    Field(
+        "status", 4, "enum",
+        enum={
+            0: "Stopped", 1: "Stopped", 2: "Starting", 3: "Starting",
+            4: "Running", 5: "Priming", 6: "Fault {lines[14]}", 7: "Eng.Only",
+            8: "TestMode", 9: "Volt Adj", 20: "Config Mode", 21: "Cycle crank pause",
+            22: "Exercising", 23: "Engine Cooldown",
+        },
+        name="Status",
+    ),
+    Field(
+        "battery_voltage", 3, "float", divisor=10,
+        name="Battery Voltage", unit="V", device_class="voltage", precision=1,
+    ),
+    Field("output_voltage", 7, name="Output Voltage", unit="V", device_class="voltage"),
+    Field("frequency", 8, name="Frequency", unit="Hz", device_class="frequency"),
+    # Minutes on the controller, shown in tenths of an hour
+    Field(
+        "engine_hours", 9, divisor=60, digits=1,
+        name="Engine Hours", unit="h", device_class="duration",
+    ),
+    Field("load_1", 5, name="Load Line 1", unit="%"),
+    Field("load_2", 6, name="Load Line 2", unit="%"),
+    Field(
+        "lcd_status", 13,
+        bits=(
+            Bit("utility_present", "Utility Present", LCD_UTILITY_PRESENT, "power"),
+            Bit("utility_connected", "Utility Connected", LCD_UTILITY_CONNECTED),
+            Bit("genset_running", "Genset Running", LCD_GENSET_RUNNING, "running"),
+            Bit("standby_disabled", "Standby Disabled", LCD_STANDBY_DISABLED),
+            Bit("action_required", "Action Required", LCD_ACTION_REQUIRED, "problem"),
+        ),
+    ),
+    Field("fault_code", 14),
+)
+
+
+def _expression(field, index):
+    """Return Python source that decodes one field from ``lines``."""
+    if field.kind == "enum":
+        # Fixed labels come from a dict; templated and unknown values
+        # take the slower formatting path
+        return f"E{index}.get(int(lines[{field.line}])) or T{index}(lines)"
+    if field.kind not in ("int", "float"):
+        raise ValueError(f"{field.key}: unknown kind {field.kind!r}")
+    value = f"{field.kind}(lines[{field.line}])"
+    if field.digits is not None:
+        factor = 10 ** field.digits
+        return f"round({value} / {float(field.divisor) / factor!r}) / {factor}"
+    if field.divisor != 1:
+        return f"{value} / {field.divisor!r}"
+    return value
+
+
+def _template(field):
+    """Return the formatter for an enum's templated and unknown values."""
+    templates = {value: label for value, label in field.enum.items() if "{" in label}
+
+    def format_label(lines):
+        raw = lines[field.line]
+        label = templates.get(int(raw), field.default)
+        try:
+            return label.format(raw=raw, lines=lines)
+        except IndexError:
+            return label.split("{", 1)[0].strip() or raw
+
+    return format_label
+
+
+def compile_decoder(fields=INDEX_FIELDS):
+    """Build a function that decodes index_data.html into a dict.
+
+    A complete page is decoded by one generated dict expression. A short
+    page (such as a truncated response) is decoded field by field and
+    only the fields whose line arrived are returned.
+    """
+    namespace = {}
+    entries = []
+    partial = []
+    for index, field in enumerate(fields):
+        if not field.key.isidentifier():
+            raise ValueError(f"invalid field key {field.key!r}")
+        if field.kind == "enum":
+            namespace[f"E{index}"] = {
+                value: label for value, label in field.enum.items() if "{" not in label
+            }
+            namespace[f"T{index}"] = _template(field)
+        expression = _expression(field, index)
+        entries.append(f"        {field.key!r}: {expression},")
+        partial.append(
+            (field.key, field.line, eval(f"lambda lines: {expression}", namespace))
+        )
+    last_line = max(field.line for field in fields)
+    source = "\n".join([
+        "def decode(text):",
+        "    lines = text.strip().split('\\n')",
+        f"    if len(lines) <= {last_line}:",
+        "        return decode_partial(lines)",
+        "    return {",
+        *entries,
+        "    }",
+    ])
+
+    def decode_partial(lines):
+        return {
+            key: decoder(lines)
+            for key, line, decoder in partial
+            if line < len(lines)
+        }
+
+    namespace["decode_partial"] = decode_partial
+    exec(compile(source, "<index_data decoder>", "exec"), namespace)
+    decode = namespace["decode"]
+    decode.source = source
+    return decode
+
+
+decode_index = compile_decoder()
+INDEX_KEYS = frozenset(field.key for field in INDEX_FIELDS)
+
+
+def is_complete(data):
+    """Return True if a decoded index_data.html has every field.
+
+    A short page decodes to only the fields whose line arrived; callers
+    that act on the readings must not mistake a missing field for zero.
+    """
+    return INDEX_KEYS <= data.keys()
@@ -1,131 +1,237 @@
 """Cummins Generator select platform."""
-import aiohttp
-import base64
+import asyncio
 import logging
+import time
+import voluptuous as vol
 from homeassistant.components.select import SelectEntity
 from homeassistant.const import CONF_HOST
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import entity_platform
 from homeassistant.helpers.entity import DeviceInfo
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.helpers.update_coordinator import UpdateFailed
 from datetime import timedelta
+from .client import CumminsGeneratorError, CumminsGeneratorUnavailable
+from .coordinator import CumminsCoordinator
+from .entity import CumminsCoordinatorEntity
+from .const import CONFIG_REFRESH_INTERVAL, CONFIG_REGISTERS
+from .parser import (
+    DAY_OPTIONS,
+    FREQUENCY_OPTIONS,
+    MINUTE_OPTIONS,
+    PAGE_TOKENS,
+    parse_exercise,
+    parse_loads,
+)
 
 _LOGGER = logging.getLogger(__name__)
 DOMAIN = "cummins_generator"
 SCAN_INTERVAL = timedelta(seconds=30)
+CONFIG_PAGES = ("loads.html", "exercise.html")
+
+# The page each select is read from
+SELECT_PAGES = {
+    "load_mode": "loads.html",
+    "load_1": "loads_data.html",
+    "load_2": "loads_data.html",
+    "exercise_frequency": "exercise.html",
+    "exercise_day": "exercise.html",
+    "exercise_hour": "exercise.html",
+    "exercise_minute": "exercise.html",
+}
+
+SERVICE_SET_EXERCISE_SCHEDULE = "set_exercise_schedule"
+SET_EXERCISE_SCHEDULE_SCHEMA = {
+    vol.Optional("frequency"): vol.In(FREQUENCY_OPTIONS),
+    vol.Optional("day"): vol.In(DAY_OPTIONS),
+    vol.Optional("hour"): vol.All(vol.Coerce(int), vol.Range(min=0, max=23)),
+    vol.Optional("minute"): vol.All(vol.Coerce(int), vol.In([int(m) for m in MINUTE_OPTIONS])),
+}
 
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """Set up the Cummins Generator select entities."""
-    host = config_entry.data[CONF_HOST]
-    password = config_entry.data.get("password", "cummins")
-    coordinator = CumminsLoadCoordinator(hass, host, password)
-    await coordinator.async_config_entry_first_refresh()
-    
+    hub = hass.data[DOMAIN][config_entry.entry_id]
+    # The hub reads these pages once the entities are added, and only the
+    # pages that an enabled entity shows
+    coordinator = hub.loads
+    commands = hub.commands
+
     selects = [
-        CumminsGeneratorSelect(coordinator, "load_mode", "Load Mode", ["Manual", "Automatic"]),
-        CumminsGeneratorSelect(coordinator, "load_1", "Load 1", ["Disconnected", "Connected"]),
-        CumminsGeneratorSelect(coordinator, "load_2", "Load 2", ["Disconnected", "Connected"]),
-        CumminsGeneratorSelect(coordinator, "exercise_frequency", "Exercise Frequency", ["Never", "Weekly", "Bimonthly", "Monthly"]),
-        CumminsGeneratorSelect(coordinator, "exercise_day", "Exercise Day", ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]),
-        CumminsGeneratorSelect(coordinator, "exercise_hour", "Exercise Hour", [str(i) for i in range(24)]),
-        CumminsGeneratorSelect(coordinator, "exercise_minute", "Exercise Minute", ["00", "15", "30", "45"]),
+        CumminsGeneratorSelect(coordinator, commands, "load_mode", "Load Mode", ["Manual", "Automatic"]),
+        CumminsGeneratorSelect(coordinator, commands, "load_1", "Load 1", ["Disconnected", "Connected"]),
+        CumminsGeneratorSelect(coordinator, commands, "load_2", "Load 2", ["Disconnected", "Connected"]),
+        CumminsGeneratorSelect(coordinator, commands, "exercise_frequency", "Exercise Frequency", FREQUENCY_OPTIONS),
+        CumminsGeneratorSelect(coordinator, commands, "exercise_day", "Exercise Day", DAY_OPTIONS),
+        CumminsGeneratorSelect(coordinator, commands, "exercise_hour", "Exercise Hour", [str(i) for i in range(24)]),
+        CumminsGeneratorSelect(coordinator, commands, "exercise_minute", "Exercise Minute", MINUTE_OPTIONS),
     ]
     async_add_entities(selects)
 
-class CumminsLoadCoordinator(DataUpdateCoordinator):
-    """Data coordinator for Cummins Generator load management."""
+    platform = entity_platform.async_get_current_platform()
+    platform.async_register_entity_service(
+        SERVICE_SET_EXERCISE_SCHEDULE,
+        SET_EXERCISE_SCHEDULE_SCHEMA,
+        "async_set_exercise_schedule",
+    )
+
+class CumminsLoadCoordinator(CumminsCoordinator):
+    """Data coordinator for Cummins Generator load management.
+
+    Only the pages an enabled select shows are read.
+    """
+
+    pages = ("loads_data.html", *CONFIG_PAGES)
 
-    def __init__(self, hass, host, password):
+    def __init__(self, hass, client):
         """Initialize the coordinator."""
-        super().__init__(hass, _LOGGER, name="Cummins Load", update_interval=SCAN_INTERVAL)
-        self.host = host
-        self.auth = base64.b64encode(f"admin:{password}".encode()).decode("ascii")
+        super().__init__(
+            hass, _LOGGER, name="Cummins Load", update_interval=SCAN_INTERVAL, always_update=False
+        )
+        self.client = client
+        self.host = client.host
+        # loads.html and exercise.html only change when written, so they are
+        # refreshed on a much slower clock than loads_data.html
+        self._config_data = {}
+        self._config_expires = 0.0
+        self._page_cache = {}
+
+    def async_restore(self, data):
+        """Show saved data, keeping its configuration values for later reads."""
+        super().async_restore(data)
+        self._config_data = {
+            key: value for key, value in data.items() if key not in ("load_1", "load_2")
+        }
 
     async def _async_update_data(self):
         """Fetch load data from the generator."""
+        needed = self.pages_needed()
+        if not needed:
+            # Every select is disabled; leave the controller alone
+            return self.data
+        config_pages = [page for page in needed if page in CONFIG_PAGES]
+        if time.monotonic() < self._config_expires:
+            # Still fresh, apart from a page whose select was just enabled
+            config_pages = [page for page in config_pages if page not in self._page_cache]
+        await self._async_wait_for_slot()
         try:
-            async with aiohttp.ClientSession() as session:
-                headers = {"Authorization": f"Basic {self.auth}"}
-                
-                # Get load data from loads.html
-                load_data = {}
-                async with session.get(f"http://{self.host}/loads.html", headers=headers) as response:
-                    if response.status == 200:
-                        html = await response.text()
-                        load_data = self._parse_loads_html(html)
-                
-                # Get load status from loads_data.html
-                async with session.get(f"http://{self.host}/loads_data.html", headers=headers) as response:
-                    if response.status == 200:
-                        data = await response.text()
-                        lines = data.strip().split('\n')
-                        if len(lines) >= 3:
-                            load_data.update({
-                                "load_1": "Connected" if int(lines[1]) == 0 else "Disconnected",
-                                "load_2": "Connected" if int(lines[2]) == 0 else "Disconnected",
-                            })
-                
-                # Get exercise data
-                exercise_data = {}
-                async with session.get(f"http://{self.host}/exercise.html", headers=headers) as response:
-                    if response.status == 200:
-                        html = await response.text()
-                        exercise_data = self._parse_exercise_html(html)
-                
-                return {**load_data, **exercise_data}
-                
+            # The pages are independent, so fetch them side by side and let
+            # the client's limiter decide how many actually run at once
+            if config_pages:
+                data, _ = await asyncio.gather(
+                    self._async_get_optional("loads_data.html")
+                    if "loads_data.html" in needed else self._async_none(),
+                    self._async_update_config(config_pages),
+                )
+            elif "loads_data.html" in needed:
+                data = await self._async_get_optional("loads_data.html")
+            else:
+                data = None
+
+            load_data = dict(self._config_data)
+            
+            # Get load status from loads_data.html
+            if data is not None:
+                load_data.update(
+                    self._timed_parse("loads_data.html", self._parse_loads_data, data)
+                )
+            
+            return load_data
+            
         except Exception as err:
             raise UpdateFailed(f"Error communicating with generator: {err}")
 
-    def _parse_loads_html(self, html):
-        """Parse load management mode from HTML."""
-        import re
-        
-        # Look for writeSingleOption pattern to determine mode
-        # Manual: writeSingleOption( 1, !(0 & 0x01), "Manual" );
-        # Auto: writeSingleOption( 1, !(1 & 0x01), "Manual" );
-        mode_match = re.search(r'writeSingleOption\(\s*1,\s*!\((\d+)\s*&\s*0x01\),\s*"Manual"\s*\)', html)
-        mode_value = int(mode_match.group(1)) if mode_match else 0
-        
+    async def _async_none(self):
+        """Stand in for a page that is not read."""
+        return None
+
+    async def _async_update_config(self, paths=CONFIG_PAGES):
+        """Refresh the load mode and exercise schedule pages."""
+        config_data = dict(self._config_data)
+        pages = [
+            (path, parser)
+            for path, parser in (
+                ("loads.html", self._parse_loads_html),
+                ("exercise.html", self._parse_exercise_html),
+            )
+            if path in paths
+        ]
+        bodies = await asyncio.gather(
+            *(self._async_get_optional(path) for path, _ in pages)
+        )
+        for (path, parser), html in zip(pages, bodies):
+            if html is not None:
+                config_data.update(self._parse_cached(path, html, parser))
+            else:
+                # Keep what we knew rather than dropping the entities' state
+                cached = self._page_cache.get(path)
+                if cached is not None:
+                    config_data.update(cached[1])
+        self._config_data = config_data
+        if len(pages) == len(CONFIG_PAGES) or time.monotonic() >= self._config_expires:
+            self._config_expires = time.monotonic() + CONFIG_REFRESH_INTERVAL.total_seconds()
+
+    def _parse_cached(self, path, html, parser):
+        """Parse a page, reusing the previous result if the body is unchanged."""
+        digest = hash(html)
+        cached = self._page_cache.get(path)
+        if cached is not None and cached[0] == digest:
+            return cached[1]
+        parsed = self._timed_parse(path, parser, html)
+        self._page_cache[path] = (digest, parsed)
+        return parsed
+
+    def invalidate_config(self):
+        """Force the configuration pages to be re-read on the next refresh."""
+        self._config_expires = 0.0
+
+    def note_write(self, registers):
+        """Invalidate the configuration pages if a write touched them."""
+        if CONFIG_REGISTERS.intersection(registers):
+            self.invalidate_config()
+
+    async def async_refresh_config(self):
+        """Re-read every page now."""
+        self.invalidate_config()
+        await self.async_request_refresh()
+
+    async def _async_get_optional(self, path):
+        """Fetch a page, returning None if the controller rejects it.
+
+        An unreachable controller is still an error for the whole refresh.
+        """
+        try:
+            # The UI pages are only read up to the values they carry
+            return await self.client.async_get_text(path, PAGE_TOKENS.get(path))
+        except CumminsGeneratorUnavailable:
+            raise
+        except CumminsGeneratorError as err:
+            _LOGGER.debug("Skipping %s: %s", path, err)
+            return None
+
+    def _parse_loads_data(self, data):
+        """Parse load connection status from loads_data.html."""
+        lines = data.strip().split('\n')
+        if len(lines) < 3:
+            return {}
         return {
-            "load_mode": "Manual" if mode_value == 0 else "Automatic",
+            "load_1": "Connected" if int(lines[1]) == 0 else "Disconnected",
+            "load_2": "Connected" if int(lines[2]) == 0 else "Disconnected",
         }
 
+    def _parse_loads_html(self, html):
+        """Parse load management mode from HTML."""
+        return {"load_mode": parse_loads(html).load_mode}
+
     def _parse_exercise_html(self, html):
         """Parse exercise settings from HTML."""
-        import re
-        
-        # Find frequency: var match = 3; (before writeSingleOption calls for frequency)
-        freq_section = re.search(r'var match = (\d+);.*?writeSingleOption\(0,match == 0, "Never"\)', html, re.DOTALL)
-        frequency = int(freq_section.group(1)) if freq_section else 0
-        freq_options = ["Never", "Weekly", "Bimonthly", "Monthly"]
-        
-        # Find day: writeDays(6)
-        day_match = re.search(r'writeDays\((\d+)\)', html)
-        day = int(day_match.group(1)) if day_match else 0
-        day_options = ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
-        
-        # Find hour: hrs24ToHrs12(10)
-        hour_match = re.search(r'hrs24ToHrs12\((\d+)\)', html)
-        hour = int(hour_match.group(1)) if hour_match else 0
-        
-        # Find minute: var match = 0; (before writeSingleOption calls for minutes)
-        # Find all match variables and get the last one (for minutes)
-        all_matches = re.findall(r'var match = (\d+);', html)
-        minute = all_matches[-1] if all_matches else "0"
-        min_options = ["00", "15", "30", "45"]
-        
-        return {
-            "exercise_frequency": freq_options[frequency] if frequency < len(freq_options) else "Never",
-            "exercise_day": day_options[day] if day < len(day_options) else "Sunday", 
-            "exercise_hour": str(hour),
-            "exercise_minute": minute if minute in min_options else "00",
-        }
+        return parse_exercise(html).as_dict()
 
-class CumminsGeneratorSelect(SelectEntity):
+class CumminsGeneratorSelect(CumminsCoordinatorEntity, SelectEntity):
     """Representation of a Cummins Generator select entity."""
 
-    def __init__(self, coordinator, select_type, name, options):
+    def __init__(self, coordinator, commands, select_type, name, options):
         """Initialize the select entity."""
-        self.coordinator = coordinator
+        super().__init__(coordinator, SELECT_PAGES[select_type])
+        self.commands = commands
         self.select_type = select_type
         self._name = name
         self._attr_options = options
@@ -153,45 +259,56 @@ class CumminsGeneratorSelect(SelectEntity):
             return None
         return self.coordinator.data.get(self.select_type)
 
-    @property
-    def available(self):
-        """Return if entity is available."""
-        return self.coordinator.last_update_success
-
     async def async_select_option(self, option: str) -> None:
         """Change the selected option."""
+        if self.select_type == "load_mode":
+            registers = {426: "1" if option == "Manual" else "2"}
+        elif self.select_type == "load_1":
+            registers = {426: "3" if option == "Disconnected" else "4"}
+        elif self.select_type == "load_2":
+            registers = {426: "5" if option == "Disconnected" else "6"}
+        elif self.select_type == "exercise_frequency":
+            registers = {425: str(FREQUENCY_OPTIONS.index(option))}
+        elif self.select_type == "exercise_day":
+            registers = {391: str(DAY_OPTIONS.index(option))}
+        elif self.select_type == "exercise_hour":
+            registers = {392: option}
+        elif self.select_type == "exercise_minute":
+            registers = {393: option}
+        
         try:
-            async with aiohttp.ClientSession() as session:
-                headers = {"Authorization": f"Basic {self.coordinator.auth}"}
-                
-                if self.select_type == "load_mode":
-                    value = "1" if option == "Manual" else "2"
-                    url = f"http://{self.coordinator.host}/wr_logical.cgi?@426={value}"
-                elif self.select_type == "load_1":
-                    value = "3" if option == "Disconnected" else "4"
-                    url = f"http://{self.coordinator.host}/wr_logical.cgi?@426={value}"
-                elif self.select_type == "load_2":
-                    value = "5" if option == "Disconnected" else "6"
-                    url = f"http://{self.coordinator.host}/wr_logical.cgi?@426={value}"
-                elif self.select_type == "exercise_frequency":
-                    value = ["0", "1", "2", "3"][["Never", "Weekly", "Bimonthly", "Monthly"].index(option)]
-                    url = f"http://{self.coordinator.host}/wr_logical.cgi?@425={value}"
-                elif self.select_type == "exercise_day":
-                    value = str(["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"].index(option))
-                    url = f"http://{self.coordinator.host}/wr_logical.cgi?@391={value}"
-                elif self.select_type == "exercise_hour":
-                    url = f"http://{self.coordinator.host}/wr_logical.cgi?@392={option}"
-                elif self.select_type == "exercise_minute":
-                    url = f"http://{self.coordinator.host}/wr_logical.cgi?@393={option}"
-                
-                async with session.get(url, headers=headers) as response:
-                    if response.status != 200:
-                        _LOGGER.error(f"Failed to set {self._name}: {response.status}")
-                    else:
-                        await self.coordinator.async_request_refresh()
+            await self.commands.async_submit(self.select_type, registers)
         except Exception as err:
             _LOGGER.error(f"Error setting {self._name}: {err}")
+        else:
+            self.coordinator.note_write(registers)
+            self.coordinator.async_apply_optimistic({self.select_type: option})
+
+    async def async_set_exercise_schedule(self, frequency=None, day=None, hour=None, minute=None):
+        """Write the whole exercise schedule in a single request."""
+        current = self.coordinator.data or {}
+        frequency = frequency or current.get("exercise_frequency", "Never")
+        day = day or current.get("exercise_day", "Sunday")
+        hour = str(hour) if hour is not None else current.get("exercise_hour", "0")
+        minute = f"{minute:02d}" if minute is not None else current.get("exercise_minute", "00")
+        registers = {
+            425: str(FREQUENCY_OPTIONS.index(frequency)),
+            391: str(DAY_OPTIONS.index(day)),
+            392: hour,
+            393: minute,
+        }
+        try:
+            await self.commands.async_submit("exercise_schedule", registers)
+        except Exception as err:
+            raise HomeAssistantError(f"Error setting exercise schedule: {err}") from err
+        self.coordinator.note_write(registers)
+        self.coordinator.async_apply_optimistic({
+            "exercise_frequency": frequency,
+            "exercise_day": day,
+            "exercise_hour": hour,
+            "exercise_minute": minute,
+        })
 
     async def async_update(self):
-        """Update the entity."""
-        await self.coordinator.async_request_refresh()
+        """Re-read the configuration pages when an update is requested."""
+        await self.coordinator.async_refresh_config()
@@ -1,13 +1,39 @@
 """Cummins Generator sensor platform."""
-import asyncio
-import aiohttp
-import base64
 import logging
+import time
 from datetime import timedelta
-from homeassistant.components.sensor import SensorEntity, SensorDeviceClass
-from homeassistant.const import CONF_HOST
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.components.sensor import SensorEntity, SensorDeviceClass, SensorStateClass
+from homeassistant.const import CONF_HOST, MATCH_ALL, EntityCategory
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.update_coordinator import CoordinatorEntity, UpdateFailed
 from homeassistant.helpers.entity import DeviceInfo
+from .capture import BurstCapture
+from .client import CumminsGeneratorError
+from .commands import CumminsCommandQueue
+from .coordinator import CumminsCoordinator
+from .edges import CumminsEdgeDetector
+from .entity import CumminsChangeOnlyEntity
+from .longterm import CumminsLongTermStatistics
+from .registers import INDEX_FIELDS, decode_index, is_complete
+from .const import (
+    ACTIVE_STATUSES,
+    COMMAND_BURST_DURATION,
+    DEADBANDS,
+    CONF_BURST_SCAN_INTERVAL,
+    CONF_FAST_SCAN_INTERVAL,
+    CONF_IDLE_SCAN_INTERVAL,
+    CONF_SCAN_INTERVAL,
+    DEFAULT_BURST_SCAN_INTERVAL,
+    DEFAULT_FAST_SCAN_INTERVAL,
+    DEFAULT_IDLE_SCAN_INTERVAL,
+    DEFAULT_SCAN_INTERVAL,
+    DIAGNOSTIC_REFRESH_INTERVAL,
+    LCD_GENSET_RUNNING,
+    LONG_TERM_MAX_GAP,
+    LCD_UTILITY_PRESENT,
+    STATS_ENDPOINTS,
+)
 
 _LOGGER = logging.getLogger(__name__)
 SCAN_INTERVAL = timedelta(seconds=30)
@@ -15,84 +41,129 @@ DOMAIN = "cummins_generator"
 
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """Set up the Cummins Generator sensors."""
-    coordinator = hass.data["cummins_generator"][config_entry.entry_id]
+    hub = hass.data[DOMAIN][config_entry.entry_id]
+    coordinator = hub.coordinator
+    deadbands = {
+        sensor_type: config_entry.options.get(option, default)
+        for sensor_type, (option, default) in DEADBANDS.items()
+    }
     
     sensors = [
-        CumminsGeneratorSensor(coordinator, "status", "Status"),
-        CumminsGeneratorSensor(coordinator, "battery_voltage", "Battery Voltage", "V"),
-        CumminsGeneratorSensor(coordinator, "output_voltage", "Output Voltage", "V"),
-        CumminsGeneratorSensor(coordinator, "frequency", "Frequency", "Hz"),
-        CumminsGeneratorSensor(coordinator, "engine_hours", "Engine Hours", "h"),
-        CumminsGeneratorSensor(coordinator, "load_1", "Load Line 1", "%"),
-        CumminsGeneratorSensor(coordinator, "load_2", "Load Line 2", "%"),
+        CumminsGeneratorSensor(coordinator, field, deadbands.get(field.key, 0))
+        for field in INDEX_FIELDS
+        if field.name
     ]
+    sensors.append(
+        CumminsGeneratorClockDriftSensor(hub.clock)
+    )
+    sensors.extend(
+        CumminsGeneratorLatencySensor(coordinator, endpoint) for endpoint in STATS_ENDPOINTS
+    )
+    sensors.append(CumminsGeneratorEdgeLatencySensor(coordinator))
     async_add_entities(sensors)
 
-class CumminsGeneratorCoordinator(DataUpdateCoordinator):
+class CumminsGeneratorCoordinator(CumminsCoordinator):
     """Data coordinator for Cummins Generator."""
 
-    def __init__(self, hass, host, password):
+    def __init__(self, hass, client, options=None):
         """Initialize the coordinator."""
-        super().__init__(hass, _LOGGER, name="Cummins Generator", update_interval=SCAN_INTERVAL)
-        self.host = host
-        self.auth = base64.b64encode(f"admin:{password}".encode()).decode("ascii")
+        # Listeners are only called when the parsed data differs from the
+        # previous refresh (or availability changes)
+        super().__init__(
+            hass, _LOGGER, name="Cummins Generator", update_interval=SCAN_INTERVAL, always_update=False
+        )
+        self.client = client
+        self.host = client.host
+        options = options or {}
+        self.fast_interval = timedelta(seconds=options.get(CONF_FAST_SCAN_INTERVAL, DEFAULT_FAST_SCAN_INTERVAL))
+        self.normal_interval = timedelta(seconds=options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL))
+        self.idle_interval = timedelta(seconds=options.get(CONF_IDLE_SCAN_INTERVAL, DEFAULT_IDLE_SCAN_INTERVAL))
+        self.burst_interval = timedelta(seconds=options.get(CONF_BURST_SCAN_INTERVAL, DEFAULT_BURST_SCAN_INTERVAL))
+        self.update_interval = self.normal_interval
+        self._burst_until = 0.0
+        self.edges = CumminsEdgeDetector(hass, client.host)
+        self.capture = BurstCapture(hass, client, observer=self.edges.observe)
+        self.commands = CumminsCommandQueue(hass, client)
+        self.statistics = CumminsLongTermStatistics(
+            hass, client.host, max(LONG_TERM_MAX_GAP, 2 * self.idle_interval)
+        )
+
+    def start_burst(self):
+        """Poll at the burst rate for a while after a command."""
+        self._burst_until = time.monotonic() + COMMAND_BURST_DURATION
+        self.update_interval = self.burst_interval
+
+    def _select_interval(self, data):
+        """Pick the polling tier for the state the generator is in."""
+        if time.monotonic() < self._burst_until:
+            return self.burst_interval
+        if not data:
+            return self.normal_interval
+        lcd_status = data["lcd_status"]
+        if (
+            data.get("status") in ACTIVE_STATUSES
+            or lcd_status & LCD_GENSET_RUNNING
+            or not lcd_status & LCD_UTILITY_PRESENT
+        ):
+            return self.fast_interval
+        if data.get("status") == "Stopped":
+            return self.idle_interval
+        return self.normal_interval
 
     async def _async_update_data(self):
         """Fetch data from the generator."""
+        await self._async_wait_for_slot()
+        started = self.hass.loop.time()
         try:
-            async with aiohttp.ClientSession() as session:
-                headers = {"Authorization": f"Basic {self.auth}"}
-                async with session.get(f"http://{self.host}/index_data.html", headers=headers) as response:
-                    if response.status == 200:
-                        data = await response.text()
-                        return self._parse_data(data)
-                    else:
-                        raise UpdateFailed(f"Error fetching data: {response.status}")
+            data = await self.client.async_get_text("index_data.html")
+            received = self.hass.loop.time()
+            parsed = self._timed_parse("index_data.html", self._parse_data, data)
+        except CumminsGeneratorError as err:
+            raise UpdateFailed(str(err))
         except Exception as err:
             raise UpdateFailed(f"Error communicating with generator: {err}")
+        if not is_complete(parsed):
+            # A truncated page; keep the last full reading
+            raise UpdateFailed(
+                f"Incomplete index_data.html: {len(parsed)} of {len(INDEX_FIELDS)} fields"
+            )
+        # Edge events go out before anything else looks at the reading
+        self.edges.observe(parsed, started, received)
+        self.update_interval = self._select_interval(parsed)
+        self.capture.observe(parsed)
+        self.commands.observe(parsed, started)
+        self.statistics.add(parsed)
+        return parsed
+
+    def async_restore(self, data):
+        """Show a saved reading, unless it is missing fields."""
+        if is_complete(data):
+            super().async_restore(data)
+
+    async def async_shutdown(self):
+        """Stop a running capture and the command queue."""
+        await self.capture.async_cancel()
+        await self.commands.async_close()
+        await super().async_shutdown()
 
     def _parse_data(self, data):
         """Parse the generator data."""
-        lines = data.strip().split('\n')
-        if len(lines) < 18:
-            return {}
-        
-        status_map = {
-            0: "Stopped", 1: "Stopped", 2: "Starting", 3: "Starting",
-            4: "Running", 5: "Priming", 6: f"Fault {lines[14]}", 7: "Eng.Only",
-            8: "TestMode", 9: "Volt Adj", 20: "Config Mode", 21: "Cycle crank pause",
-            22: "Exercising", 23: "Engine Cooldown"
-        }
-        
-        return {
-            "status": status_map.get(int(lines[4]), f"Unknown {lines[4]}"),
-            "battery_voltage": float(lines[3]) / 10,
-            "output_voltage": int(lines[7]),
-            "frequency": int(lines[8]),
-            "engine_hours": round(int(lines[9]) / 6) / 10,
-            "load_1": int(lines[5]),
-            "load_2": int(lines[6]),
-            "lcd_status": int(lines[13]),
-        }
-
-class CumminsGeneratorSensor(SensorEntity):
+        return decode_index(data)
+
+class CumminsGeneratorSensor(CumminsChangeOnlyEntity, SensorEntity):
     """Representation of a Cummins Generator sensor."""
 
-    def __init__(self, coordinator, sensor_type, name, unit=None):
-        """Initialize the sensor."""
-        self.coordinator = coordinator
-        self.sensor_type = sensor_type
-        self._name = name
-        self._unit = unit
-        self._attr_unique_id = f"{coordinator.host}_{sensor_type}"
-        if sensor_type in ["battery_voltage", "output_voltage"]:
-            self._attr_device_class = SensorDeviceClass.VOLTAGE
-        elif sensor_type == "frequency":
-            self._attr_device_class = SensorDeviceClass.FREQUENCY
-        elif sensor_type == "engine_hours":
-            self._attr_device_class = SensorDeviceClass.DURATION
-        if sensor_type == "battery_voltage":
-            self._attr_suggested_display_precision = 1
+    def __init__(self, coordinator, field, deadband=0):
+        """Initialize the sensor from its index_data.html field."""
+        super().__init__(coordinator, deadband)
+        self.sensor_type = field.key
+        self._name = field.name
+        self._unit = field.unit
+        self._attr_unique_id = f"{coordinator.host}_{field.key}"
+        if field.device_class:
+            self._attr_device_class = SensorDeviceClass(field.device_class)
+        if field.precision is not None:
+            self._attr_suggested_display_precision = field.precision
 
     @property
     def name(self):
@@ -119,11 +190,178 @@ class CumminsGeneratorSensor(SensorEntity):
         """Return the unit of measurement."""
         return self._unit
 
+    def _publish_value(self):
+        """Compare on the reported value."""
+        return self.state
+
+
+class CumminsGeneratorClockDriftSensor(CoordinatorEntity, SensorEntity):
+    """How far the controller clock is ahead of (or behind) Home Assistant."""
+
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_native_unit_of_measurement = "s"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(self, coordinator):
+        """Initialize the sensor."""
+        super().__init__(coordinator, "timedate.html")
+        self._attr_unique_id = f"{coordinator.host}_clock_drift"
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        return "Cummins Generator Clock Drift"
+
+    @property
+    def device_info(self):
+        """Return device information."""
+        return DeviceInfo(
+            identifiers={(DOMAIN, self.coordinator.host)},
+            name="Cummins Generator",
+            manufacturer="Cummins",
+            model="Generator",
+        )
+
+    @property
+    def native_value(self):
+        """Return the measured offset in whole seconds."""
+        drift = self.coordinator.drift
+        return None if drift is None else round(drift)
+
+    @property
+    def extra_state_attributes(self):
+        """Return when the offset was last measured."""
+        if not self.coordinator.data:
+            return None
+        return {"measured_at": self.coordinator.data["measured_at"].isoformat()}
+
+
+class CumminsGeneratorLatencySensor(CoordinatorEntity, SensorEntity):
+    """Request latency for one controller endpoint.
+
+    The state is a moving average; the attributes carry the histogram,
+    failure counts, response size, parse time and last-success age.
+    """
+
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_native_unit_of_measurement = "ms"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_suggested_display_precision = 0
+    _unrecorded_attributes = frozenset({MATCH_ALL})
+
+    def __init__(self, coordinator, endpoint):
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self.endpoint = endpoint
+        self._attr_unique_id = f"{coordinator.host}_latency_{endpoint}"
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        return f"Cummins Generator Latency {self.endpoint}"
+
+    @property
+    def device_info(self):
+        """Return device information."""
+        return DeviceInfo(
+            identifiers={(DOMAIN, self.coordinator.host)},
+            name="Cummins Generator",
+            manufacturer="Cummins",
+            model="Generator",
+        )
+
+    @property
+    def available(self):
+        """Stay available while the controller is down; that is when it matters."""
+        return True
+
+    @property
+    def native_value(self):
+        """Return the average latency in milliseconds."""
+        latency = self.coordinator.client.stats.endpoint(self.endpoint).latency
+        return None if latency is None else round(latency * 1000, 1)
+
+    @property
+    def extra_state_attributes(self):
+        """Return the rest of the endpoint statistics."""
+        stats = self.coordinator.client.stats.endpoint(self.endpoint).as_dict()
+        del stats["latency_ms"]
+        return stats
+
+    async def async_added_to_hass(self):
+        """Write the statistics on a timer; polls of an unchanged reading do not notify."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_track_time_interval(self.hass, self._async_tick, DIAGNOSTIC_REFRESH_INTERVAL)
+        )
+
+    @callback
+    def _async_tick(self, _now):
+        """Write the current statistics."""
+        self.async_write_ha_state()
+
+
+class CumminsGeneratorEdgeLatencySensor(CoordinatorEntity, SensorEntity):
+    """Seconds from an estimated status change to its edge event.
+
+    The state is a moving average; the attributes carry the last and
+    slowest latency and the number of events fired.
+    """
+
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_native_unit_of_measurement = "s"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_suggested_display_precision = 1
+
+    def __init__(self, coordinator):
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._attr_unique_id = f"{coordinator.host}_edge_latency"
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        return "Cummins Generator Event Latency"
+
+    @property
+    def device_info(self):
+        """Return device information."""
+        return DeviceInfo(
+            identifiers={(DOMAIN, self.coordinator.host)},
+            name="Cummins Generator",
+            manufacturer="Cummins",
+            model="Generator",
+        )
+
     @property
     def available(self):
-        """Return if entity is available."""
-        return self.coordinator.last_update_success
+        """Keep the last measurement while the controller is down."""
+        return True
+
+    @property
+    def native_value(self):
+        """Return the average latency in seconds."""
+        return self.coordinator.edges.as_dict()["latency"]
+
+    @property
+    def extra_state_attributes(self):
+        """Return the last and slowest latency and the event count."""
+        stats = self.coordinator.edges.as_dict()
+        return {key: stats[key] for key in ("last_latency", "latency_max", "events")}
+
+    async def async_added_to_hass(self):
+        """Write the statistics on a timer; polls of an unchanged reading do not notify."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_track_time_interval(self.hass, self._async_tick, DIAGNOSTIC_REFRESH_INTERVAL)
+        )
 
-    async def async_update(self):
-        """Update the entity."""
-        await self.coordinator.async_request_refresh()
+    @callback
+    def _async_tick(self, _now):
+        """Write the current statistics."""
+        self.async_write_ha_state()
@@ -0,0 +1,93 @@
+"""Last good data of each coordinator, kept across restarts.
+
+On startup the entities are filled from the snapshot (and flagged stale)
+so setup does not wait on the controller; the first live read replaces
+it in the background.
+"""
+import logging
+from homeassistant.core import callback
+from homeassistant.helpers.storage import Store
+from .const import SNAPSHOT_SAVE_DELAY, SNAPSHOT_VERSION
+
+_LOGGER = logging.getLogger(__name__)
+DOMAIN = "cummins_generator"
+DATA_SNAPSHOT_STORES = "cummins_generator_snapshots"
+
+
+def _store(hass, entry_id):
+    """Return the store holding a config entry's snapshot.
+
+    One Store per entry is kept for the life of Home Assistant, so a
+    reload or a removal sees the delayed save of the previous setup.
+    """
+    stores = hass.data.setdefault(DATA_SNAPSHOT_STORES, {})
+    store = stores.get(entry_id)
+    if store is None:
+        store = stores[entry_id] = Store(hass, SNAPSHOT_VERSION, f"{DOMAIN}.{entry_id}")
+    return store
+
+
+async def async_remove_snapshot(hass, entry_id):
+    """Delete the snapshot of a removed config entry, and any pending save."""
+    await _store(hass, entry_id).async_remove()
+    hass.data[DATA_SNAPSHOT_STORES].pop(entry_id, None)
+
+
+class CumminsSnapshot:
+    """Saves and restores the data of a config entry's coordinators.
+
+    Saves are delayed and coalesced: a change schedules one write
+    SNAPSHOT_SAVE_DELAY seconds later. A pending write is made at once
+    when the entry is unloaded, and Home Assistant makes it when it stops.
+    """
+
+    def __init__(self, hass, entry_id):
+        """Initialize the snapshot."""
+        self._store = _store(hass, entry_id)
+        self._coordinators = {}
+        self._saved = {}
+        self._save_pending = False
+
+    async def async_load(self):
+        """Read the saved snapshot, if any."""
+        self._saved = await self._store.async_load() or {}
+
+    def restore(self, name, coordinator):
+        """Fill a coordinator from the snapshot; return False if there is none."""
+        data = self._saved.get(name)
+        if data is None:
+            return False
+        _LOGGER.debug("%s: restoring %s from snapshot", coordinator.host, name)
+        coordinator.async_restore(data)
+        return True
+
+    def track(self, name, coordinator):
+        """Save a coordinator's data whenever it changes; return the unsubscriber.
+
+        The coordinator stays in the snapshot until ``async_unload``, so
+        the final write still has its data.
+        """
+        self._coordinators[name] = coordinator
+        return coordinator.async_add_listener(self._async_schedule_save)
+
+    async def async_unload(self):
+        """Write a pending snapshot now, so nothing is written after unload."""
+        if self._save_pending:
+            await self._store.async_save(self._data_to_save())
+        self._coordinators.clear()
+
+    @callback
+    def _async_schedule_save(self):
+        """Schedule a write unless one is already pending."""
+        if not self._save_pending:
+            self._save_pending = True
+            self._store.async_delay_save(self._data_to_save, SNAPSHOT_SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self):
+        """Return the current data of every coordinator with live data."""
+        self._save_pending = False
+        for name, coordinator in self._coordinators.items():
+            if coordinator.data is not None and coordinator.last_update_success and not coordinator.stale:
+                self._saved[name] = coordinator.data
+        return self._saved
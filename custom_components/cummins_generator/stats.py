@@ -0,0 +1,135 @@
+"""Per-endpoint request statistics for a controller.
+
+Recording is a handful of arithmetic operations and one bisect per
+request, so it is always on. Nothing here imports Home Assistant.
+"""
+import time
+from bisect import bisect_left
+
+# Upper bounds of the latency histogram buckets, in seconds; the last
+# bucket counts everything slower
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Weight of the newest sample in the moving averages
+EWMA_ALPHA = 0.2
+
+
+def _ewma(average, sample):
+    """Fold a sample into an exponentially weighted moving average."""
+    return sample if average is None else average + EWMA_ALPHA * (sample - average)
+
+
+class EndpointStats:
+    """Latency, size, parse time and failures for one page or CGI."""
+
+    __slots__ = (
+        "buckets", "requests", "failures", "latency", "latency_max",
+        "last_size", "bytes", "parse_time", "last_success", "last_failure",
+        "last_error", "cut_short",
+    )
+
+    def __init__(self):
+        """Initialize empty statistics."""
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.requests = 0
+        self.failures = 0
+        self.latency = None
+        self.latency_max = 0.0
+        self.last_size = None
+        self.bytes = 0
+        self.parse_time = None
+        self.last_success = None
+        self.last_failure = None
+        self.last_error = None
+        self.cut_short = 0
+
+    def record_success(self, latency):
+        """Record a completed request."""
+        self.requests += 1
+        self.buckets[bisect_left(LATENCY_BUCKETS, latency)] += 1
+        self.latency = _ewma(self.latency, latency)
+        if latency > self.latency_max:
+            self.latency_max = latency
+        self.last_success = time.monotonic()
+
+    def record_failure(self, err):
+        """Record a request that raised or returned an error status."""
+        self.requests += 1
+        self.failures += 1
+        self.last_failure = time.monotonic()
+        self.last_error = str(err) or type(err).__name__
+
+    def record_size(self, size, cut_short=False):
+        """Record the size of a response body (or the part of it read)."""
+        self.last_size = size
+        self.bytes += size
+        if cut_short:
+            self.cut_short += 1
+
+    def record_parse(self, seconds):
+        """Record the time spent parsing a response."""
+        self.parse_time = _ewma(self.parse_time, seconds)
+
+    def percentile(self, fraction):
+        """Return the bucket bound below which ``fraction`` of requests fell.
+
+        The bound is capped at the slowest request seen, so a quiet
+        endpoint does not report a percentile above its maximum.
+        """
+        total = sum(self.buckets)
+        if not total:
+            return None
+        target = fraction * total
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.buckets):
+            seen += count
+            if seen >= target:
+                return min(bound, self.latency_max)
+        return self.latency_max
+
+    def as_dict(self):
+        """Return the statistics with times in milliseconds."""
+        now = time.monotonic()
+
+        def ms(seconds):
+            return None if seconds is None else round(seconds * 1000, 1)
+
+        def age(moment):
+            return None if moment is None else round(now - moment, 1)
+
+        labels = [f"<={ms(bound):g}ms" for bound in LATENCY_BUCKETS] + [f">{ms(LATENCY_BUCKETS[-1]):g}ms"]
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "latency_ms": ms(self.latency),
+            "latency_p50_ms": ms(self.percentile(0.5)),
+            "latency_p95_ms": ms(self.percentile(0.95)),
+            "latency_max_ms": ms(self.latency_max),
+            "latency_histogram": dict(zip(labels, self.buckets)),
+            "parse_ms": None if self.parse_time is None else round(self.parse_time * 1000, 3),
+            "last_size": self.last_size,
+            "bytes": self.bytes,
+            "cut_short": self.cut_short,
+            "last_success_age": age(self.last_success),
+            "last_failure_age": age(self.last_failure),
+            "last_error": self.last_error,
+        }
+
+
+class ControllerStats:
+    """Statistics for every endpoint of one controller."""
+
+    def __init__(self):
+        """Initialize the statistics."""
+        self.endpoints = {}
+
+    def endpoint(self, path):
+        """Return the statistics for a path, ignoring any query string."""
+        name = path.partition("?")[0]
+        stats = self.endpoints.get(name)
+        if stats is None:
+            stats = self.endpoints[name] = EndpointStats()
+        return stats
+
+    def as_dict(self):
+        """Return the statistics of every endpoint seen so far."""
+        return {name: stats.as_dict() for name, stats in sorted(self.endpoints.items())}
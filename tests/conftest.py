@@ -0,0 +1,52 @@
+"""Fixtures for the Cummins Generator tests.
+
+The tests run the integration against tools/simulator.py served on
+localhost, and need pytest-homeassistant-custom-component installed.
+"""
+import pathlib
+import sys
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "tools"))
+
+from simulator import Simulator  # noqa: E402
+
+pytest_plugins = ["pytest_homeassistant_custom_component"]
+DOMAIN = "cummins_generator"
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(hass, enable_custom_integrations, socket_enabled):
+    """Load the integration from this repository and allow localhost."""
+    # The plugin's testing config has its own custom_components package
+    import custom_components
+
+    path = str(ROOT / "custom_components")
+    if path not in custom_components.__path__:
+        custom_components.__path__.append(path)
+    yield
+
+
+@pytest.fixture
+async def simulator(aiohttp_server):
+    """Serve one simulated controller; return it and its host."""
+    sim = Simulator(seed=0)
+    server = await aiohttp_server(sim.app)
+    return sim, f"127.0.0.1:{server.port}"
+
+
+async def async_setup_entry(hass, host, options=None):
+    """Add and set up a config entry for a controller."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={"host": host, "password": "cummins"},
+        options=options or {},
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    return entry
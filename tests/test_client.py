@@ -0,0 +1,125 @@
+"""Pages are read correctly, and a failing controller is backed off from."""
+import asyncio
+import time
+
+import pytest
+
+from custom_components.cummins_generator.client import (
+    CumminsGeneratorClient,
+    CumminsGeneratorError,
+    CumminsGeneratorUnavailable,
+)
+from custom_components.cummins_generator.const import BREAKER_BACKOFF_INITIAL
+from custom_components.cummins_generator.parser import PAGE_TOKENS, parse_exercise, parse_loads, parse_timedate
+from simulator import Faults, Simulator
+
+PARSERS = {
+    "loads.html": parse_loads,
+    "exercise.html": parse_exercise,
+    "timedate.html": parse_timedate,
+}
+
+
+@pytest.mark.parametrize("chunk_size", [0, 64])
+@pytest.mark.parametrize("charset", ["utf-8", None])
+async def test_streamed_pages(aiohttp_server, charset, chunk_size):
+    """Streamed pages decode with or without a charset, whole or in chunks."""
+    sim = Simulator(charset=charset, faults=Faults(chunk_size=chunk_size))
+    server = await aiohttp_server(sim.app)
+    client = CumminsGeneratorClient(f"127.0.0.1:{server.port}", "cummins")
+    try:
+        for path, parse in PARSERS.items():
+            streamed = parse(await client.async_get_text(path, PAGE_TOKENS[path]))
+            if path == "timedate.html":
+                # The simulated clock ticks between reads
+                assert streamed.complete
+            else:
+                assert streamed == parse(await client.async_get_text(path)), path
+    finally:
+        await client.async_close()
+
+
+def backoff(breaker):
+    """Return the seconds left until the breaker lets a probe through."""
+    return round(breaker.retry_at - time.monotonic())
+
+
+async def test_breaker(aiohttp_server):
+    """Queued requests fail at once when the breaker opens; only probes extend it."""
+    sim = Simulator(seed=0, faults=Faults(latency=0.2, error_rate=1.0))
+    server = await aiohttp_server(sim.app)
+    client = CumminsGeneratorClient(f"127.0.0.1:{server.port}", "cummins", max_connections=2)
+    breaker = client.breaker
+    try:
+        # Two at a time: the third failure opens the breaker while the
+        # fourth is still in flight, and the other four never leave
+        results = await asyncio.gather(
+            *(client.async_get_text("loads_data.html") for _ in range(8)), return_exceptions=True
+        )
+        assert all(isinstance(result, CumminsGeneratorError) for result in results)
+        assert sum(isinstance(result, CumminsGeneratorUnavailable) for result in results) == 4
+        assert sim.stats()["requests"] == {"loads_data.html": 4}
+        assert breaker.state == "open"
+        assert breaker.failures == 4
+        assert backoff(breaker) == BREAKER_BACKOFF_INITIAL
+
+        # A failed probe reads only the status page and doubles the backoff
+        breaker.retry_at = time.monotonic()
+        with pytest.raises(CumminsGeneratorError):
+            await client.async_get_text("loads_data.html")
+        assert sim.stats()["requests"] == {"loads_data.html": 4, "index_data.html": 1}
+        assert backoff(breaker) == 2 * BREAKER_BACKOFF_INITIAL
+
+        # A successful probe closes it, and the page is read after it
+        sim.faults = Faults()
+        breaker.retry_at = time.monotonic()
+        assert await client.async_get_text("loads_data.html")
+        assert sim.stats()["requests"] == {"loads_data.html": 5, "index_data.html": 2}
+        assert breaker.state == "closed"
+        assert breaker.failures == 0
+    finally:
+        await client.async_close()
+
+
+async def test_write_coalescer(aiohttp_server):
+    """Writes in one window share a request; a conflicting value flushes the batch first."""
+    sim = Simulator(seed=0)
+    server = await aiohttp_server(sim.app)
+    client = CumminsGeneratorClient(f"127.0.0.1:{server.port}", "cummins")
+    try:
+        await asyncio.gather(
+            client.async_write_registers({391: 1}),
+            client.async_write_registers({392: 0}),
+            client.async_write_registers({391: 1}),
+        )
+        assert sim.writes == ["@391=1&@392=0"]
+
+        # Both values of a command register reach the controller, in order
+        sim.reset_stats()
+        await asyncio.gather(
+            client.async_write_registers({426: 3}),
+            client.async_write_registers({426: 6}),
+        )
+        assert sim.writes == ["@426=3", "@426=6"]
+        assert sim.state.loads == [1, 0]
+
+        # Everyone waiting on a failed batch sees the error
+        sim.faults = Faults(error_rate=1.0)
+        results = await asyncio.gather(
+            client.async_write_registers({242: 2}),
+            client.async_write_registers({385: 0}),
+            return_exceptions=True,
+        )
+        assert all(isinstance(result, CumminsGeneratorError) for result in results)
+
+        # Closing drops a batch that was not sent yet
+        sim.faults = Faults()
+        sim.reset_stats()
+        pending = asyncio.ensure_future(client.async_write_registers({385: 1}))
+        await asyncio.sleep(0)
+        await client.async_close()
+        with pytest.raises(asyncio.CancelledError):
+            await pending
+        assert sim.writes == []
+    finally:
+        await client.async_close()
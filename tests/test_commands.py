@@ -0,0 +1,123 @@
+"""Commands are written in order, once, and their outcome is reported."""
+import asyncio
+from datetime import timedelta
+
+import pytest
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_capture_events, async_fire_time_changed
+
+from conftest import DOMAIN, async_setup_entry
+from custom_components.cummins_generator.button import BUTTON_CONFIRMS
+from custom_components.cummins_generator.client import CumminsGeneratorError
+from custom_components.cummins_generator.commands import EVENT_COMMAND
+from custom_components.cummins_generator.const import COMMAND_CONFIRM_TIMEOUT
+from simulator import STARTING, Faults
+
+
+async def async_setup_hub(hass, simulator):
+    """Set up an entry whose polls are not paced; return the hub."""
+    _, host = simulator
+    entry = await async_setup_entry(hass, host)
+    hub = hass.data[DOMAIN][entry.entry_id]
+    for _, coordinator in hub.coordinators():
+        hub.fleet.unregister_poller(coordinator)
+    return hub
+
+
+def outcomes(events):
+    """Return (command, outcome) for each command event."""
+    return [(event.data["command"], event.data["outcome"]) for event in events]
+
+
+async def test_duplicates_join_and_writes_merge(hass, simulator):
+    """A repeated command is written once, merged with the other queued writes."""
+    sim, _ = simulator
+    hub = await async_setup_hub(hass, simulator)
+    events = async_capture_events(hass, EVENT_COMMAND)
+    sim.reset_stats()
+
+    await asyncio.gather(
+        hub.commands.async_submit("sync_time", {402: 10, 403: 30}),
+        hub.commands.async_submit("disable_standby", {385: 0}),
+        hub.commands.async_submit("sync_time", {402: 10, 403: 30}),
+    )
+    await hass.async_block_till_done()
+
+    assert sim.writes == ["@402=10&@403=30&@385=0"]
+    assert not sim.state.standby
+    assert outcomes(events) == [("sync_time", "sent"), ("disable_standby", "sent")]
+    assert events[0].data["duplicates"] == 1
+    assert await hass.config_entries.async_unload(hub.entry.entry_id)
+
+
+async def test_confirmed_and_superseded(hass, simulator):
+    """A later write to the same register supersedes; a status poll confirms."""
+    sim, _ = simulator
+    hub = await async_setup_hub(hass, simulator)
+    events = async_capture_events(hass, EVENT_COMMAND)
+    sim.reset_stats()
+
+    await asyncio.gather(
+        hub.commands.async_submit("stop", {242: 1}, BUTTON_CONFIRMS["stop"]),
+        hub.commands.async_submit("start", {242: 2}, BUTTON_CONFIRMS["start"]),
+    )
+    # Conflicting values for one register go out as separate requests, in order
+    assert sim.writes == ["@242=1", "@242=2"]
+    assert outcomes(events) == [("stop", "superseded")]
+
+    assert sim.state.status == STARTING
+    await hub.coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert outcomes(events) == [("stop", "superseded"), ("start", "confirmed")]
+    assert events[-1].data["latency"] >= events[-1].data["write_latency"]
+    assert await hass.config_entries.async_unload(hub.entry.entry_id)
+
+
+async def test_unconfirmed_command_times_out(hass, simulator):
+    """A command whose status never shows up times out."""
+    hub = await async_setup_hub(hass, simulator)
+    events = async_capture_events(hass, EVENT_COMMAND)
+
+    await hub.commands.async_submit("start", {242: 2}, lambda data: False)
+    await hub.coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert outcomes(events) == []
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=COMMAND_CONFIRM_TIMEOUT))
+    await hass.async_block_till_done()
+    assert outcomes(events) == [("start", "timeout")]
+    assert await hass.config_entries.async_unload(hub.entry.entry_id)
+
+
+async def test_failed_write(hass, simulator):
+    """A write the controller rejects fails its command."""
+    sim, _ = simulator
+    hub = await async_setup_hub(hass, simulator)
+    events = async_capture_events(hass, EVENT_COMMAND)
+    sim.faults = Faults(error_rate=1.0, paths=["wr_logical.cgi"])
+
+    with pytest.raises(CumminsGeneratorError):
+        await hub.commands.async_submit("start", {242: 2}, BUTTON_CONFIRMS["start"])
+    await hass.async_block_till_done()
+    assert outcomes(events) == [("start", "failed")]
+    assert "500" in events[0].data["error"]
+    assert await hass.config_entries.async_unload(hub.entry.entry_id)
+
+
+async def test_close_cancels_unwritten_and_unconfirmed(hass, simulator):
+    """Closing fails the commands still queued and drops those awaiting confirmation."""
+    sim, _ = simulator
+    hub = await async_setup_hub(hass, simulator)
+    events = async_capture_events(hass, EVENT_COMMAND)
+
+    await hub.commands.async_submit("start", {242: 2}, lambda data: False)
+    sim.faults = Faults(latency=5, paths=["wr_logical.cgi"])
+    queued = hass.async_create_task(hub.commands.async_submit("disable_standby", {385: 0}))
+    await asyncio.sleep(0.1)
+    assert not queued.done()
+
+    await hub.commands.async_close()
+    with pytest.raises(CumminsGeneratorError, match="command queue closed"):
+        await queued
+    assert sorted(outcomes(events)) == [("disable_standby", "cancelled"), ("start", "cancelled")]
+    assert await hass.config_entries.async_unload(hub.entry.entry_id)
@@ -0,0 +1,29 @@
+"""The options flow opens and reloads the entry with the new polling tiers."""
+from homeassistant.data_entry_flow import FlowResultType
+
+from conftest import DOMAIN, async_setup_entry
+from custom_components.cummins_generator.const import CONF_FAST_SCAN_INTERVAL, CONF_SCAN_INTERVAL
+
+
+async def test_options_flow(hass, simulator):
+    """Configure shows the current options and saves the new ones."""
+    _, host = simulator
+    entry = await async_setup_entry(hass, host, {CONF_SCAN_INTERVAL: 45})
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    assert result["type"] == FlowResultType.FORM
+    assert result["step_id"] == "init"
+    defaults = {str(key): key.default() for key in result["data_schema"].schema}
+    assert defaults[CONF_SCAN_INTERVAL] == 45
+
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], {**defaults, CONF_FAST_SCAN_INTERVAL: 3}
+    )
+    assert result["type"] == FlowResultType.CREATE_ENTRY
+    await hass.async_block_till_done()
+    assert entry.options[CONF_FAST_SCAN_INTERVAL] == 3
+    assert entry.options[CONF_SCAN_INTERVAL] == 45
+    # The update listener reloaded the entry with the new tiers
+    hub = hass.data[DOMAIN][entry.entry_id]
+    assert hub.coordinator.fast_interval.total_seconds() == 3
+    assert await hass.config_entries.async_unload(entry.entry_id)
@@ -0,0 +1,98 @@
+"""Every entity is fed by its coordinator, which reads each page once per refresh."""
+from datetime import timedelta
+
+from homeassistant.helpers import entity_registry as er
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from conftest import DOMAIN, async_setup_entry
+from simulator import Faults
+
+REFRESHES = 3
+
+
+async def test_one_request_per_page_per_refresh(hass, simulator):
+    """Refreshes read each page once, however many entities show it."""
+    sim, host = simulator
+    entry = await async_setup_entry(hass, host)
+    hub = hass.data[DOMAIN][entry.entry_id]
+    # Pacing is covered by test_fleet.py; here refreshes should not wait
+    for _, coordinator in hub.coordinators():
+        hub.fleet.unregister_poller(coordinator)
+
+    entities = er.async_entries_for_config_entry(er.async_get(hass), entry.entry_id)
+    assert len(entities) > 20
+    for platform in hass.data["entity_components"].values():
+        for entity in platform.entities:
+            if entity.platform.config_entry is entry:
+                assert not entity.should_poll, entity.entity_id
+
+    sim.reset_stats()
+    for refresh in range(REFRESHES):
+        sim.state.battery = 120 + 10 * refresh
+        await hub.coordinator.async_refresh()
+        await hub.loads.async_refresh()
+        await hass.async_block_till_done()
+        state = hass.states.get("sensor.cummins_generator_battery_voltage")
+        assert float(state.state) == 12 + refresh
+
+    assert sim.stats()["requests"] == {
+        "index_data.html": REFRESHES,
+        "loads_data.html": REFRESHES,
+    }
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_truncated_status_page_keeps_last_reading(hass, simulator):
+    """A short index_data.html fails the poll instead of reading as zeros."""
+    sim, host = simulator
+    entry = await async_setup_entry(hass, host)
+    hub = hass.data[DOMAIN][entry.entry_id]
+    coordinator = hub.coordinator
+    reading = coordinator.data
+    interval = coordinator.update_interval
+    assert hass.states.get("binary_sensor.cummins_generator_utility_present").state == "on"
+
+    sim.faults = Faults(truncate_rate=1.0, truncate_lines=10, paths=["index_data.html"])
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert not coordinator.last_update_success
+    assert coordinator.data == reading
+    assert coordinator.update_interval == interval
+    assert not coordinator.capture.active
+    assert hass.states.get("binary_sensor.cummins_generator_utility_present").state != "off"
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_optimistic_update_is_verified_or_rolled_back(hass, simulator):
+    """The expected value shows at once; the verification read keeps or undoes it."""
+    sim, host = simulator
+    entry = await async_setup_entry(hass, host)
+    hub = hass.data[DOMAIN][entry.entry_id]
+    coordinator = hub.coordinator
+    for _, poller in hub.coordinators():
+        hub.fleet.unregister_poller(poller)
+    status = "sensor.cummins_generator_status"
+    assert hass.states.get(status).state == "Stopped"
+
+    # The controller never started: the verification read replaces the guess
+    coordinator.async_apply_optimistic({"status": "Starting"}, verify_delay=1)
+    assert hass.states.get(status).state == "Starting"
+    sim.state.battery = 125
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=1))
+    await hass.async_block_till_done()
+    assert coordinator.data["status"] == "Stopped"
+    assert coordinator.data["battery_voltage"] == 12.5
+    assert hass.states.get(status).state == "Stopped"
+
+    # The verification read fails: the values from before the write come back
+    before = coordinator.data
+    coordinator.async_apply_optimistic({"status": "Starting"}, verify_delay=1)
+    coordinator.async_apply_optimistic({"battery_voltage": 13.0}, verify_delay=1)
+    sim.faults = Faults(error_rate=1.0, paths=["index_data.html"])
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=1))
+    await hass.async_block_till_done()
+    assert not coordinator.last_update_success
+    assert coordinator.data is before
+    assert await hass.config_entries.async_unload(entry.entry_id)
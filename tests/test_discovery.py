@@ -0,0 +1,37 @@
+"""Subnets are sized before any of their hosts are listed, and probed by URL."""
+import pytest
+from yarl import URL
+
+from custom_components.cummins_generator.discovery import subnet_hosts
+
+
+def test_subnet_hosts():
+    """A /24 lists its 254 hosts, with the port if not 80."""
+    hosts = subnet_hosts("192.168.1.0/24")
+    assert len(hosts) == 254
+    assert hosts[0] == "192.168.1.1"
+    assert subnet_hosts("192.168.1.7/30", 8080) == ["192.168.1.5:8080", "192.168.1.6:8080"]
+
+
+def test_subnet_hosts_ipv6():
+    """IPv6 hosts are bracketed so the port cannot be read as part of the address."""
+    assert subnet_hosts("2001:db8::/126") == ["[2001:db8::1]", "[2001:db8::2]", "[2001:db8::3]"]
+    assert subnet_hosts("2001:db8::/127", 8080) == ["[2001:db8::]:8080", "[2001:db8::1]:8080"]
+    # The probe's URL reads back the address and port
+    url = URL(f"http://{subnet_hosts('2001:db8::1:0/127', 8080)[1]}/index_data.html")
+    assert (url.host, url.port) == ("2001:db8::1:1", 8080)
+    url = URL(f"http://{subnet_hosts('::1/128')[0]}/index_data.html")
+    assert (url.host, url.port) == ("::1", 80)
+
+
+@pytest.mark.parametrize("subnet", ["10.0.0.0/21", "10.0.0.0/8", "0.0.0.0/0", "2001:db8::/64"])
+def test_subnet_too_large(subnet):
+    """Subnets over the limit are refused without enumerating them."""
+    assert subnet_hosts(subnet) is None
+
+
+def test_invalid_subnet():
+    """Anything that is not a network raises ValueError."""
+    with pytest.raises(ValueError):
+        subnet_hosts("not a subnet")
+
@@ -0,0 +1,88 @@
+"""Many controllers share the fleet's schedule instead of polling in lockstep."""
+import asyncio
+from collections import Counter
+
+from custom_components.cummins_generator.client import CumminsGeneratorClient
+from custom_components.cummins_generator.const import (
+    CONF_BURST_SCAN_INTERVAL,
+    CONF_FAST_SCAN_INTERVAL,
+    CONF_IDLE_SCAN_INTERVAL,
+    CONF_SCAN_INTERVAL,
+    FLEET_MAX_IN_FLIGHT,
+)
+from custom_components.cummins_generator.fleet import async_get_fleet
+from custom_components.cummins_generator.sensor import CumminsGeneratorCoordinator
+from simulator import Simulator
+
+CONTROLLERS = 200
+CYCLES = 2
+INTERVAL = 2
+OPTIONS = {
+    option: INTERVAL
+    for option in (CONF_SCAN_INTERVAL, CONF_FAST_SCAN_INTERVAL, CONF_IDLE_SCAN_INTERVAL, CONF_BURST_SCAN_INTERVAL)
+}
+
+
+class TimedSimulator(Simulator):
+    """Simulator that notes when each request arrives."""
+
+    def __init__(self, *args, **kwargs):
+        """Initialize the simulator."""
+        super().__init__(*args, **kwargs)
+        self.arrivals = []
+
+    async def _handle_page(self, request):
+        self.arrivals.append(asyncio.get_running_loop().time())
+        return await super()._handle_page(request)
+
+
+async def test_fleet_spreads_polls(hass, aiohttp_server):
+    """200 controllers due at the same moment are polled evenly across the interval."""
+    # One simulator behind every port, so peak_active is fleet-wide
+    sim = TimedSimulator(seed=0)
+    fleet = async_get_fleet(hass)
+    coordinators = []
+    for _ in range(CONTROLLERS):
+        server = await aiohttp_server(sim.app)
+        client = CumminsGeneratorClient(f"127.0.0.1:{server.port}", "cummins", fleet=fleet)
+        fleet.register_client(client)
+        coordinator = CumminsGeneratorCoordinator(hass, client, OPTIONS)
+        fleet.register_poller(coordinator)
+        coordinators.append(coordinator)
+
+    # The first read is not paced
+    await asyncio.gather(*(coordinator.async_refresh() for coordinator in coordinators))
+    assert all(coordinator.last_update_success for coordinator in coordinators)
+    sim.reset_stats()
+    sim.arrivals.clear()
+
+    async def poll(coordinator):
+        # Like the coordinator's own timer: the next poll is due one
+        # interval after the last one finished
+        for _ in range(CYCLES):
+            await asyncio.sleep(INTERVAL)
+            await coordinator.async_refresh()
+
+    start = asyncio.get_running_loop().time()
+    try:
+        await asyncio.gather(*(poll(coordinator) for coordinator in coordinators))
+    finally:
+        for coordinator in coordinators:
+            fleet.unregister_poller(coordinator)
+            await coordinator.async_shutdown()
+            await fleet.async_unregister_client(coordinator.client)
+
+    assert sim.stats()["requests"] == {"index_data.html": CONTROLLERS * CYCLES}
+    assert all(coordinator.last_update_success for coordinator in coordinators)
+    # Without the fleet all 200 would be in flight up to the global cap
+    assert sim.stats()["peak_active"] <= 4 < FLEET_MAX_IN_FLIGHT
+
+    # The first cycle is spread over most of the interval. A slot that
+    # fires late on a busy machine lets the next few catch up, so a tenth
+    # of a second may hold up to three times its share, well short of
+    # the whole fleet at once
+    first = sorted(sim.arrivals)[:CONTROLLERS]
+    assert first[-1] - first[0] >= 0.8 * INTERVAL
+    buckets = Counter(int((arrival - start) * 10) for arrival in sim.arrivals)
+    share = CONTROLLERS / (INTERVAL * 10)
+    assert max(buckets.values()) <= 3 * share
@@ -0,0 +1,36 @@
+"""Diagnostic sensors keep up with polls that leave the reading unchanged."""
+from homeassistant.helpers import entity_registry as er
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from conftest import DOMAIN, async_setup_entry
+from custom_components.cummins_generator.const import DIAGNOSTIC_REFRESH_INTERVAL
+
+POLLS = 6
+LATENCY_SENSOR = "sensor.cummins_generator_latency_index_data_html"
+
+
+async def test_latency_attributes_advance_on_unchanged_data(hass, simulator):
+    """The request count moves on although no listener is notified."""
+    sim, host = simulator
+    # The latency sensors are disabled by default
+    er.async_get(hass).async_get_or_create(
+        "sensor", DOMAIN, f"{host}_latency_index_data.html", suggested_object_id=LATENCY_SENSOR[7:]
+    )
+    entry = await async_setup_entry(hass, host)
+    hub = hass.data[DOMAIN][entry.entry_id]
+    for _, coordinator in hub.coordinators():
+        hub.fleet.unregister_poller(coordinator)
+    requests = hass.states.get(LATENCY_SENSOR).attributes["requests"]
+
+    reading = hub.coordinator.data
+    for _ in range(POLLS):
+        await hub.coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert hub.coordinator.data == reading
+    assert hass.states.get(LATENCY_SENSOR).attributes["requests"] == requests
+
+    async_fire_time_changed(hass, dt_util.utcnow() + DIAGNOSTIC_REFRESH_INTERVAL)
+    await hass.async_block_till_done()
+    assert hass.states.get(LATENCY_SENSOR).attributes["requests"] == requests + POLLS
+    assert await hass.config_entries.async_unload(entry.entry_id)
@@ -0,0 +1,47 @@
+"""The snapshot is written on unload and stays deleted once the entry is removed."""
+from datetime import timedelta
+
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.cummins_generator.const import SNAPSHOT_SAVE_DELAY
+from conftest import DOMAIN, async_setup_entry
+
+
+async def test_pending_snapshot_is_written_on_unload(hass, simulator, hass_storage):
+    """Unloading writes the delayed snapshot; removal deletes it for good."""
+    sim, host = simulator
+    entry = await async_setup_entry(hass, host)
+    hub = hass.data[DOMAIN][entry.entry_id]
+    key = f"{DOMAIN}.{entry.entry_id}"
+
+    sim.state.battery = 125
+    await hub.coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert key not in hass_storage
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+    assert hass_storage[key]["data"]["status"]["battery_voltage"] == 12.5
+
+    await hass.config_entries.async_remove(entry.entry_id)
+    await hass.async_block_till_done()
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=SNAPSHOT_SAVE_DELAY + 1))
+    await hass.async_block_till_done()
+    assert key not in hass_storage
+
+
+async def test_removal_cancels_a_pending_snapshot(hass, simulator, hass_storage):
+    """Removing a loaded entry leaves no snapshot behind."""
+    sim, host = simulator
+    entry = await async_setup_entry(hass, host)
+    hub = hass.data[DOMAIN][entry.entry_id]
+    key = f"{DOMAIN}.{entry.entry_id}"
+
+    sim.state.battery = 125
+    await hub.coordinator.async_refresh()
+    await hass.config_entries.async_remove(entry.entry_id)
+    await hass.async_block_till_done()
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=SNAPSHOT_SAVE_DELAY + 1))
+    await hass.async_block_till_done()
+    assert key not in hass_storage
@@ -0,0 +1,153 @@
+"""Replay a recorded controller's traffic offline.
+
+Recordings are written by the integration when **Record raw controller
+traffic** is switched on (see recording.py). Two modes:
+
+    python tools/replay.py recording.jsonl
+        Feed every recorded body to its page parser and report, per page,
+        how many bodies were parsed, the parse time, the bodies that
+        raised, and the ones that came back empty or incomplete.
+        Only needs aiohttp.
+
+    python tools/replay.py recording.jsonl --coordinators [--realtime]
+        Run the status, load and clock coordinators against the recording,
+        as fast as possible or at the recorded pace, and print what each
+        one ended up with. Needs Home Assistant installed.
+
+Add ``--show`` to print the time and body of every problem body, ready to
+paste into a fixture.
+"""
+import argparse
+import asyncio
+import importlib
+import pathlib
+import statistics
+import sys
+import tempfile
+import time
+import types
+from datetime import datetime
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+COMPONENT = ROOT / "custom_components" / "cummins_generator"
+PACKAGE = "cummins_generator_replay"
+
+
+def load_module(name):
+    """Import a module of the integration without running its __init__.py."""
+    if PACKAGE not in sys.modules:
+        package = types.ModuleType(PACKAGE)
+        package.__path__ = [str(COMPONENT)]
+        sys.modules[PACKAGE] = package
+    return importlib.import_module(f"{PACKAGE}.{name}")
+
+
+def page_parsers():
+    """Return each page's parser and a check for a suspicious result."""
+    parser = load_module("parser")
+    registers = load_module("registers")
+    return {
+        "index_data.html": (registers.decode_index, lambda data: len(data) < len(registers.INDEX_FIELDS)),
+        "loads.html": (parser.parse_loads, lambda page: False),
+        "exercise.html": (parser.parse_exercise, lambda page: False),
+        "timedate.html": (parser.parse_timedate, lambda page: not page.complete),
+        "loads_data.html": (lambda body: body.strip().split("\n"), lambda lines: len(lines) < 3),
+    }
+
+
+def profile_parsers(entries, show):
+    """Parse every recorded body and print a summary per page."""
+    parsers = page_parsers()
+    results = {}
+    for entry in entries:
+        if entry["op"] != "get" or entry.get("body") is None or entry["path"] not in parsers:
+            continue
+        parse, suspicious = parsers[entry["path"]]
+        result = results.setdefault(entry["path"], {"times": [], "errors": [], "suspicious": []})
+        start = time.perf_counter()
+        try:
+            parsed = parse(entry["body"])
+        except Exception as err:
+            result["errors"].append((entry, err))
+            continue
+        result["times"].append(time.perf_counter() - start)
+        if suspicious(parsed):
+            result["suspicious"].append((entry, parsed))
+
+    print(f"{'page':<18}{'bodies':>8}{'median us':>11}{'max us':>9}{'errors':>8}{'suspicious':>12}")
+    for path, result in sorted(results.items()):
+        times = result["times"] or [0.0]
+        count = len(result["times"]) + len(result["errors"])
+        print(
+            f"{path:<18}{count:>8}{statistics.median(times) * 1e6:>11.1f}{max(times) * 1e6:>9.1f}"
+            f"{len(result['errors']):>8}{len(result['suspicious']):>12}"
+        )
+    if show:
+        for path, result in sorted(results.items()):
+            for entry, outcome in result["errors"] + result["suspicious"]:
+                when = datetime.fromtimestamp(entry["t"]).isoformat(timespec="milliseconds")
+                print(f"\n--- {path} at {when}: {outcome!r}\n{entry['body']}")
+
+
+async def replay_coordinators(host, entries, realtime):
+    """Run the coordinators against the recording and print their data."""
+    sys.path.insert(0, str(ROOT))
+    try:
+        from homeassistant.core import HomeAssistant
+        from custom_components.cummins_generator import datetime as clock, recording, select, sensor
+    except ImportError as err:
+        raise SystemExit(f"--coordinators needs Home Assistant installed: {err}")
+
+    hass = HomeAssistant(tempfile.mkdtemp())
+    client = recording.ReplayClient(entries, host or "replay", realtime)
+    coordinators = (
+        sensor.CumminsGeneratorCoordinator(hass, client),
+        select.CumminsLoadCoordinator(hass, client),
+        clock.CumminsClockCoordinator(hass, client),
+    )
+    # Stand in for enabled entities on every page
+    for coordinator in coordinators:
+        for page in coordinator.pages:
+            coordinator.async_add_listener(lambda: None, page)
+    try:
+        start = time.perf_counter()
+        refreshes, skipped = await recording.async_replay(client, coordinators)
+        elapsed = time.perf_counter() - start
+        print(f"{refreshes} refreshes, {skipped} reads skipped, {elapsed:.2f} s")
+        for coordinator in coordinators:
+            print(f"\n{coordinator.name}: last_update_success={coordinator.last_update_success}")
+            if coordinator.last_exception:
+                print(f"  last error: {coordinator.last_exception}")
+            for key, value in sorted((coordinator.data or {}).items()):
+                print(f"  {key}: {value}")
+        for path, endpoint in sorted(client.stats.endpoints.items()):
+            stats = endpoint.as_dict()
+            print(f"{path}: {stats['requests']} reads, {stats['failures']} failed, parse {stats['parse_ms']} ms")
+    finally:
+        for coordinator in coordinators:
+            await coordinator.async_shutdown()
+        await hass.async_stop(force=True)
+
+
+def main():
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    args.add_argument("recording", type=pathlib.Path, help="recording file; its rotated backups are read too")
+    args.add_argument("--coordinators", action="store_true", help="run the coordinators instead of the parsers")
+    args.add_argument("--realtime", action="store_true", help="replay at the recorded pace")
+    args.add_argument("--show", action="store_true", help="print every body that failed or looked wrong")
+    opts = args.parse_args()
+
+    recording = load_module("recording")
+    host, entries = recording.load_recording(str(opts.recording))
+    if not entries:
+        raise SystemExit(f"{opts.recording}: no recorded exchanges")
+    span = entries[-1]["t"] - entries[0]["t"]
+    print(f"{opts.recording}: {host}, {len(entries)} exchanges over {span / 60:.1f} min")
+    if opts.coordinators:
+        asyncio.run(replay_coordinators(host, entries, opts.realtime))
+    else:
+        profile_parsers(entries, opts.show)
+
+
+if __name__ == "__main__":
+    main()
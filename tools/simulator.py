@@ -0,0 +1,457 @@
+"""Stand-in for a Cummins generator controller's web interface.
+
+Serves the pages the integration polls (index_data.html, loads.html,
+loads_data.html, exercise.html, timedate.html) behind Basic auth and
+accepts register writes on wr_logical.cgi, which change the state served
+back. Faults can be injected to see how polling strategies behave against
+slow or misbehaving controllers:
+
+    python tools/simulator.py --port 8080
+    python tools/simulator.py --controllers 50 --latency 0.3 --error-rate 0.02
+
+Several controllers listen on consecutive ports. Each one also answers
+``GET /_sim/stats`` with request and byte counters, and ``POST /_sim/faults``
+with a JSON body replaces its fault settings while it runs.
+
+Only aiohttp is needed. The page markup comes from benchmarks/fixtures; the
+values in it are rewritten from the simulated state on every request.
+"""
+import argparse
+import asyncio
+import base64
+import dataclasses
+import logging
+import pathlib
+import random
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from aiohttp import web
+
+_LOGGER = logging.getLogger(__name__)
+FIXTURES = pathlib.Path(__file__).resolve().parent.parent / "benchmarks" / "fixtures"
+
+STOPPED, STARTING, RUNNING, EXERCISING = 0, 2, 4, 22
+LCD_UTILITY_PRESENT = 0x01
+LCD_UTILITY_CONNECTED = 0x02
+LCD_GENSET_RUNNING = 0x0C
+LCD_STANDBY_DISABLED = 0x10
+CLOCK_REGISTERS = {448: "month", 449: "day", 450: "year", 402: "hour", 403: "minute"}
+EXERCISE_REGISTERS = {
+    425: "exercise_frequency",
+    391: "exercise_day",
+    392: "exercise_hour",
+    393: "exercise_minute",
+}
+
+
+@dataclass
+class Faults:
+    """Fault injection settings, applied to every page and write.
+
+    Rates are probabilities per request. ``paths`` limits the faults to
+    the listed pages; empty means every page.
+    """
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    max_connections: int = 0
+    error_rate: float = 0.0
+    truncate_rate: float = 0.0
+    truncate_lines: int = 10
+    hang_rate: float = 0.0
+    hang_time: float = 3600.0
+    chunk_size: int = 0
+    chunk_delay: float = 0.0
+    paths: list = field(default_factory=list)
+
+    def applies_to(self, path):
+        """Return True if faults apply to a page."""
+        return not self.paths or path in self.paths
+
+
+@dataclass
+class ControllerState:
+    """Registers and readings behind the simulated pages."""
+
+    status: int = STOPPED
+    fault_code: int = 0
+    battery: int = 136
+    engine_minutes: int = 60000
+    utility: bool = True
+    standby: bool = True
+    load_mode: int = 0
+    loads: list = field(default_factory=lambda: [0, 0])
+    exercise_frequency: int = 1
+    exercise_day: int = 6
+    exercise_hour: int = 10
+    exercise_minute: int = 30
+    clock_offset: float = 0.0
+    start_delay: float = 5.0
+    status_since: float = field(default_factory=time.monotonic)
+
+    def set_status(self, status):
+        """Change the genset status."""
+        self.status = status
+        self.status_since = time.monotonic()
+
+    def advance(self):
+        """Move a starting genset to running once its start delay passed."""
+        if self.status == STARTING and time.monotonic() - self.status_since >= self.start_delay:
+            self.set_status(RUNNING)
+
+    @property
+    def running(self):
+        """Return True while the engine turns."""
+        return self.status in (RUNNING, EXERCISING)
+
+    @property
+    def lcd_status(self):
+        """Return the LCD status bits reported on line 13."""
+        bits = 0
+        if self.utility:
+            bits |= LCD_UTILITY_PRESENT
+            if not self.running:
+                bits |= LCD_UTILITY_CONNECTED
+        if self.running:
+            bits |= LCD_GENSET_RUNNING
+        if not self.standby:
+            bits |= LCD_STANDBY_DISABLED
+        return bits
+
+    def now(self):
+        """Return the controller's local time."""
+        return datetime.now() + timedelta(seconds=self.clock_offset)
+
+    def write(self, registers):
+        """Apply a wr_logical.cgi request as the controller would."""
+        clock = {}
+        for register, value in registers.items():
+            if register in CLOCK_REGISTERS:
+                clock[CLOCK_REGISTERS[register]] = value
+            elif register == 242:
+                if value == 1:
+                    self.set_status(STOPPED)
+                elif value == 2 and not self.running:
+                    self.set_status(STARTING)
+                elif value == 3 and not self.running:
+                    self.set_status(EXERCISING)
+            elif register == 385:
+                self.standby = bool(value)
+            elif register == 426:
+                if value in (1, 2):
+                    self.load_mode = value - 1
+                elif value in (3, 4, 5, 6):
+                    self.loads[(value - 3) // 2] = 0 if value % 2 == 0 else 1
+            elif register in EXERCISE_REGISTERS:
+                setattr(self, EXERCISE_REGISTERS[register], value)
+            else:
+                _LOGGER.debug("Ignoring write to @%s", register)
+        if clock:
+            # The date and time registers arrive together, so set them as one
+            now = self.now()
+            try:
+                wanted = now.replace(**clock, second=0, microsecond=0)
+            except ValueError:
+                return
+            self.clock_offset += (wanted - now).total_seconds()
+
+
+def render_index(state):
+    """Render index_data.html, one reading per line."""
+    state.advance()
+    running = state.running
+    lines = [0] * 18
+    lines[3] = state.battery
+    lines[4] = state.status
+    lines[5] = state.loads[0]
+    lines[6] = state.loads[1]
+    lines[7] = 241 if running else 0
+    lines[8] = 60 if running else 0
+    lines[9] = state.engine_minutes
+    lines[13] = state.lcd_status
+    lines[14] = state.fault_code
+    return "\n".join(str(line) for line in lines) + "\n"
+
+
+def render_loads_data(state):
+    """Render loads_data.html (0 is connected)."""
+    return f"{state.load_mode}\n{state.loads[0]}\n{state.loads[1]}\n"
+
+
+def _substitute(template, *replacements):
+    """Rewrite the values in a fixture page."""
+    for pattern, value in replacements:
+        template = pattern.sub(lambda match: match.expand(value), template, count=1)
+    return template
+
+
+_LOAD_MODE = re.compile(r"(writeSingleOption\( [12], !?\()\d+")
+_FREQUENCY = re.compile(r'var match = \d+;(\s*writeSingleOption\(0,match == 0, "Never"\))')
+_DAYS = re.compile(r"writeDays\(\d+\)")
+_HOURS = re.compile(r"hrs24ToHrs12\(\d+\)")
+_EXERCISE_HOUR = re.compile(r"""(name="@392" value=')\d+""")
+_MINUTE_MATCH = re.compile(r'var match = \d+;(\s*writeSingleOption\(0,match == 0, "00"\))')
+_MONTH = re.compile(r"writeMonths\(\d+\)")
+_DAY_OF_MONTH = re.compile(r"writeOptions\(1,31,\d+")
+_YEAR = re.compile(r"writeOptions\(2006,2031,\d+")
+_CLOCK_HOUR = re.compile(r"""(name="@402" value=')\d+""")
+_CLOCK_MINUTE = re.compile(r"writeOptions\(0,59,\d+")
+
+
+class Pages:
+    """Fixture pages with the simulated values filled in."""
+
+    def __init__(self, fixtures=FIXTURES):
+        """Load the page templates."""
+        self.templates = {
+            name: (fixtures / name).read_text()
+            for name in ("loads.html", "exercise.html", "timedate.html")
+        }
+
+    def render(self, name, state):
+        """Return the body of a page, or None if it is not served."""
+        if name == "index_data.html":
+            return render_index(state)
+        if name == "loads_data.html":
+            return render_loads_data(state)
+        if name == "loads.html":
+            mode = str(state.load_mode)
+            template = self.templates[name]
+            return _LOAD_MODE.sub(lambda match: match.group(1) + mode, template)
+        if name == "exercise.html":
+            return _substitute(
+                self.templates[name],
+                (_FREQUENCY, f"var match = {state.exercise_frequency};\\1"),
+                (_DAYS, f"writeDays({state.exercise_day})"),
+                (_HOURS, f"hrs24ToHrs12({state.exercise_hour})"),
+                (_EXERCISE_HOUR, f"\\g<1>{state.exercise_hour}"),
+                (_MINUTE_MATCH, f"var match = {state.exercise_minute};\\1"),
+            )
+        if name == "timedate.html":
+            now = state.now()
+            return _substitute(
+                self.templates[name],
+                (_MONTH, f"writeMonths({now.month})"),
+                (_DAY_OF_MONTH, f"writeOptions(1,31,{now.day}"),
+                (_YEAR, f"writeOptions(2006,2031,{now.year}"),
+                (_HOURS, f"hrs24ToHrs12({now.hour})"),
+                (_CLOCK_HOUR, f"\\g<1>{now.hour}"),
+                (_CLOCK_MINUTE, f"writeOptions(0,59,{now.minute}"),
+            )
+        return None
+
+
+class Simulator:
+    """One simulated controller."""
+
+    def __init__(self, password="cummins", state=None, faults=None, pages=None, seed=None, charset="utf-8"):
+        """Initialize the simulator.
+
+        ``charset`` goes into the Content-Type of every page; None sends a
+        bare ``text/html``, as the real controller does.
+        """
+        self.state = state or ControllerState()
+        self.faults = faults or Faults()
+        self.pages = pages or Pages()
+        self.random = random.Random(seed)
+        self.charset = charset
+        self.requests = {}
+        self.bytes_sent = 0
+        self.writes = []
+        self.active = 0
+        self.peak_active = 0
+        self.refused = 0
+        self._auth = "Basic " + base64.b64encode(f"admin:{password}".encode()).decode("ascii")
+
+    @property
+    def app(self):
+        """Return an aiohttp application serving this controller."""
+        app = web.Application()
+        app.router.add_get("/_sim/stats", self._handle_stats)
+        app.router.add_post("/_sim/faults", self._handle_faults)
+        app.router.add_get("/{name}", self._handle_page)
+        return app
+
+    def stats(self):
+        """Return request, byte and connection counters."""
+        return {
+            "requests": dict(self.requests),
+            "bytes_sent": self.bytes_sent,
+            "writes": len(self.writes),
+            "peak_active": self.peak_active,
+            "refused": self.refused,
+        }
+
+    def reset_stats(self):
+        """Clear the counters."""
+        self.requests.clear()
+        self.bytes_sent = 0
+        self.writes.clear()
+        self.peak_active = self.active
+        self.refused = 0
+
+    async def _handle_stats(self, request):
+        return web.json_response(self.stats())
+
+    async def _handle_faults(self, request):
+        settings = await request.json()
+        self.faults = Faults(**settings)
+        return web.json_response(dataclasses.asdict(self.faults))
+
+    async def _handle_page(self, request):
+        name = request.match_info["name"]
+        faults = self.faults if self.faults.applies_to(name) else Faults()
+        if faults.max_connections and self.active >= faults.max_connections:
+            # Like the real controller under load: drop the connection
+            self.refused += 1
+            request.transport.close()
+            raise web.HTTPServiceUnavailable()
+        self.active += 1
+        self.peak_active = max(self.peak_active, self.active)
+        try:
+            return await self._respond(request, name, faults)
+        finally:
+            self.active -= 1
+
+    async def _respond(self, request, name, faults):
+        self.requests[name] = self.requests.get(name, 0) + 1
+        if request.headers.get("Authorization") != self._auth:
+            return web.Response(status=401, headers={"WWW-Authenticate": 'Basic realm="Genset"'})
+
+        delay = faults.latency + self.random.uniform(0, faults.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+        if faults.hang_rate and self.random.random() < faults.hang_rate:
+            await asyncio.sleep(faults.hang_time)
+        if faults.error_rate and self.random.random() < faults.error_rate:
+            return web.Response(status=500, text="Internal Server Error")
+
+        if name == "wr_logical.cgi":
+            try:
+                registers = {
+                    int(key[1:]): int(value)
+                    for key, value in request.query.items()
+                    if key.startswith("@")
+                }
+            except ValueError:
+                return web.Response(status=400)
+            self.state.write(registers)
+            self.writes.append(request.query_string)
+            body = "<html><body>OK</body></html>"
+        else:
+            body = self.pages.render(name, self.state)
+            if body is None:
+                return web.Response(status=404)
+
+        if faults.truncate_rate and self.random.random() < faults.truncate_rate:
+            body = "\n".join(body.split("\n")[: faults.truncate_lines])
+        if faults.chunk_size:
+            return await self._respond_slowly(request, body.encode(), faults)
+        self.bytes_sent += len(body)
+        return web.Response(body=body.encode(), content_type="text/html", charset=self.charset)
+
+    async def _respond_slowly(self, request, body, faults):
+        """Send the body a chunk at a time, like a slow link.
+
+        Only the chunks sent before the client hangs up are counted.
+        """
+        content_type = "text/html" if self.charset is None else f"text/html; charset={self.charset}"
+        response = web.StreamResponse(headers={"Content-Type": content_type})
+        response.content_length = len(body)
+        await response.prepare(request)
+        try:
+            for start in range(0, len(body), faults.chunk_size):
+                if request.transport is None or request.transport.is_closing():
+                    break
+                chunk = body[start:start + faults.chunk_size]
+                await response.write(chunk)
+                self.bytes_sent += len(chunk)
+                await asyncio.sleep(faults.chunk_delay)
+            await response.write_eof()
+        except ConnectionResetError:
+            pass
+        return response
+
+
+async def serve(simulators, host="127.0.0.1", port=8080):
+    """Start each simulator on consecutive ports; return the runners."""
+    runners = []
+    for offset, simulator in enumerate(simulators):
+        runner = web.AppRunner(simulator.app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port + offset).start()
+        runners.append(runner)
+    return runners
+
+
+def main():
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    args.add_argument("--host", default="127.0.0.1")
+    args.add_argument("--port", type=int, default=8080, help="port of the first controller")
+    args.add_argument("--controllers", type=int, default=1)
+    args.add_argument("--password", default="cummins")
+    args.add_argument("--seed", type=int, help="seed for repeatable fault injection")
+    args.add_argument("--no-charset", action="store_true", help="send Content-Type: text/html without a charset")
+    args.add_argument("--start-delay", type=float, default=5.0, help="seconds from Starting to Running")
+    args.add_argument("--clock-offset", type=float, default=0.0, help="controller clock offset in seconds")
+    args.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    args.add_argument("--jitter", type=float, default=0.0, help="random extra latency, up to this many seconds")
+    args.add_argument("--max-connections", type=int, default=0, help="drop requests beyond this many at once")
+    args.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 500")
+    args.add_argument("--truncate-rate", type=float, default=0.0, help="fraction of bodies cut short")
+    args.add_argument("--truncate-lines", type=int, default=10, help="lines kept in a truncated body")
+    args.add_argument("--hang-rate", type=float, default=0.0, help="fraction of requests that never answer")
+    args.add_argument("--hang-time", type=float, default=3600.0, help="seconds a hung request waits")
+    args.add_argument("--chunk-size", type=int, default=0, help="send bodies in chunks of this many bytes")
+    args.add_argument("--chunk-delay", type=float, default=0.0, help="seconds between body chunks")
+    args.add_argument("--path", action="append", default=[], help="only inject faults on this page (repeatable)")
+    args.add_argument("-v", "--verbose", action="store_true")
+    opts = args.parse_args()
+    logging.basicConfig(level=logging.DEBUG if opts.verbose else logging.INFO)
+
+    pages = Pages()
+    simulators = [
+        Simulator(
+            password=opts.password,
+            state=ControllerState(start_delay=opts.start_delay, clock_offset=opts.clock_offset),
+            faults=Faults(
+                latency=opts.latency,
+                jitter=opts.jitter,
+                max_connections=opts.max_connections,
+                error_rate=opts.error_rate,
+                truncate_rate=opts.truncate_rate,
+                truncate_lines=opts.truncate_lines,
+                hang_rate=opts.hang_rate,
+                hang_time=opts.hang_time,
+                chunk_size=opts.chunk_size,
+                chunk_delay=opts.chunk_delay,
+                paths=opts.path,
+            ),
+            pages=pages,
+            seed=None if opts.seed is None else opts.seed + index,
+            charset=None if opts.no_charset else "utf-8",
+        )
+        for index in range(opts.controllers)
+    ]
+
+    async def run():
+        runners = await serve(simulators, opts.host, opts.port)
+        last = opts.port + len(simulators) - 1
+        _LOGGER.info("Serving %d controller(s) on %s:%d-%d", len(simulators), opts.host, opts.port, last)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            for runner in runners:
+                await runner.cleanup()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()